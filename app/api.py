@@ -2,25 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 import mimetypes
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import delete, func, select
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from yt_dlp import YoutubeDL
 
-from app.config import get_settings
+from app.celery_app import TaskByName
+from app.config import COMPUTE_TYPES, get_settings
 from app.db import get_session, init_db
-from app.download_processor import _base_ydl_params, enqueue_url
-from app.transcription_processor import process_untranscribed_videos
+from app.db_async import Reader, dispose_async_engines, get_reader
+from app.events import EventBroker, is_stream_id
+from app.info_cache import PREVIEW_NAMESPACE, LoaderBusy, get_preview_loader
 from app.models import Batch, Job, JobEvent, JobStatus
+from app.pagination import InvalidCursor, newest_first, split_page
+from app.progress import live_progress_for
 from app.schemas import (
     BatchCreateResponse,
     BatchDetailResponse,
@@ -35,9 +41,21 @@ from app.schemas import (
     PreviewResponse,
     SettingsResponse,
 )
-from app.services.jobs import create_batch, update_batch_status
+from app.services.jobs import (
+    create_batch,
+    find_paths_used_by_other_jobs,
+    remove_job,
+    update_batch_status,
+)
 
 settings = get_settings()
+broker = EventBroker(settings.redis_url)
+
+# Sent by name: importing the task modules would load yt-dlp and faster-whisper into the API.
+enqueue_url = TaskByName("app.download_processor.enqueue_url")
+process_untranscribed_videos = TaskByName(
+    "app.transcription_processor.process_untranscribed_videos"
+)
 
 
 class YouTubeURL(BaseModel):
@@ -54,8 +72,19 @@ def _resolve_download_path(path_value: str) -> Path:
     return candidate
 
 
+_preview_ydl = threading.local()
+
+
 def _fetch_preview_info(url: str) -> Dict[str, Any]:
-    ydl = YoutubeDL({**_base_ydl_params(), "skip_download": True, "noplaylist": True})
+    # One YoutubeDL per loader thread: instances are not thread-safe but are costly to build.
+    ydl = getattr(_preview_ydl, "instance", None)
+    if ydl is None:
+        from app.download_processor import RateLimitedYoutubeDL, _base_ydl_params
+
+        ydl = RateLimitedYoutubeDL(
+            {**_base_ydl_params(), "skip_download": True, "noplaylist": True}
+        )
+        _preview_ydl.instance = ydl
     info = ydl.extract_info(url, download=False)
     if not isinstance(info, dict):
         raise ValueError("Unable to fetch preview metadata")
@@ -107,10 +136,71 @@ def _build_format_options(info: Dict[str, Any]) -> List[DownloadFormatOption]:
     return options
 
 
+async def _with_live_progress(jobs: Sequence[Job]) -> Sequence[Any]:
+    """Overlay Redis progress on downloading jobs, whose rows are only flushed periodically."""
+    if not any(job.status == JobStatus.downloading for job in jobs):
+        return jobs
+    live = await run_in_threadpool(live_progress_for, jobs)
+    if not live:
+        return jobs
+    responses = []
+    for job in jobs:
+        response = JobResponse.model_validate(job)
+        if live.get(job.id, 0.0) > response.progress:
+            response.progress = live[job.id]
+        responses.append(response)
+    return responses
+
+
+def _keyset(stmt, model, cursor: Optional[str], limit: int):
+    try:
+        return newest_first(stmt, model, cursor, limit)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+async def _event_stream(
+    batch_id: Optional[str], job_id: Optional[str], last_event_id: Optional[str]
+) -> StreamingResponse:
+    if not settings.event_stream_enabled:
+        raise HTTPException(status_code=404, detail="Event stream is disabled")
+    if last_event_id and not is_stream_id(last_event_id):
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    stream = broker.stream(
+        batch_id=batch_id,
+        job_id=job_id,
+        last_event_id=last_event_id,
+        keepalive_seconds=settings.event_stream_keepalive,
+    )
+    try:
+        # Subscribe before responding so an unreachable Redis is a 503, not a broken stream.
+        first = await anext(stream)
+    except StopAsyncIteration:
+        first = ""
+    except Exception as exc:
+        await stream.aclose()
+        raise HTTPException(status_code=503, detail="Event stream unavailable") from exc
+
+    async def body():
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
     yield
+    await broker.close()
+    await dispose_async_engines()
+    get_preview_loader().shutdown()
+    get_preview_loader.cache_clear()
 
 
 def create_app() -> FastAPI:
@@ -122,10 +212,11 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     @app.get("/health")
-    def health() -> dict:
+    async def health() -> dict:
         return {"status": "ok"}
 
     @app.get("/settings", response_model=SettingsResponse)
@@ -138,9 +229,14 @@ def create_app() -> FastAPI:
         )
 
     @app.post("/preview", response_model=PreviewResponse)
-    def preview_formats(payload: PreviewRequest) -> PreviewResponse:
+    async def preview_formats(payload: PreviewRequest) -> PreviewResponse:
         try:
-            info = _fetch_preview_info(payload.url)
+            future = get_preview_loader().load(
+                PREVIEW_NAMESPACE, payload.url, lambda url: _fetch_preview_info(url)
+            )
+            info = await asyncio.wrap_future(future)
+        except LoaderBusy as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
         except Exception as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -162,9 +258,31 @@ def create_app() -> FastAPI:
 
     @app.post("/jobs", response_model=BatchCreateResponse, status_code=202)
     def create_jobs(request: JobCreateRequest, session: Session = Depends(get_session)) -> BatchCreateResponse:
+        # Workers download and load whatever model a job names, so only listed names pass.
+        allowed_models = [*settings.whisper_allowed_models, settings.whisper_model]
+        if request.whisper_model and request.whisper_model not in allowed_models:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Model must be one of: {', '.join(dict.fromkeys(allowed_models))}",
+            )
+        # "auto" may resolve to the CPU, so anything but CUDA gets the CPU list.
+        compute_types = COMPUTE_TYPES.get(settings.transcription_device, COMPUTE_TYPES["cpu"])
+        if request.compute_type and request.compute_type not in compute_types:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Compute type must be one of: {', '.join(compute_types)}",
+            )
         batch = create_batch(session, request.url)
         session.commit()
-        enqueue_url.delay(batch.id, request.url, request.format_id)
+        enqueue_url.delay(
+            batch.id,
+            request.url,
+            request.format_id,
+            audio_only=request.audio_only,
+            force=request.force,
+            whisper_model=request.whisper_model,
+            compute_type=request.compute_type,
+        )
         return BatchCreateResponse(batch_id=batch.id, message="Queued for processing")
 
     @app.post("/download_url", response_model=BatchCreateResponse, status_code=202)
@@ -180,12 +298,14 @@ def create_app() -> FastAPI:
         return {"message": "Processing untranscribed videos started"}
 
     @app.get("/jobs", response_model=JobListResponse)
-    def list_jobs(
+    async def list_jobs(
         status: Optional[JobStatus] = Query(default=None),
         batch_id: Optional[str] = Query(default=None),
         limit: int = Query(default=50, ge=1, le=200),
         offset: int = Query(default=0, ge=0),
-        session: Session = Depends(get_session),
+        cursor: Optional[str] = Query(default=None),
+        include_total: bool = Query(default=True),
+        reader: Reader = Depends(get_reader),
     ) -> JobListResponse:
         stmt = select(Job)
         count_stmt = select(func.count()).select_from(Job)
@@ -196,16 +316,30 @@ def create_app() -> FastAPI:
             stmt = stmt.where(Job.batch_id == batch_id)
             count_stmt = count_stmt.where(Job.batch_id == batch_id)
 
-        total = session.scalar(count_stmt) or 0
-        jobs = session.scalars(stmt.order_by(Job.created_at.desc()).limit(limit).offset(offset)).all()
-        return JobListResponse(jobs=jobs, total=total)
+        total = ((await reader.scalar(count_stmt)) or 0) if include_total else None
+        page_stmt = _keyset(stmt, Job, cursor, limit)
+        if not cursor:
+            page_stmt = page_stmt.offset(offset)
+        jobs, next_cursor = split_page(await reader.all(page_stmt), limit)
+        return JobListResponse(
+            jobs=await _with_live_progress(jobs), total=total, next_cursor=next_cursor
+        )
+
+    @app.get("/jobs/stream")
+    async def stream_jobs(
+        batch_id: Optional[str] = Query(default=None),
+        job_id: Optional[str] = Query(default=None),
+        last_event_id: Optional[str] = Query(default=None),
+        last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    ) -> StreamingResponse:
+        return await _event_stream(batch_id, job_id, last_event_id_header or last_event_id)
 
     @app.get("/jobs/{job_id}", response_model=JobResponse)
-    def get_job(job_id: str, session: Session = Depends(get_session)) -> JobResponse:
-        job = session.get(Job, job_id)
+    async def get_job(job_id: str, reader: Reader = Depends(get_reader)) -> JobResponse:
+        job = await reader.get(Job, job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
-        return job
+        return (await _with_live_progress([job]))[0]
 
     @app.delete("/jobs/{job_id}", response_model=DeleteJobResponse)
     def delete_job(
@@ -220,27 +354,41 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=409, detail="Cannot delete an active job")
 
         if purge_files:
-            for path_value in (job.download_path, job.transcript_path):
-                if not path_value:
+            paths = [path for path in (job.download_path, job.transcript_path) if path]
+            shared = find_paths_used_by_other_jobs(session, job.id, paths)
+            for path_value in paths:
+                if path_value in shared:
                     continue
                 candidate = _resolve_download_path(path_value)
                 if candidate.exists():
                     candidate.unlink()
 
         batch_id = job.batch_id
-        session.execute(delete(JobEvent).where(JobEvent.job_id == job_id))
-        session.delete(job)
-        session.flush()
+        remove_job(session, job)
         if batch_id:
             update_batch_status(session, batch_id)
         session.commit()
         return DeleteJobResponse(job_id=job_id, message="Job removed")
 
     @app.get("/jobs/{job_id}/events", response_model=List[JobEventResponse])
-    def get_job_events(job_id: str, session: Session = Depends(get_session)) -> List[JobEventResponse]:
-        events = session.scalars(
-            select(JobEvent).where(JobEvent.job_id == job_id).order_by(JobEvent.created_at.asc())
-        ).all()
+    async def get_job_events(
+        job_id: str,
+        response: Response,
+        after_id: Optional[int] = Query(default=None, ge=0),
+        limit: Optional[int] = Query(default=None, ge=1, le=1000),
+        reader: Reader = Depends(get_reader),
+    ) -> List[JobEventResponse]:
+        stmt = select(JobEvent).where(JobEvent.job_id == job_id)
+        if after_id is not None:
+            stmt = stmt.where(JobEvent.id > after_id)
+        stmt = stmt.order_by(JobEvent.id.asc())
+        if limit is None:
+            return await reader.all(stmt)
+
+        events = await reader.all(stmt.limit(limit + 1))
+        if len(events) > limit:
+            events = events[:limit]
+            response.headers["X-Next-Cursor"] = str(events[-1].id)
         return events
 
     @app.get("/jobs/{job_id}/media")
@@ -274,23 +422,40 @@ def create_app() -> FastAPI:
         return PlainTextResponse(transcript_text)
 
     @app.get("/batches", response_model=List[BatchResponse])
-    def list_batches(
+    async def list_batches(
+        response: Response,
         limit: int = Query(default=50, ge=1, le=200),
         offset: int = Query(default=0, ge=0),
-        session: Session = Depends(get_session),
+        cursor: Optional[str] = Query(default=None),
+        reader: Reader = Depends(get_reader),
     ) -> List[BatchResponse]:
-        batches = session.scalars(
-            select(Batch).order_by(Batch.created_at.desc()).limit(limit).offset(offset)
-        ).all()
+        stmt = _keyset(select(Batch), Batch, cursor, limit)
+        if not cursor:
+            stmt = stmt.offset(offset)
+        batches, next_cursor = split_page(await reader.all(stmt), limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return batches
 
+    @app.get("/batches/{batch_id}/stream")
+    async def stream_batch(
+        batch_id: str,
+        last_event_id: Optional[str] = Query(default=None),
+        last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    ) -> StreamingResponse:
+        return await _event_stream(batch_id, None, last_event_id_header or last_event_id)
+
     @app.get("/batches/{batch_id}", response_model=BatchDetailResponse)
-    def get_batch(batch_id: str, session: Session = Depends(get_session)) -> BatchDetailResponse:
-        batch = session.get(Batch, batch_id)
+    async def get_batch(
+        batch_id: str, reader: Reader = Depends(get_reader)
+    ) -> BatchDetailResponse:
+        batch = await reader.get(Batch, batch_id)
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
-        jobs = session.scalars(select(Job).where(Job.batch_id == batch_id)).all()
-        return BatchDetailResponse(batch=batch, jobs=jobs, total=len(jobs))
+        jobs = await reader.all(select(Job).where(Job.batch_id == batch_id))
+        return BatchDetailResponse(
+            batch=batch, jobs=await _with_live_progress(jobs), total=len(jobs)
+        )
 
     return app
 
@@ -0,0 +1,160 @@
+"""Content-addressed cache of decoded 16 kHz PCM audio."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.audio_tools import SAMPLE_RATE, NdArray, load_audio
+from app.config import get_settings
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+_SUFFIX = ".f32"
+
+
+class AudioCache:
+    """Size-bounded LRU cache of decoded audio, stored as memory-mappable float32 files.
+
+    Entries are keyed by a SHA-256 of the source file contents, so a file that
+    is re-downloaded or moved still hits. Reads return a read-only ``np.memmap``
+    that the transcriber consumes without copying. Recency is tracked with the
+    entry's mtime, which also makes eviction order survive restarts.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        decoder: Callable[[Path], NdArray] = load_audio,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.decoder = decoder
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._keys: Dict[Tuple[str, int, int], str] = {}
+
+    def key_for(self, audio_file: Path) -> str:
+        """Return the content key for a file, hashing it at most once per (size, mtime)."""
+        stat = audio_file.stat()
+        fingerprint = (str(audio_file.resolve()), stat.st_size, stat.st_mtime_ns)
+        key = self._keys.get(fingerprint)
+        if key is not None:
+            return key
+
+        digest = hashlib.sha256(f"f32-{SAMPLE_RATE}:".encode())
+        with open(audio_file, "rb") as handle:
+            for block in iter(lambda: handle.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        key = digest.hexdigest()
+        self._keys[fingerprint] = key
+        return key
+
+    def load(self, audio_file: Path) -> NdArray:
+        """Return decoded audio for a file, decoding and storing it on a miss."""
+        key = self.key_for(audio_file)
+        entry = self._entry_path(key)
+        if entry.exists():
+            with self._lock:
+                self.hits += 1
+            os.utime(entry)
+            return self._open(entry)
+
+        with self._lock:
+            self.misses += 1
+        audio = np.ascontiguousarray(self.decoder(audio_file), dtype=np.float32)
+        self._store(entry, audio)
+        self._evict()
+        return self._open(entry) if entry.exists() else audio
+
+    def contains(self, audio_file: Path) -> bool:
+        return self._entry_path(self.key_for(audio_file)).exists()
+
+    def invalidate(self, audio_file: Path) -> bool:
+        """Drop the cached entry for a source file. Returns True if one was removed."""
+        return self.invalidate_key(self.key_for(audio_file))
+
+    def invalidate_key(self, key: str) -> bool:
+        try:
+            self._entry_path(key).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def clear(self) -> int:
+        """Remove every entry and return how many were dropped."""
+        removed = 0
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+            removed += 1
+        self._keys.clear()
+        return removed
+
+    def size_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries()),
+            "bytes": self.size_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_SUFFIX}"
+
+    def _entries(self) -> list[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return list(self.cache_dir.glob(f"*{_SUFFIX}"))
+
+    def _store(self, entry: Path, audio: NdArray) -> None:
+        if audio.nbytes > self.max_bytes:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        audio.astype("<f4", copy=False).tofile(tmp_path)
+        os.replace(tmp_path, entry)
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    @staticmethod
+    def _open(entry: Path) -> NdArray:
+        if entry.stat().st_size == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(entry, dtype="<f4", mode="r")
+
+
+@lru_cache
+def get_audio_cache() -> Optional[AudioCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    settings = get_settings()
+    if not settings.audio_cache_enabled:
+        return None
+    return AudioCache(Path(settings.audio_cache_dir), settings.audio_cache_max_bytes)
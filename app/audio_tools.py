@@ -1,6 +1,7 @@
 """Audio tools for processing audio files"""
 import os
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 import ffmpeg
 import numpy as np
@@ -32,6 +33,64 @@ def convert_to_float_array(audio_data: bytes) -> NdArray:
     return float_array
 
 
+def load_audio(audio_file: Path) -> NdArray:
+    """Decode a file into a 16 kHz mono float array"""
+    return convert_to_float_array(decode_audio(audio_file))
+
+
+def probe_duration(audio_file: Path) -> Optional[float]:
+    """Return the container duration in seconds, or None if unknown"""
+    try:
+        probe = ffmpeg.probe(str(audio_file))
+    except (ffmpeg.Error, FileNotFoundError):
+        return None
+    duration = probe.get("format", {}).get("duration")
+    try:
+        return float(duration) if duration is not None else None
+    except ValueError:
+        return None
+
+
+def find_silence_splits(
+    audio: NdArray,
+    window_seconds: float,
+    search_seconds: float = 30.0,
+    frame_seconds: float = 0.05,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Tuple[int, int]]:
+    """Split audio into windows of roughly window_seconds, cutting at the quietest frame.
+
+    Each cut is placed at the lowest-energy frame within search_seconds of the
+    nominal window boundary, so words are not split across windows. Only the
+    search regions are inspected, which keeps this cheap on multi-hour inputs.
+    Returns (start, end) sample offsets covering the whole input.
+    """
+    total = int(audio.shape[0])
+    window = max(1, int(window_seconds * sample_rate))
+    if total <= window:
+        return [(0, total)]
+
+    frame = max(1, int(frame_seconds * sample_rate))
+    search = int(search_seconds * sample_rate)
+    bounds = [0]
+    start = 0
+    while total - start > window:
+        target = start + window
+        lo = max(start + frame, target - search)
+        hi = min(total, target + search)
+        n_frames = (hi - lo) // frame
+        if n_frames <= 0:
+            cut = target
+        else:
+            region = audio[lo : lo + n_frames * frame].reshape(n_frames, frame)
+            energy = np.square(region, dtype=np.float32).mean(axis=1)
+            cut = lo + int(np.argmin(energy)) * frame + frame // 2
+        bounds.append(cut)
+        start = cut
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
 def convert_audio_format(
     input_file: str, output_file_name: str, audio_format: str
 ) -> str:
@@ -0,0 +1,284 @@
+"""Find the fastest transcription settings for this host within a memory budget.
+
+Runs ``WhisperTranscriber`` over a grid of compute type, beam size and CPU
+threads on the sequential path, one fresh process per configuration so peak
+RSS is measured in isolation. With the fastest of those, each inference
+batch size is then timed on the batched path, transcribing ``--batch-clips``
+copies of the sample the way ``QTUBE_TRANSCRIPTION_BATCH_SIZE`` groups short
+clips. Batching is enabled only if it beats the sequential path per second
+of audio. The result is written to ``data/calibration.env``, which
+``Settings`` loads below .env and the environment. Hugging Face Hub access
+is disabled, so the model must already be in the local cache or be a local
+path::
+
+    python -m app.calibrate --model base.en --audio sample.wav --max-rss-mb 2048
+
+Without ``--audio`` a synthetic voiced signal is used. It is fine for
+comparing compute types and thread counts. The batched path is only tried
+with real speech, because it keeps only what the VAD accepts as speech.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import wave
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from queue import Empty
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.audio_tools import SAMPLE_RATE
+from app.config import CALIBRATION_FILE
+from app.cpu_topology import available_cpus
+
+
+@dataclass(frozen=True)
+class Candidate:
+    compute_type: str
+    beam_size: int
+    cpu_threads: int
+    batch_size: int = 1
+    clips: int = 1
+
+    @property
+    def batched(self) -> bool:
+        return self.batch_size > 1
+
+    def environment(self) -> Dict[str, str]:
+        """The settings this candidate was measured under; batching is off unless batched."""
+        environment = {
+            "QTUBE_TRANSCRIPTION_COMPUTE_TYPE": self.compute_type,
+            "QTUBE_TRANSCRIPTION_BEAM_SIZE": str(self.beam_size),
+            "QTUBE_TRANSCRIPTION_CPU_THREADS": str(self.cpu_threads),
+            "QTUBE_TRANSCRIPTION_BATCH_SIZE": str(self.clips if self.batched else 1),
+        }
+        if self.batched:
+            environment["QTUBE_TRANSCRIPTION_INFERENCE_BATCH_SIZE"] = str(self.batch_size)
+        return environment
+
+
+@dataclass
+class Result:
+    candidate: Candidate
+    real_time_factor: Optional[float]
+    max_rss_mb: Optional[float]
+    error: Optional[str] = None
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """A voiced, syllable-paced signal: harmonics under moving formants, with pauses."""
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * SAMPLE_RATE)
+    t = np.arange(samples) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    formant = 1 + 0.5 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi))
+    voice = formant * sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.5
+    pauses = (np.sin(2 * np.pi * 0.25 * t) > -0.7).astype(np.float32)
+    signal = voice * syllables * pauses + 0.01 * rng.standard_normal(samples)
+    return (0.3 * signal / np.abs(signal).max()).astype(np.float32)
+
+
+def _write_wav(path: Path, audio: np.ndarray) -> None:
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(SAMPLE_RATE)
+        handle.writeframes((audio * 32767).astype("<i2").tobytes())
+
+
+def _measure(model: str, audio_file: str, candidate: Candidate, repeats: int, queue) -> None:
+    """Child process: load the model under the candidate settings and time transcription."""
+    os.environ.update(candidate.environment())
+    os.environ["QTUBE_AUDIO_CACHE_ENABLED"] = "false"
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    try:
+        from app.audio_tools import load_audio
+        from app.whisper_transcriber import WhisperTranscriber
+
+        transcriber = WhisperTranscriber(
+            model=model, compute_type=candidate.compute_type, cpu_threads=candidate.cpu_threads
+        )
+        audio = load_audio(Path(audio_file))
+        duration = audio.shape[0] / SAMPLE_RATE
+        if candidate.batched:
+            duration *= candidate.clips
+        timings = []
+        for _ in range(repeats + 1):
+            started = time.perf_counter()
+            if candidate.batched:
+                transcriber.transcribe_batch([audio] * candidate.clips)
+            else:
+                segments, _duration = transcriber.iter_segments(Path(audio_file))
+                for _segment in segments:
+                    pass
+            timings.append(time.perf_counter() - started)
+        # The first pass warms caches and allocators, so it is left out.
+        elapsed = min(timings[1:])
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        queue.put({"real_time_factor": elapsed / duration, "max_rss_mb": max_rss_mb})
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def measure(model: str, audio_file: Path, candidate: Candidate, repeats: int) -> Result:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_measure, args=(model, str(audio_file), candidate, repeats, queue)
+    )
+    process.start()
+    process.join()
+    try:
+        outcome: Dict[str, Any] = queue.get(timeout=5)
+    except Empty:
+        outcome = {"error": f"worker exited with code {process.exitcode}"}
+    return Result(
+        candidate=candidate,
+        real_time_factor=outcome.get("real_time_factor"),
+        max_rss_mb=outcome.get("max_rss_mb"),
+        error=outcome.get("error"),
+    )
+
+
+def build_grid(
+    compute_types: List[str], beam_sizes: List[int], cpu_threads: List[int]
+) -> List[Candidate]:
+    return [
+        Candidate(compute_type, beam_size, threads)
+        for compute_type, beam_size, threads in itertools.product(
+            compute_types, beam_sizes, cpu_threads
+        )
+    ]
+
+
+def batched_grid(best: Candidate, batch_sizes: List[int], clips: int) -> List[Candidate]:
+    """The sequential winner's settings on the batched path, one per inference batch size."""
+    return [replace(best, batch_size=size, clips=clips) for size in batch_sizes if size > 1]
+
+
+def run_grid(model: str, audio_file: Path, grid: List[Candidate], repeats: int) -> List[Result]:
+    results = []
+    for candidate in grid:
+        result = measure(model, audio_file, candidate, repeats)
+        results.append(result)
+        settings_text = ", ".join(f"{k}={v}" for k, v in asdict(candidate).items())
+        if result.error:
+            print(f"  {settings_text}: failed ({result.error})")
+        else:
+            print(
+                f"  {settings_text}: RTF {result.real_time_factor:.3f}, "
+                f"peak RSS {result.max_rss_mb:.0f} MB"
+            )
+    return results
+
+
+def default_thread_counts(cpus: int) -> List[int]:
+    """Powers of two up to the usable CPUs, plus the CPU count itself."""
+    counts = [2**power for power in range(int(math.log2(cpus)) + 1)]
+    return sorted(set(counts + [cpus]))
+
+
+def choose(results: List[Result], max_rss_mb: Optional[float]) -> Optional[Result]:
+    """The lowest real-time factor among runs that succeeded within the memory budget."""
+    fitting = [
+        result
+        for result in results
+        if result.error is None
+        and result.real_time_factor is not None
+        and (max_rss_mb is None or (result.max_rss_mb or 0) <= max_rss_mb)
+    ]
+    return min(fitting, key=lambda result: result.real_time_factor, default=None)
+
+
+def write_settings(
+    path: Path, model: str, best: Result, batched: Optional[Result] = None
+) -> None:
+    """Write the sequential winner, plus the batched settings when batching beat it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    environment = best.candidate.environment()
+    lines = [
+        f"# Written by python -m app.calibrate on {datetime.now():%Y-%m-%d %H:%M} for {model}:",
+        f"# real-time factor {best.real_time_factor:.3f}, peak RSS {best.max_rss_mb:.0f} MB",
+    ]
+    if batched is not None:
+        environment.update(batched.candidate.environment())
+        lines.append(
+            f"# batched short clips: real-time factor {batched.real_time_factor:.3f}, "
+            f"peak RSS {batched.max_rss_mb:.0f} MB"
+        )
+    lines += [f"{key}={value}" for key, value in environment.items()]
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate transcription settings.")
+    parser.add_argument("--model", default=None, help="defaults to QTUBE_WHISPER_MODEL")
+    parser.add_argument("--audio", type=Path, default=None, help="speech sample to transcribe")
+    parser.add_argument("--seconds", type=float, default=30.0, help="synthetic sample length")
+    parser.add_argument("--compute-types", nargs="+", default=["int8", "int8_float32", "float32"])
+    parser.add_argument("--beam-sizes", nargs="+", type=int, default=[1, 5])
+    parser.add_argument("--cpu-threads", nargs="+", type=int, default=None)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[8, 16])
+    parser.add_argument("--batch-clips", type=int, default=4, help="clips per batched run")
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--output", type=Path, default=Path(CALIBRATION_FILE))
+    parser.add_argument("--dry-run", action="store_true", help="print the result only")
+    args = parser.parse_args(argv)
+
+    from app.config import get_settings
+
+    model = args.model or get_settings().whisper_model
+    grid = build_grid(
+        args.compute_types,
+        args.beam_sizes,
+        args.cpu_threads or default_thread_counts(available_cpus()),
+    )
+
+    batched = None
+    with tempfile.TemporaryDirectory(prefix="qtube-calibrate-") as tmp_dir:
+        audio_file = args.audio
+        if audio_file is None:
+            audio_file = Path(tmp_dir) / "synthetic.wav"
+            _write_wav(audio_file, synthetic_speech(args.seconds))
+        print(f"Calibrating {model} on {audio_file.name}: {len(grid)} configurations")
+        best = choose(run_grid(model, audio_file, grid, args.repeats), args.max_rss_mb)
+        if best is None:
+            print("No configuration finished within the memory budget.")
+            return 1
+        print(f"Fastest sequential: {asdict(best.candidate)}")
+
+        candidates = batched_grid(best.candidate, args.batch_sizes, args.batch_clips)
+        if args.audio and candidates:
+            print(f"Batched path, {args.batch_clips} clips per batch:")
+            fastest = choose(
+                run_grid(model, audio_file, candidates, args.repeats), args.max_rss_mb
+            )
+            if fastest is not None and fastest.real_time_factor < best.real_time_factor:
+                batched = fastest
+                print(f"Batching is faster: {asdict(batched.candidate)}")
+            else:
+                print("Batching is not faster; leaving it off.")
+
+    if not args.dry_run:
+        write_settings(args.output, model, best, batched)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
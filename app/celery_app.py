@@ -20,7 +20,24 @@ celery_app.conf.update(
     task_routes={
         "app.download_processor.*": {"queue": "download_queue"},
         "app.transcription_processor.*": {"queue": "transcription_queue"},
-    }
+    },
+    # Late-acked tasks are redelivered by Redis after this long unacked, so it
+    # must exceed the longest transcription or a running job gets a twin.
+    broker_transport_options={"visibility_timeout": settings.celery_visibility_timeout},
 )
 
 celery_app.autodiscover_tasks(["app"])
+
+
+class TaskByName:
+    """Dispatch handle for a task that is sent by name.
+
+    Lets the API queue worker tasks without importing the modules that define
+    them, and with them yt-dlp and the whisper inference stack.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def delay(self, *args, **kwargs):
+        return celery_app.send_task(self.name, args=args, kwargs=kwargs)
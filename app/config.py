@@ -1,10 +1,54 @@
 """Application configuration."""
 
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# faster_whisper.available_models() as of faster-whisper 1.1; listed here so the API
+# can validate model names without importing the inference stack.
+WHISPER_MODELS = [
+    "tiny.en",
+    "tiny",
+    "base.en",
+    "base",
+    "small.en",
+    "small",
+    "medium.en",
+    "medium",
+    "large-v1",
+    "large-v2",
+    "large-v3",
+    "large",
+    "distil-large-v2",
+    "distil-medium.en",
+    "distil-small.en",
+    "distil-large-v3",
+    "large-v3-turbo",
+    "turbo",
+]
+
+# CTranslate2 compute types each device can load. float16 and bfloat16 need a GPU, and
+# int16 on CPU needs an Intel MKL build, so it is left out of the CPU list.
+COMPUTE_TYPES = {
+    "cpu": ["auto", "default", "int8", "int8_float32", "float32"],
+    "cuda": [
+        "auto",
+        "default",
+        "int8",
+        "int8_float32",
+        "int8_float16",
+        "int8_bfloat16",
+        "int16",
+        "float16",
+        "bfloat16",
+        "float32",
+    ],
+}
+
+# Written by ``python -m app.calibrate``; values in .env and the environment take precedence.
+CALIBRATION_FILE = "data/calibration.env"
+
 
 class Settings(BaseSettings):
     """Runtime settings loaded from environment variables."""
@@ -14,15 +58,77 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/qtube.db"
     downloads_dir: str = "downloads"
     models_dir: str = "models"
+    media_scan_manifest: str = "data/media-scan.json"
+    watch_folder_dir: str | None = None
+    watch_folder_settle_seconds: float = 5.0
+    watch_folder_polling: bool = False
+    watch_folder_poll_interval: float = 2.0
     whisper_model: str = "base.en"
+    whisper_allowed_models: List[str] = WHISPER_MODELS
     transcription_device: str = "cpu"
     transcription_compute_type: str = "int8"
+    chunked_transcription_threshold: float = 1800.0
+    transcription_chunk_seconds: float = 600.0
+    transcription_replicas: int = 0
+    transcription_cpu_threads: int = 0
+    transcription_layout: Literal["threads", "processes"] = "threads"
+    transcription_batch_size: int = 1
+    transcription_batch_max_wait: float = 2.0
+    transcription_batch_max_duration: float = 600.0
+    transcription_inference_batch_size: int = 8
+    transcription_beam_size: int = 5
+    transcription_prefetch_depth: int = 1
+    transcription_prefetch_max_bytes: int = 1024**3
+    transcription_progress_interval: float = 5.0
+    transcription_checkpoint_interval: float = 60.0
+    celery_visibility_timeout: int = 12 * 3600
+    model_registry_max_bytes: int = 4 * 1024**3
+    model_registry_idle_seconds: float = 1800.0
+    audio_cache_enabled: bool = True
+    audio_cache_dir: str = "data/audio-cache"
+    audio_cache_max_bytes: int = 8 * 1024**3
     ytdlp_cookies_file: str | None = None
+    audio_only_downloads: bool = False
+    audio_only_format: str = "bestaudio[abr<=64]/worstaudio/best"
+    download_concurrent_fragments: int = 4
+    download_http_chunk_size: int = 10 * 1024**2
+    download_max_retries: int = 3
+    download_retry_delay: float = 10.0
+    rate_limit_enabled: bool = True
+    rate_limit_requests_per_second: float = 2.0
+    rate_limit_bytes_per_second: int = 0
+    rate_limit_host_requests_per_second: Dict[str, float] = {"googlevideo.com": 20.0}
+    rate_limit_host_bytes_per_second: Dict[str, int] = {}
+    rate_limit_burst_seconds: float = 5.0
+    rate_limit_backoff_seconds: float = 30.0
+    rate_limit_max_backoff_seconds: float = 900.0
+    rate_limit_recovery_seconds: float = 300.0
     cors_origins: List[str] = ["*"]
+    enqueue_page_size: int = 50
+    event_stream_enabled: bool = True
+    event_stream_maxlen: int = 10000
+    event_stream_keepalive: float = 15.0
+    live_progress_enabled: bool = True
+    live_progress_ttl: int = 3600
+    live_progress_flush_interval: float = 10.0
+    preview_workers: int = 4
+    preview_max_pending: int = 32
+    info_cache_ttl: float = 600.0
+    info_cache_max_entries: int = 256
+    info_cache_redis_enabled: bool = True
+    sqlite_wal: bool = True
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 30000
+    sqlite_mmap_size: int = 256 * 1024**2
+    async_db_enabled: bool = False
+    async_db_pool_size: int = 20
+    write_batching_enabled: bool = False
+    write_batch_interval: float = 0.5
+    write_batch_max_pending: int = 500
 
     model_config = SettingsConfigDict(
         env_prefix="QTUBE_",
-        env_file=".env",
+        env_file=(CALIBRATION_FILE, ".env"),
         extra="ignore",
     )
 
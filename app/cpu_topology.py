@@ -0,0 +1,122 @@
+"""Size transcription workers from the CPUs this container may actually use.
+
+Run as ``python -m app.cpu_topology`` to print the layout, or with
+``--processes`` to print just the Celery concurrency for the worker command.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+
+# CTranslate2 decoding stops scaling well beyond a handful of threads per replica.
+DEFAULT_THREADS_PER_REPLICA = 4
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def _cgroup_cpu_limit(root: Path = _CGROUP_ROOT) -> Optional[float]:
+    """CPUs allowed by the cgroup quota (v2 ``cpu.max`` or v1 CFS files), or None if unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def available_cpus(cgroup_root: Path = _CGROUP_ROOT) -> int:
+    """Cores usable by this process: its affinity mask, capped by any cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit(cgroup_root)
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+@dataclass(frozen=True)
+class WorkerLayout:
+    """How the available cores are split into model replicas.
+
+    ``replicas`` model replicas each decode with ``cpu_threads`` threads. With
+    the "processes" mode each Celery worker process holds one replica; with
+    "threads" one process holds them all as faster-whisper ``num_workers``.
+    That process takes one job at a time, so only chunked jobs keep every
+    replica busy; a shorter file decodes on one replica's ``cpu_threads``.
+    """
+
+    cpus: int
+    replicas: int
+    cpu_threads: int
+    mode: str
+
+    @property
+    def processes(self) -> int:
+        return self.replicas if self.mode == "processes" else 1
+
+    @property
+    def replicas_per_process(self) -> int:
+        return 1 if self.mode == "processes" else self.replicas
+
+    def describe(self) -> str:
+        return (
+            f"{self.cpus} CPUs -> {self.processes} process(es) x "
+            f"{self.replicas_per_process} replica(s) x {self.cpu_threads} thread(s)"
+        )
+
+
+def plan_layout(
+    cpus: int, replicas: int = 0, cpu_threads: int = 0, mode: str = "threads"
+) -> WorkerLayout:
+    """Split ``cpus`` into replicas; a zero ``replicas`` or ``cpu_threads`` is derived."""
+    if cpu_threads <= 0:
+        if replicas > 0:
+            cpu_threads = max(1, cpus // replicas)
+        else:
+            cpu_threads = min(cpus, DEFAULT_THREADS_PER_REPLICA)
+    if replicas <= 0:
+        replicas = max(1, cpus // cpu_threads)
+    return WorkerLayout(cpus=cpus, replicas=replicas, cpu_threads=cpu_threads, mode=mode)
+
+
+def worker_layout() -> WorkerLayout:
+    """The layout for this host from the QTUBE_TRANSCRIPTION_* settings."""
+    settings = get_settings()
+    return plan_layout(
+        available_cpus(),
+        replicas=settings.transcription_replicas,
+        cpu_threads=settings.transcription_cpu_threads,
+        mode=settings.transcription_layout,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print the transcription worker layout.")
+    parser.add_argument(
+        "--processes", action="store_true", help="print only the worker process count"
+    )
+    args = parser.parse_args()
+    layout = worker_layout()
+    print(layout.processes if args.processes else layout.describe())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from __future__ import annotations
 from contextlib import contextmanager
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy import text
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
@@ -19,11 +19,55 @@ class Base(DeclarativeBase):
 _settings = get_settings()
 
 
+def _sqlite_pragmas(settings) -> list[str]:
+    """Connection pragmas for the SQLite file shared by the API and the workers.
+
+    WAL lets readers proceed while one process writes, NORMAL sync is safe
+    under WAL (a power loss can only drop the last commits, not corrupt the
+    file), busy_timeout makes writers queue instead of failing with "database
+    is locked", and mmap serves reads from the page cache without copies.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+    ]
+    if settings.sqlite_wal:
+        pragmas += [
+            "PRAGMA journal_mode = WAL",
+            f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        ]
+    if settings.sqlite_mmap_size:
+        pragmas.append(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    return pragmas
+
+
+def install_sqlite_pragmas(target_engine, database_url: str) -> None:
+    """Run the concurrency pragmas on every new connection of a file-backed SQLite engine."""
+    if ":memory:" in database_url:
+        return
+    pragmas = _sqlite_pragmas(_settings)
+
+    @event.listens_for(target_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
 def _create_engine(database_url: str):
     connect_args = {}
-    if database_url.startswith("sqlite"):
-        connect_args = {"check_same_thread": False}
-    return create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+    is_sqlite = database_url.startswith("sqlite")
+    if is_sqlite:
+        connect_args = {
+            "check_same_thread": False,
+            "timeout": _settings.sqlite_busy_timeout_ms / 1000,
+        }
+    created = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+    if is_sqlite:
+        install_sqlite_pragmas(created, database_url)
+    return created
 
 
 engine = _create_engine(_settings.database_url)
@@ -35,23 +79,70 @@ def init_db() -> None:
     from app import models  # noqa: F401
 
     Base.metadata.create_all(bind=engine)
-    _apply_sqlite_migrations()
-
-
-def _apply_sqlite_migrations() -> None:
-    """Apply lightweight migrations for SQLite deployments."""
+    added_columns = _apply_sqlite_migrations()
+    _ensure_indexes()
+    if "batches.queued_count" in added_columns:
+        from app.services.jobs import recount_batch_counters
+
+        with session_scope() as session:
+            recount_batch_counters(session)
+
+
+_SQLITE_COLUMNS = {
+    "jobs": {
+        "requested_format": "VARCHAR(64)",
+        "audio_only": "BOOLEAN NOT NULL DEFAULT 0",
+        "download_format": "VARCHAR(64)",
+        "whisper_model": "VARCHAR(128)",
+        "compute_type": "VARCHAR(32)",
+        "decode_seconds": "FLOAT",
+        "inference_seconds": "FLOAT",
+        "download_bytes_per_second": "FLOAT",
+        "checkpoint_seconds": "FLOAT",
+        "checkpoint_bytes": "INTEGER",
+        "batch_leader_id": "VARCHAR(36)",
+    },
+    "batches": {
+        "discovered_count": "INTEGER NOT NULL DEFAULT 0",
+        "queued_count": "INTEGER NOT NULL DEFAULT 0",
+        "downloading_count": "INTEGER NOT NULL DEFAULT 0",
+        "downloaded_count": "INTEGER NOT NULL DEFAULT 0",
+        "transcribing_count": "INTEGER NOT NULL DEFAULT 0",
+        "completed_count": "INTEGER NOT NULL DEFAULT 0",
+        "failed_count": "INTEGER NOT NULL DEFAULT 0",
+        "canceled_count": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+
+def _apply_sqlite_migrations() -> set[str]:
+    """Apply lightweight migrations for SQLite deployments.
+
+    Returns the ``table.column`` names that were added.
+    """
+    added: set[str] = set()
     if not str(engine.url).startswith("sqlite"):
-        return
+        return added
     with engine.connect() as connection:
-        existing_columns = {
-            row[1]
-            for row in connection.exec_driver_sql("PRAGMA table_info(jobs)").fetchall()
-        }
-        if "requested_format" not in existing_columns:
-            connection.execute(
-                text("ALTER TABLE jobs ADD COLUMN requested_format VARCHAR(64)")
-            )
-            connection.commit()
+        for table, columns in _SQLITE_COLUMNS.items():
+            existing_columns = {
+                row[1]
+                for row in connection.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()
+            }
+            for column, ddl in columns.items():
+                if column not in existing_columns:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    added.add(f"{table}.{column}")
+        connection.commit()
+    return added
+
+
+def _ensure_indexes() -> None:
+    """Create indexes added to existing tables after their first deployment."""
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
 
 
 @contextmanager
@@ -0,0 +1,142 @@
+"""Async database access for the API's read endpoints.
+
+The Celery workers keep the sync engine in :mod:`app.db`. The API reads
+through a :class:`Reader`, which is backed by an ``AsyncSession`` when
+QTUBE_ASYNC_DB_ENABLED is set and a driver is installed (aiosqlite for
+SQLite, asyncpg for PostgreSQL). Otherwise it falls back to the sync session,
+with each query run on the threadpool.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, AsyncGenerator, Dict, Optional, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.engine import make_url
+from starlette.concurrency import run_in_threadpool
+
+from app import db
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_sessionmakers: Dict[str, Any] = {}
+
+
+def async_database_url(database_url: str) -> Optional[str]:
+    """Map a sync database URL to its async driver, or None when there is no mapping."""
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _create_async_sessionmaker(database_url: str):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_url = async_database_url(database_url)
+    if async_url is None:
+        return None
+    settings = get_settings()
+    options: Dict[str, Any] = {"pool_size": settings.async_db_pool_size, "max_overflow": 0}
+    if async_url.startswith("sqlite"):
+        # A local file has no server to drop connections, so skip the per-checkout ping,
+        # which would cost an extra hop through aiosqlite's thread on every request.
+        options["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
+    else:
+        options["pool_pre_ping"] = True
+    async_engine = create_async_engine(async_url, **options)
+    if async_url.startswith("sqlite"):
+        db.install_sqlite_pragmas(async_engine.sync_engine, async_url)
+    return async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+def get_async_sessionmaker():
+    """Async sessionmaker for the current sync engine's database, or None if unavailable.
+
+    Keyed by the sync engine's URL so it follows ``db.engine`` when that is
+    swapped, as the tests do.
+    """
+    if not get_settings().async_db_enabled:
+        return None
+    url = db.engine.url.render_as_string(hide_password=False)
+    if url not in _sessionmakers:
+        try:
+            _sessionmakers[url] = _create_async_sessionmaker(url)
+        except ImportError as exc:
+            logger.warning("Async database driver unavailable, using sync reads: %s", exc)
+            _sessionmakers[url] = None
+    return _sessionmakers[url]
+
+
+async def dispose_async_engines() -> None:
+    for maker in _sessionmakers.values():
+        if maker is not None:
+            await maker.kw["bind"].dispose()
+    _sessionmakers.clear()
+
+
+class Reader:
+    """Read-only query interface shared by the async and threadpool-backed sessions."""
+
+    async def all(self, stmt: Select) -> Sequence[Any]:
+        raise NotImplementedError
+
+    async def scalar(self, stmt: Select) -> Any:
+        raise NotImplementedError
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        raise NotImplementedError
+
+
+class AsyncReader(Reader):
+    def __init__(self, session) -> None:
+        self.session = session
+
+    async def all(self, stmt: Select) -> Sequence[Any]:
+        return (await self.session.scalars(stmt)).all()
+
+    async def scalar(self, stmt: Select) -> Any:
+        return await self.session.scalar(stmt)
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        return await self.session.get(model, ident)
+
+
+class ThreadpoolReader(Reader):
+    """Runs each query on the threadpool in its own short-lived session.
+
+    No connection is held between queries: a request parked waiting for a
+    threadpool slot must not pin a pooled connection that the running threads
+    need, or a burst can exhaust the pool and deadlock.
+    """
+
+    @staticmethod
+    def _run(query) -> Any:
+        with db.SessionLocal() as session:
+            return query(session)
+
+    async def all(self, stmt: Select) -> Sequence[Any]:
+        return await run_in_threadpool(self._run, lambda session: session.scalars(stmt).all())
+
+    async def scalar(self, stmt: Select) -> Any:
+        return await run_in_threadpool(self._run, lambda session: session.scalar(stmt))
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        return await run_in_threadpool(self._run, lambda session: session.get(model, ident))
+
+
+async def get_reader() -> AsyncGenerator[Reader, None]:
+    maker = get_async_sessionmaker()
+    if maker is None:
+        yield ThreadpoolReader()
+        return
+    async with maker() as session:
+        yield AsyncReader(session)
@@ -2,21 +2,32 @@
 
 from __future__ import annotations
 
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from celery import group
 from celery.signals import worker_process_init
 from celery.utils.log import get_task_logger
 from yt_dlp import YoutubeDL
+from yt_dlp.networking.exceptions import HTTPError
 
 from app.celery_app import celery_app
 from app.config import get_settings
 from app import db
 from app.models import BatchStatus, Job, JobStatus
+from app.info_cache import cached_single_video
+from app.progress import finish_progress, report_progress
+from app.rate_limit import get_rate_limiter
+from app.write_queue import get_write_batcher
 from app.services.jobs import (
+    add_discovered_entries,
     add_job_event,
-    create_job,
+    bulk_create_jobs,
+    find_reusable_jobs,
+    notify_job,
     set_batch_status,
     update_batch_status,
     update_job_status,
@@ -27,6 +38,10 @@ settings = get_settings()
 
 INFO_YDL: Optional[YoutubeDL] = None
 
+_URL_RESULT_TYPES = {"url", "url_transparent"}
+_MAX_URL_REDIRECTS = 3
+_MAX_PLAYLIST_DEPTH = 2
+
 
 class DownloadProcessorLogger:
     def debug(self, msg):
@@ -55,8 +70,6 @@ def _base_ydl_params() -> Dict[str, Any]:
         "extractor_retries": 3,
         "fragment_retries": 3,
         "retries": 3,
-        "sleep_interval": 1,
-        "max_sleep_interval": 5,
         "http_headers": {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -72,35 +85,164 @@ def _base_ydl_params() -> Dict[str, Any]:
     }
     if settings.ytdlp_cookies_file:
         params["cookiefile"] = settings.ytdlp_cookies_file
+    if not settings.rate_limit_enabled:
+        # Without the shared limiter, each worker spaces out its own downloads.
+        params.update({"sleep_interval": 1, "max_sleep_interval": 5})
+    return params
+
+
+class RateLimitedYoutubeDL(YoutubeDL):
+    """YoutubeDL whose every HTTP request takes a token from the shared per-host limiter.
+
+    Extraction, retries and each download chunk or fragment all go through
+    ``urlopen``, so they all draw on the cluster-wide budget. A 429 backs the
+    host off for every worker, not just this one.
+    """
+
+    def urlopen(self, req):
+        limiter = get_rate_limiter()
+        if limiter is None:
+            return super().urlopen(req)
+        url = getattr(req, "url", None) or getattr(req, "full_url", None) or str(req)
+        limiter.acquire(url)
+        try:
+            return super().urlopen(req)
+        except HTTPError as exc:
+            if exc.status == 429:
+                limiter.penalize(url, _retry_after(exc))
+            raise
+
+
+def _retry_after(exc: HTTPError) -> float:
+    try:
+        return max(0.0, float(exc.response.headers.get("Retry-After") or 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+def _transfer_params() -> Dict[str, Any]:
+    """Fragment concurrency, HTTP range chunking and resume options for media downloads.
+
+    ``continuedl`` with ``.part`` files lets a retried task pick up where the
+    previous attempt stopped: the output template is deterministic, so the
+    retry finds the same partial file (or ``.ytdl`` fragment state).
+    """
+    params: Dict[str, Any] = {
+        "concurrent_fragment_downloads": max(1, settings.download_concurrent_fragments),
+        "continuedl": True,
+        "nopart": False,
+        "overwrites": False,
+    }
+    if settings.download_http_chunk_size > 0:
+        params["http_chunk_size"] = settings.download_http_chunk_size
     return params
 
 
+class TransferMeter:
+    """Average transfer rate of one download attempt, from yt-dlp progress reports.
+
+    Each file's first report is its baseline, so bytes resumed from a
+    partial file are not counted as transferred.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._first_at: Optional[float] = None
+        self._last_at: Optional[float] = None
+
+    def observe(self, data: Dict[str, Any]) -> None:
+        downloaded = data.get("downloaded_bytes")
+        if downloaded is None:
+            return
+        key = str(data.get("filename") or data.get("tmpfilename") or "")
+        now = self.clock()
+        if self._first_at is None:
+            self._first_at = now
+        self._last_at = now
+        first, _last = self._files.get(key, (downloaded, downloaded))
+        self._files[key] = (first, downloaded)
+
+    @property
+    def transferred_bytes(self) -> int:
+        return sum(last - first for first, last in self._files.values())
+
+    def bytes_per_second(self) -> Optional[float]:
+        if self._first_at is None or self._last_at is None or self._last_at <= self._first_at:
+            return None
+        return self.transferred_bytes / (self._last_at - self._first_at)
+
+
 @worker_process_init.connect
 def init_worker_processes(**kwargs) -> None:
     """Initialize shared YoutubeDL instance per worker process."""
     global INFO_YDL
     logger.info("init download processor")
-    info_params = {**_base_ydl_params(), "skip_download": True, "noplaylist": False}
-    INFO_YDL = YoutubeDL(info_params)
+    info_params = {
+        **_base_ydl_params(),
+        "skip_download": True,
+        "noplaylist": False,
+        "extract_flat": "in_playlist",
+        "lazy_playlist": True,
+    }
+    INFO_YDL = RateLimitedYoutubeDL(info_params)
 
 
 def extract_yt_info(yt_url: str) -> Dict[str, Any]:
-    """Get metadata from a YouTube URL."""
+    """Get metadata from a YouTube URL without resolving playlist entries.
+
+    Playlists and channels come back with a lazy ``entries`` iterator of flat
+    entries, which yt-dlp pages through only as it is consumed.
+    """
     if INFO_YDL is None:
         raise RuntimeError("YoutubeDL is not initialized")
 
     logger.info('Getting info for URL "%s"', yt_url)
-    yt_info = INFO_YDL.extract_info(yt_url, download=False, process=True)
+    yt_info = INFO_YDL.extract_info(yt_url, download=False, process=False)
+    for _ in range(_MAX_URL_REDIRECTS):
+        if not isinstance(yt_info, dict) or yt_info.get("_type") not in _URL_RESULT_TYPES:
+            break
+        yt_info = INFO_YDL.extract_info(
+            yt_info["url"], download=False, process=False, ie_key=yt_info.get("ie_key")
+        )
     if not isinstance(yt_info, dict):
         raise ValueError("Unknown type of yt_info")
     return yt_info
 
 
-def _safe_entries(info: Dict[str, Any]) -> List[Dict[str, Any]]:
-    entries = info.get("entries")
-    if not entries:
-        return []
-    return [entry for entry in entries if isinstance(entry, dict)]
+def _iter_entries(info: Dict[str, Any], depth: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield flat video entries, descending into nested playlists such as channel tabs."""
+    for entry in info.get("entries") or ():
+        if not isinstance(entry, dict):
+            continue
+        if entry.get("_type") == "playlist" or (
+            entry.get("_type") in _URL_RESULT_TYPES and entry.get("ie_key") == "YoutubeTab"
+        ):
+            if depth >= _MAX_PLAYLIST_DEPTH or INFO_YDL is None:
+                continue
+            nested = entry
+            if "entries" not in nested:
+                nested = INFO_YDL.extract_info(
+                    entry["url"], download=False, process=False, ie_key=entry.get("ie_key")
+                )
+            if isinstance(nested, dict):
+                yield from _iter_entries(nested, depth + 1)
+            continue
+        yield entry
+
+
+def _pages(entries: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(entries)
+    while page := list(islice(iterator, size)):
+        yield page
+
+
+def _entry_url(entry: Dict[str, Any]) -> Optional[str]:
+    url = entry.get("webpage_url") or entry.get("url")
+    if isinstance(url, str) and url.startswith(("http://", "https://")):
+        return url
+    video_id = entry.get("id")
+    return f"https://www.youtube.com/watch?v={video_id}" if video_id else None
 
 
 def _create_output_dir(uploader: str) -> Path:
@@ -110,12 +252,91 @@ def _create_output_dir(uploader: str) -> Path:
     return target
 
 
+def _select_format(job: Job) -> str:
+    if job.requested_format:
+        return job.requested_format
+    if job.audio_only:
+        return settings.audio_only_format
+    return "best"
+
+
+def _dispatch_downloads(downloads: List[tuple[str, str]], output_dir: Path) -> None:
+    """Publish one page of download tasks as a single Celery group."""
+    if not downloads:
+        return
+    group(
+        download_video.si(job_id, video_url, str(output_dir)) for job_id, video_url in downloads
+    ).apply_async(queue="download_queue")
+
+
+def _enqueue_page(
+    session,
+    batch_id: str,
+    source_url: str,
+    items: List[tuple[Optional[str], Dict[str, Any]]],
+    uploader: str,
+    output_dir: Path,
+    requested_format: Optional[str],
+    audio_only: bool,
+    force: bool,
+    whisper_model: str,
+    compute_type: str,
+) -> None:
+    """Insert a page of (video_url, info) entries in one commit and dispatch their downloads.
+
+    Videos already transcribed with the requested model and compute type are
+    completed from the earlier result unless ``force`` is set.
+    """
+    reuse = {}
+    if not force:
+        reuse = find_reusable_jobs(
+            session, (info.get("id") for _, info in items), whisper_model, compute_type
+        )
+    queued = bulk_create_jobs(
+        session,
+        [
+            {
+                "source_url": source_url,
+                "batch_id": batch_id,
+                "video_url": video_url,
+                "video_id": info.get("id"),
+                "title": info.get("title"),
+                "uploader": uploader,
+                "requested_format": requested_format,
+                "audio_only": audio_only,
+                "whisper_model": whisper_model,
+                "compute_type": compute_type,
+            }
+            for video_url, info in items
+        ],
+        reuse=reuse,
+    )
+    add_discovered_entries(session, batch_id, len(items))
+    session.commit()
+    if reuse:
+        reused = len(items) - len(queued)
+        logger.info("Reused %s existing transcripts for batch %s", reused, batch_id)
+    _dispatch_downloads(
+        [(row["id"], row["video_url"]) for row in queued if row["video_url"]], output_dir
+    )
+
+
 @celery_app.task(name="app.download_processor.enqueue_url")
-def enqueue_url(batch_id: str, url: str, requested_format: Optional[str] = None) -> None:
+def enqueue_url(
+    batch_id: str,
+    url: str,
+    requested_format: Optional[str] = None,
+    audio_only: Optional[bool] = None,
+    force: bool = False,
+    whisper_model: Optional[str] = None,
+    compute_type: Optional[str] = None,
+) -> None:
     """Resolve a URL into one or more jobs and enqueue downloads."""
     logger.info("Enqueueing URL %s", url)
+    if audio_only is None:
+        audio_only = settings.audio_only_downloads
     try:
-        yt_info = extract_yt_info(url)
+        yt_info = cached_single_video(url) or extract_yt_info(url)
     except Exception as exc:
         logger.error("Failed to extract info for %s: %s", url, exc)
         with db.SessionLocal() as session:
@@ -123,73 +344,89 @@ def enqueue_url(batch_id: str, url: str, requested_format: Optional[str] = None)
             session.commit()
         raise
 
+    uploader = yt_info.get("uploader") or yt_info.get("channel") or "Unknown"
+    output_dir = _create_output_dir(uploader)
+    options = {
+        "requested_format": requested_format,
+        "audio_only": audio_only,
+        "force": force,
+        "whisper_model": whisper_model or settings.whisper_model,
+        "compute_type": compute_type or settings.transcription_compute_type,
+    }
+
     with db.SessionLocal() as session:
-        if "entries" in yt_info:
-            uploader = yt_info.get("uploader", "Unknown")
-            output_dir = _create_output_dir(uploader)
-            for entry in _safe_entries(yt_info):
-                video_id = entry.get("id")
-                title = entry.get("title")
-                video_url = f"https://www.youtube.com/watch?v={video_id}" if video_id else None
-                job = create_job(
-                    session,
-                    source_url=url,
-                    batch_id=batch_id,
-                    video_url=video_url,
-                    video_id=video_id,
-                    title=title,
-                    uploader=uploader,
-                    requested_format=requested_format,
-                )
-                add_job_event(session, job.id, "queued", "Queued for download", 0.0)
-                session.commit()
-                if video_url:
-                    download_video.apply_async(
-                        args=[job.id, video_url, str(output_dir)], queue="download_queue"
-                    )
-        else:
-            video_id = yt_info.get("id")
-            uploader = yt_info.get("uploader", "Unknown")
-            title = yt_info.get("title")
-            output_dir = _create_output_dir(uploader)
-            job = create_job(
-                session,
-                source_url=url,
-                batch_id=batch_id,
-                video_url=url,
-                video_id=video_id,
-                title=title,
-                uploader=uploader,
-                requested_format=requested_format,
-            )
-            add_job_event(session, job.id, "queued", "Queued for download", 0.0)
-            session.commit()
-            download_video.apply_async(
-                args=[job.id, url, str(output_dir)], queue="download_queue"
+        if "entries" not in yt_info:
+            _enqueue_page(
+                session, batch_id, url, [(url, yt_info)], uploader, output_dir, **options
             )
+        else:
+            try:
+                for page in _pages(_iter_entries(yt_info), settings.enqueue_page_size):
+                    items = [(_entry_url(entry), entry) for entry in page]
+                    _enqueue_page(
+                        session, batch_id, url, items, uploader, output_dir, **options
+                    )
+            except Exception as exc:
+                logger.error("Failed while listing entries for %s: %s", url, exc)
+                session.rollback()
+                set_batch_status(session, batch_id, status=BatchStatus.failed)
+                session.commit()
+                raise
 
         update_batch_status(session, batch_id)
         session.commit()
 
 
-@celery_app.task(bind=True, name="app.download_processor.download_video")
+def _persist_progress(session, job: Job, progress: float, batcher) -> None:
+    if batcher is not None:
+        batcher.set_progress(job, progress, JobStatus.downloading)
+        return
+    job.progress = progress
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+    notify_job(session, job)
+    session.commit()
+
+
+@celery_app.task(
+    bind=True,
+    name="app.download_processor.download_video",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 def download_video(self, job_id: str, url: str, output_dir: str) -> None:
-    """Download a video and enqueue transcription."""
+    """Download a video and enqueue transcription.
+
+    A failed attempt is retried up to ``download_max_retries`` times, and a
+    task whose worker died is redelivered; both resume from the partial file.
+    """
     logger.info("Downloading %s to %s", url, output_dir)
     with db.SessionLocal() as session:
         job = session.get(Job, job_id)
         if not job:
             logger.error("Job %s not found", job_id)
             return
+        if job.status not in (JobStatus.queued, JobStatus.downloading):
+            # A redelivered task whose download already finished, or a cancelled job.
+            logger.info("Skipping download of job %s in status %s", job_id, job.status.value)
+            return
 
-        update_job_status(session, job, JobStatus.downloading, progress=0.0)
-        add_job_event(session, job.id, "downloading", "Download started", 0.0)
+        attempt = self.request.retries + 1
+        update_job_status(session, job, JobStatus.downloading, progress=job.progress or 0.0)
+        if attempt == 1:
+            add_job_event(session, job.id, "downloading", "Download started", 0.0)
+        else:
+            message = f"Download resumed (attempt {attempt})"
+            add_job_event(session, job.id, "downloading", message, job.progress)
         session.commit()
 
-        last_progress = 0.0
+        last_progress = job.progress or 0.0
+        batcher = get_write_batcher()
+        meter = TransferMeter()
 
         def progress_hook(data: Dict[str, Any]) -> None:
             nonlocal last_progress
+            meter.observe(data)
             if data.get("status") == "downloading":
                 total = data.get("total_bytes") or data.get("total_bytes_estimate")
                 downloaded = data.get("downloaded_bytes")
@@ -197,13 +434,16 @@ def download_video(self, job_id: str, url: str, output_dir: str) -> None:
                     pct = (downloaded / total) * 100
                     overall = min(50.0, pct * 0.5)
                     if overall - last_progress >= 1.0:
-                        job.progress = overall
-                        job.updated_at = datetime.utcnow()
-                        session.add(job)
-                        session.commit()
+                        # Live progress goes to Redis; without it, the row is written
+                        # through the write batcher or, failing that, directly.
+                        if not report_progress(job, overall):
+                            _persist_progress(session, job, overall, batcher)
                         last_progress = overall
             elif data.get("status") == "finished":
                 filename = data.get("filename")
+                chosen_format = (data.get("info_dict") or {}).get("format_id")
+                if chosen_format:
+                    job.download_format = str(chosen_format)[:64]
                 if filename:
                     update_job_status(
                         session,
@@ -214,29 +454,51 @@ def download_video(self, job_id: str, url: str, output_dir: str) -> None:
                     )
                     add_job_event(session, job.id, "downloaded", "Download finished", 50.0)
                     session.commit()
-
-        format_id = job.requested_format or "best"
-        ydl = YoutubeDL(
+                    finish_progress(job.id)
+
+        progress_hooks = [progress_hook]
+        limiter = get_rate_limiter()
+        if limiter is not None:
+            progress_hooks.append(limiter.bytes_hook())
+        format_id = _select_format(job)
+        ydl = RateLimitedYoutubeDL(
             {
                 **_base_ydl_params(),
+                **_transfer_params(),
                 "format": format_id,
                 "outtmpl": f"{output_dir}/%(title).200B-%(id)s.%(ext)s",
-                "progress_hooks": [progress_hook],
+                "progress_hooks": progress_hooks,
             }
         )
 
         try:
             ydl.download([url])
         except Exception as exc:
+            if self.request.retries < settings.download_max_retries:
+                logger.warning("Download of %s interrupted, will resume: %s", url, exc)
+                add_job_event(session, job.id, "retrying", f"Download interrupted: {exc}")
+                session.commit()
+                raise self.retry(
+                    exc=exc,
+                    countdown=settings.download_retry_delay,
+                    max_retries=settings.download_max_retries,
+                )
             logger.error("Failed to download %s: %s", url, exc)
             update_job_status(session, job, JobStatus.failed, error=str(exc))
             add_job_event(session, job.id, "failed", f"Download failed: {exc}")
             session.commit()
+            finish_progress(job.id)
             if job.batch_id:
                 update_batch_status(session, job.batch_id)
                 session.commit()
             return
 
+        rate = meter.bytes_per_second()
+        if rate is not None:
+            logger.info("Downloaded %s bytes at %.0f bytes/s", meter.transferred_bytes, rate)
+            job.download_bytes_per_second = rate
+            session.commit()
+
         from app.transcription_processor import transcribe_video
 
         transcribe_video.apply_async(args=[job.id], queue="transcription_queue")
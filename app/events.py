@@ -0,0 +1,253 @@
+"""Job update notifications over Redis: publishing from workers, fan-out in the API.
+
+Workers queue notifications on the SQLAlchemy session and publish them only
+after the transaction commits, so clients never see state that was rolled
+back. Each notification is appended to a capped Redis stream (for replay by
+``Last-Event-ID``) and published on a pub/sub channel (for live delivery) in
+one round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STREAM_KEY = "qtube:job-updates"
+CHANNEL = "qtube:job-updates"
+_SESSION_KEY = "qtube_notifications"
+_RETRY_AFTER_SECONDS = 30.0
+_CLIENT_RETRY_MS = 3000
+_STREAM_ID = re.compile(r"^\d+(-\d+)?$")
+
+# XADD and PUBLISH in one call so live subscribers always receive the stream id.
+_PUBLISH_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2])
+redis.call('PUBLISH', KEYS[2], id .. ' ' .. ARGV[2])
+return id
+"""
+
+_client = None
+_script = None
+_disabled_until = 0.0
+
+
+def queue_notification(session: Session, kind: str, payload: Dict[str, Any]) -> None:
+    """Attach a notification to the session; it is published after the next commit."""
+    if not settings.event_stream_enabled:
+        return
+    message = {"type": kind, "at": datetime.utcnow().isoformat(), **payload}
+    session.info.setdefault(_SESSION_KEY, []).append(message)
+
+
+def publish_notification(kind: str, payload: Dict[str, Any]) -> None:
+    """Publish a notification that is not tied to a database transaction."""
+    if settings.event_stream_enabled:
+        publish([{"type": kind, "at": datetime.utcnow().isoformat(), **payload}])
+
+
+def _redis_script():
+    global _client, _script
+    if _script is None:
+        import redis
+
+        _client = redis.Redis.from_url(
+            settings.redis_url, socket_connect_timeout=1, socket_timeout=2
+        )
+        _script = _client.register_script(_PUBLISH_SCRIPT)
+    return _client, _script
+
+
+def publish(messages: List[Dict[str, Any]]) -> None:
+    """Publish notifications; failures are logged and publishing pauses briefly."""
+    global _disabled_until
+    if not messages or time.monotonic() < _disabled_until:
+        return
+    try:
+        client, script = _redis_script()
+        pipeline = client.pipeline(transaction=False)
+        for message in messages:
+            script(
+                keys=[STREAM_KEY, CHANNEL],
+                args=[settings.event_stream_maxlen, json.dumps(message, default=str)],
+                client=pipeline,
+            )
+        pipeline.execute()
+    except Exception as exc:  # Redis is optional for persistence; never fail a job on it
+        _disabled_until = time.monotonic() + _RETRY_AFTER_SECONDS
+        logger.warning("Job update publishing paused for %ss: %s", _RETRY_AFTER_SECONDS, exc)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    messages = session.info.pop(_SESSION_KEY, None)
+    if messages:
+        publish(messages)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def is_stream_id(value: str) -> bool:
+    return bool(_STREAM_ID.match(value))
+
+
+def _stream_id_key(stream_id: str) -> Tuple[int, int]:
+    millis, _, sequence = stream_id.partition("-")
+    return int(millis), int(sequence or 0)
+
+
+def format_sse(stream_id: str, message: Dict[str, Any]) -> str:
+    kind = message.get("type", "message")
+    return f"id: {stream_id}\nevent: {kind}\ndata: {json.dumps(message)}\n\n"
+
+
+class _Subscriber:
+    def __init__(self, batch_id: Optional[str], job_id: Optional[str], maxsize: int) -> None:
+        self.batch_id = batch_id
+        self.job_id = job_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def wants(self, message: Dict[str, Any]) -> bool:
+        if self.batch_id and message.get("batch_id") != self.batch_id:
+            return False
+        if self.job_id and message.get("job_id") != self.job_id:
+            return False
+        return True
+
+    def offer(self, item: Tuple[str, Dict[str, Any]]) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # A slow client is cut off; it reconnects with Last-Event-ID and replays.
+            self.overflowed = True
+
+
+class EventBroker:
+    """One Redis subscription per API process, fanned out to every connected client."""
+
+    def __init__(self, redis_url: str, queue_size: int = 1000) -> None:
+        self.redis_url = redis_url
+        self.queue_size = queue_size
+        self._redis = None
+        self._reader: Optional[asyncio.Task] = None
+        self._subscribers: set[_Subscriber] = set()
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self) -> None:
+        async with self._lock:
+            if self._reader is not None and not self._reader.done():
+                return
+            import redis.asyncio as aioredis
+
+            if self._redis is None:
+                self._redis = aioredis.Redis.from_url(self.redis_url, decode_responses=True)
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CHANNEL)
+            self._reader = asyncio.create_task(self._read(pubsub))
+
+    async def _read(self, pubsub) -> None:
+        try:
+            async for raw in pubsub.listen():
+                if raw.get("type") != "message":
+                    continue
+                stream_id, _, body = raw["data"].partition(" ")
+                try:
+                    message = json.loads(body)
+                except ValueError:
+                    continue
+                for subscriber in list(self._subscribers):
+                    if subscriber.wants(message):
+                        subscriber.offer((stream_id, message))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Job update subscription dropped: %s", exc)
+            for subscriber in list(self._subscribers):
+                subscriber.overflowed = True
+        finally:
+            await pubsub.aclose()
+
+    async def replay(self, last_event_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return stream entries published after ``last_event_id``."""
+        entries = await self._redis.xrange(STREAM_KEY, min=f"({last_event_id}", max="+")
+        replayed = []
+        for stream_id, fields in entries:
+            try:
+                replayed.append((stream_id, json.loads(fields["data"])))
+            except (KeyError, ValueError):
+                continue
+        return replayed
+
+    @asynccontextmanager
+    async def subscribe(
+        self, batch_id: Optional[str] = None, job_id: Optional[str] = None
+    ) -> AsyncIterator[_Subscriber]:
+        await self._ensure_started()
+        subscriber = _Subscriber(batch_id, job_id, self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def stream(
+        self,
+        batch_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        last_event_id: Optional[str] = None,
+        keepalive_seconds: float = 15.0,
+    ) -> AsyncIterator[str]:
+        """Yield server-sent events, replaying from ``last_event_id`` before going live."""
+        async with self.subscribe(batch_id, job_id) as subscriber:
+            # Subscribed first, so nothing published during the replay read is lost;
+            # anything seen twice is skipped by comparing stream ids.
+            backlog = await self.replay(last_event_id) if last_event_id else []
+            yield f"retry: {_CLIENT_RETRY_MS}\n\n"
+            last_seen = _stream_id_key(last_event_id) if last_event_id else (0, 0)
+            for stream_id, message in backlog:
+                if subscriber.wants(message):
+                    last_seen = _stream_id_key(stream_id)
+                    yield format_sse(stream_id, message)
+
+            while not subscriber.overflowed:
+                try:
+                    stream_id, message = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                key = _stream_id_key(stream_id)
+                if key <= last_seen:
+                    continue
+                last_seen = key
+                yield format_sse(stream_id, message)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
@@ -0,0 +1,198 @@
+"""TTL cache and single-flight loading for yt-dlp metadata."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "qtube:info:"
+PREVIEW_NAMESPACE = "preview"
+_RETRY_AFTER_SECONDS = 30.0
+
+Info = Dict[str, Any]
+
+
+class LoaderBusy(RuntimeError):
+    """Raised when too many extractions are already queued."""
+
+
+class InfoCache:
+    """In-process LRU with a TTL, backed by an optional Redis tier shared across processes.
+
+    The Redis tier is what lets a Celery worker reuse metadata the API already
+    extracted for a preview. Redis errors are logged and the tier is skipped
+    for a while, so the cache never turns an outage into a failed request.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, redis_client=None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Info]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_disabled_until = 0.0
+
+    @staticmethod
+    def key_for(namespace: str, url: str) -> str:
+        return hashlib.sha256(f"{namespace}:{url.strip()}".encode()).hexdigest()
+
+    def get(self, namespace: str, url: str) -> Optional[Info]:
+        key = self.key_for(namespace, url)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+
+        info = self._redis_get(key)
+        with self._lock:
+            if info is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, info)
+        return info
+
+    def set(self, namespace: str, url: str, info: Info) -> None:
+        key = self.key_for(namespace, url)
+        self._remember(key, info)
+        self._redis_set(key, info)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, info: Info) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, info)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_disabled_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self._redis_disabled_until = time.monotonic() + _RETRY_AFTER_SECONDS
+        logger.warning("Metadata cache Redis tier paused for %ss: %s", _RETRY_AFTER_SECONDS, exc)
+
+    def _redis_get(self, key: str) -> Optional[Info]:
+        if not self._redis_available():
+            return None
+        try:
+            raw = self.redis.get(f"{_REDIS_PREFIX}{key}")
+        except Exception as exc:
+            self._redis_failed(exc)
+            return None
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _redis_set(self, key: str, info: Info) -> None:
+        if not self._redis_available():
+            return
+        try:
+            payload = json.dumps(info, default=str, separators=(",", ":"))
+            self.redis.setex(f"{_REDIS_PREFIX}{key}", max(1, int(self.ttl_seconds)), payload)
+        except Exception as exc:
+            self._redis_failed(exc)
+
+
+class SingleFlightLoader:
+    """Runs loads on a bounded pool; concurrent requests for one key share a single load."""
+
+    def __init__(self, cache: InfoCache, max_workers: int, max_pending: int) -> None:
+        self.cache = cache
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="info-loader"
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+
+    def load(self, namespace: str, url: str, loader: Callable[[str], Info]) -> Future:
+        """Return a future for the info of ``url``, from cache, an in-flight load or a new one."""
+        cached = self.cache.get(namespace, url)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+
+        key = InfoCache.key_for(namespace, url)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if len(self._inflight) >= self.max_pending:
+                raise LoaderBusy("Too many metadata requests in progress")
+            future = self._executor.submit(self._run, namespace, url, loader)
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _run(self, namespace: str, url: str, loader: Callable[[str], Info]) -> Info:
+        info = loader(url)
+        self.cache.set(namespace, url, info)
+        return info
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def cached_single_video(url: str) -> Optional[Info]:
+    """Preview info for ``url`` if it is cached and describes exactly one video.
+
+    Previews are extracted with ``noplaylist``, so a URL carrying a playlist
+    (``list=``) means something different to the enqueue path and is not reused.
+    """
+    if "list" in parse_qs(urlsplit(url).query):
+        return None
+    info = get_info_cache().get(PREVIEW_NAMESPACE, url)
+    if not info or info.get("entries") or info.get("_type") not in (None, "video"):
+        return None
+    return info
+
+
+@lru_cache
+def get_info_cache() -> InfoCache:
+    settings = get_settings()
+    client = None
+    if settings.info_cache_redis_enabled:
+        import redis
+
+        client = redis.Redis.from_url(
+            settings.redis_url, socket_connect_timeout=1, socket_timeout=2
+        )
+    return InfoCache(settings.info_cache_ttl, settings.info_cache_max_entries, client)
+
+
+@lru_cache
+def get_preview_loader() -> SingleFlightLoader:
+    settings = get_settings()
+    return SingleFlightLoader(
+        get_info_cache(), settings.preview_workers, settings.preview_max_pending
+    )
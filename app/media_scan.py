@@ -0,0 +1,164 @@
+"""Incremental scan of a media tree for files that still need a transcript."""
+
+from __future__ import annotations
+
+import json
+import mimetypes
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MEDIA_EXTENSIONS = frozenset(
+    {
+        ".3gp",
+        ".aac",
+        ".ac3",
+        ".aif",
+        ".aiff",
+        ".amr",
+        ".avi",
+        ".caf",
+        ".flac",
+        ".flv",
+        ".m2ts",
+        ".m4a",
+        ".m4b",
+        ".m4v",
+        ".mka",
+        ".mkv",
+        ".mov",
+        ".mp3",
+        ".mp4",
+        ".mpeg",
+        ".mpg",
+        ".mts",
+        ".oga",
+        ".ogg",
+        ".ogv",
+        ".opus",
+        ".spx",
+        ".ts",
+        ".wav",
+        ".weba",
+        ".webm",
+        ".wma",
+        ".wmv",
+    }
+)
+
+_MANIFEST_VERSION = 1
+
+
+def is_media_file(name: str) -> bool:
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in MEDIA_EXTENSIONS:
+        return True
+    guessed, _encoding = mimetypes.guess_type(name)
+    return bool(guessed) and guessed.split("/", 1)[0] in {"audio", "video"}
+
+
+def _transcript_name(name: str) -> str:
+    return f"{name}.txt"
+
+
+class MediaScanner:
+    """Finds new or modified media without a ``<name>.txt`` transcript under ``root``.
+
+    The manifest records each directory's mtime, its subdirectories and its
+    media files' (size, mtime). A directory whose mtime has not changed is
+    not listed again. Its recorded subdirectories are still visited, because
+    changes deeper in the tree do not touch the parent's mtime. Only media
+    that is new or modified since the last :meth:`commit` is reported, so a
+    run that fails before committing is retried in full next time.
+    """
+
+    def __init__(self, root: Path, manifest_path: Optional[Path] = None) -> None:
+        self.root = Path(root)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.dirs_listed = 0
+        self.dirs_skipped = 0
+        self._previous = self._load()
+        self._current: Dict[str, Dict[str, Any]] = {}
+
+    def scan(self) -> List[Path]:
+        found: List[Path] = []
+        self._current = {}
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            previous = self._previous.get(directory)
+            if previous is not None and previous["mtime_ns"] == mtime_ns:
+                self.dirs_skipped += 1
+                self._current[directory] = previous
+                stack.extend(os.path.join(directory, name) for name in previous["subdirs"])
+                continue
+
+            self.dirs_listed += 1
+            entry = self._list(directory, mtime_ns)
+            if entry is None:
+                continue
+            self._current[directory] = entry
+            stack.extend(os.path.join(directory, name) for name in entry["subdirs"])
+            known = previous["media"] if previous is not None else {}
+            for name, signature in entry["media"].items():
+                if entry["transcribed"].get(name) or known.get(name) == signature:
+                    continue
+                found.append(Path(directory) / name)
+        found.sort()
+        return found
+
+    def commit(self) -> None:
+        """Record the last scan so the next one only reports what changed after it."""
+        if self.manifest_path is None:
+            return
+        manifest = self._read_manifest()
+        manifest["roots"][str(self.root)] = {
+            directory: {key: value for key, value in entry.items() if key != "transcribed"}
+            for directory, entry in self._current.items()
+        }
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+        self._previous = self._current
+
+    def _list(self, directory: str, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        subdirs: List[str] = []
+        media: Dict[str, List[int]] = {}
+        names = set()
+        try:
+            with os.scandir(directory) as entries:
+                for item in entries:
+                    names.add(item.name)
+                    if item.is_dir(follow_symlinks=False):
+                        subdirs.append(item.name)
+                    elif is_media_file(item.name) and item.is_file():
+                        stat = item.stat()
+                        media[item.name] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return None
+        return {
+            "mtime_ns": mtime_ns,
+            "subdirs": sorted(subdirs),
+            "media": media,
+            "transcribed": {name: _transcript_name(name) in names for name in media},
+        }
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        empty: Dict[str, Any] = {"version": _MANIFEST_VERSION, "roots": {}}
+        if self.manifest_path is None:
+            return empty
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return empty
+        if not isinstance(manifest, dict) or manifest.get("version") != _MANIFEST_VERSION:
+            return empty
+        return manifest
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        return self._read_manifest()["roots"].get(str(self.root), {})
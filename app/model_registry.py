@@ -0,0 +1,219 @@
+"""In-process registry of loaded Whisper models with LRU eviction under a memory budget."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.config import get_settings
+from app.cpu_topology import worker_layout
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str]
+
+# Approximate parameter counts, matched by substring in this order so that
+# "distil-large-v3" and "large-v3-turbo" do not fall through to "large".
+_PARAMETERS = (
+    ("distil", 756_000_000),
+    ("turbo", 809_000_000),
+    ("large", 1_550_000_000),
+    ("medium", 769_000_000),
+    ("small", 244_000_000),
+    ("base", 74_000_000),
+    ("tiny", 39_000_000),
+)
+_BYTES_PER_PARAMETER = {
+    "int8": 1,
+    "int8_float16": 1,
+    "int8_bfloat16": 1,
+    "int8_float32": 1,
+    "int16": 2,
+    "float16": 2,
+    "bfloat16": 2,
+    "float32": 4,
+}
+
+
+def estimate_model_bytes(model_name: str, compute_type: str) -> int:
+    """Rough resident size of a model's weights; unknown names are sized as large."""
+    name = model_name.lower()
+    parameters = next(
+        (count for family, count in _PARAMETERS if family in name), _PARAMETERS[2][1]
+    )
+    return parameters * _BYTES_PER_PARAMETER.get(compute_type, 2)
+
+
+@dataclass
+class _Entry:
+    transcriber: Any
+    size_bytes: int
+    last_used: float
+    users: int = 0
+
+
+class ModelRegistry:
+    """Keeps recently used transcribers loaded so switching models skips the disk load.
+
+    Models are keyed by (model name, compute type) and sized with
+    :func:`estimate_model_bytes`. Loading one that would exceed ``max_bytes``
+    first unloads the least recently used idle models; a model in use by a
+    running job is never unloaded. A background sweep also unloads models
+    left unused for ``idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        idle_seconds: float,
+        loader: Callable[[str, str], Any],
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.idle_unloads = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds: Dict[ModelKey, float] = {}
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def acquire(self, model_name: str, compute_type: str) -> Iterator[Any]:
+        """Yield a loaded transcriber, pinned against eviction until the block exits."""
+        key = (model_name, compute_type)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                entry = self._load(key)
+            else:
+                self.hits += 1
+            # Re-inserting keeps the dict in least-recently-used order.
+            self._entries[key] = entry
+            entry.users += 1
+        try:
+            yield entry.transcriber
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    def preload(self, model_name: str, compute_type: str) -> None:
+        with self.acquire(model_name, compute_type):
+            pass
+
+    def loaded(self) -> list[ModelKey]:
+        with self._lock:
+            return list(self._entries)
+
+    def unload_idle(self) -> int:
+        """Unload models unused for longer than ``idle_seconds``; returns how many."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.users == 0 and entry.last_used < cutoff
+            ]
+            for key in stale:
+                del self._entries[key]
+                logger.info("Unloaded idle model %s (%s)", *key)
+            self.idle_unloads += len(stale)
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "idle_unloads": self.idle_unloads,
+                "load_seconds": round(self.load_seconds, 3),
+                "last_load_seconds": {
+                    f"{name}/{compute}": round(seconds, 3)
+                    for (name, compute), seconds in self.last_load_seconds.items()
+                },
+                "models": [f"{name}/{compute}" for name, compute in self._entries],
+                "bytes": self._size_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._entries.clear()
+
+    def _size_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def _load(self, key: ModelKey) -> _Entry:
+        size_bytes = estimate_model_bytes(*key)
+        self._make_room(size_bytes)
+        started = time.perf_counter()
+        transcriber = self.loader(*key)
+        elapsed = time.perf_counter() - started
+        self.load_seconds += elapsed
+        self.last_load_seconds[key] = elapsed
+        logger.info("Loaded model %s (%s) in %.2fs", key[0], key[1], elapsed)
+        self._started()
+        return _Entry(transcriber=transcriber, size_bytes=size_bytes, last_used=time.monotonic())
+
+    def _make_room(self, size_bytes: int) -> None:
+        total = self._size_bytes()
+        for key, entry in list(self._entries.items()):
+            if total + size_bytes <= self.max_bytes:
+                break
+            if entry.users:
+                continue
+            del self._entries[key]
+            total -= entry.size_bytes
+            self.evictions += 1
+            logger.info("Evicted model %s (%s) to stay within the memory budget", *key)
+
+    def _started(self) -> None:
+        if self.idle_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name="model-reaper", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(min(self.idle_seconds, 60.0)):
+            self.unload_idle()
+
+
+def _load_transcriber(model_name: str, compute_type: str) -> Any:
+    from app.whisper_transcriber import WhisperTranscriber
+
+    layout = worker_layout()
+    return WhisperTranscriber(
+        model=model_name,
+        compute_type=compute_type,
+        num_workers=layout.replicas_per_process,
+        cpu_threads=layout.cpu_threads,
+    )
+
+
+@lru_cache
+def _registry_for(pid: int) -> ModelRegistry:
+    settings = get_settings()
+    return ModelRegistry(
+        settings.model_registry_max_bytes,
+        settings.model_registry_idle_seconds,
+        loader=_load_transcriber,
+    )
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return this process's registry, keyed by pid so forked workers load their own models."""
+    return _registry_for(os.getpid())
@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -32,12 +32,21 @@ class JobStatus(str, enum.Enum):
 
 class Batch(Base):
     __tablename__ = "batches"
+    __table_args__ = (Index("ix_batches_created_at_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     source_url: Mapped[str] = mapped_column(Text, nullable=False)
     status: Mapped[BatchStatus] = mapped_column(
         Enum(BatchStatus, name="batch_status"), default=BatchStatus.queued
     )
+    discovered_count: Mapped[int] = mapped_column(Integer, default=0)
+    queued_count: Mapped[int] = mapped_column(Integer, default=0)
+    downloading_count: Mapped[int] = mapped_column(Integer, default=0)
+    downloaded_count: Mapped[int] = mapped_column(Integer, default=0)
+    transcribing_count: Mapped[int] = mapped_column(Integer, default=0)
+    completed_count: Mapped[int] = mapped_column(Integer, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, default=0)
+    canceled_count: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
     )
@@ -50,6 +59,12 @@ class Batch(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_jobs_batch_id_created_at_id", "batch_id", "created_at", "id"),
+        Index("ix_jobs_download_path", "download_path"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     batch_id: Mapped[Optional[str]] = mapped_column(
@@ -57,10 +72,14 @@ class Job(Base):
     )
     source_url: Mapped[str] = mapped_column(Text, nullable=False)
     video_url: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    video_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    video_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True, index=True)
     title: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     uploader: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     requested_format: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    audio_only: Mapped[bool] = mapped_column(Boolean, default=False)
+    download_format: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    whisper_model: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    compute_type: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     status: Mapped[JobStatus] = mapped_column(
         Enum(JobStatus, name="job_status"), default=JobStatus.queued
     )
@@ -68,6 +87,14 @@ class Job(Base):
     download_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     transcript_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    decode_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    inference_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    download_bytes_per_second: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Audio seconds covered by the first checkpoint_bytes of the transcript file.
+    checkpoint_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    checkpoint_bytes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # The job whose task claimed this one into a batched transcription.
+    batch_leader_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
     )
@@ -83,6 +110,7 @@ class Job(Base):
 
 class JobEvent(Base):
     __tablename__ = "job_events"
+    __table_args__ = (Index("ix_job_events_job_id_id", "job_id", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     job_id: Mapped[str] = mapped_column(String(36), ForeignKey("jobs.id"), nullable=False)
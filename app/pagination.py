@@ -0,0 +1,52 @@
+"""Keyset (cursor) pagination helpers."""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Select, tuple_
+
+T = TypeVar("T")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+
+
+def newest_first(stmt: Select, model: Any, cursor: Optional[str], limit: int) -> Select:
+    """Order by (created_at, id) descending and resume after ``cursor``.
+
+    Fetches one extra row so :func:`split_page` can tell whether another page
+    exists. The row-value comparison lets the (..., created_at, id) indexes
+    serve the seek directly instead of skipping OFFSET rows.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[Sequence[T], Optional[str]]:
+    """Trim the lookahead row and return the cursor for the next page, if any."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
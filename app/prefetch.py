@@ -0,0 +1,157 @@
+"""Decode upcoming jobs' audio in the background while the current job is inferring."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Audio plus the seconds it took to decode.
+Decoded = Tuple[object, float]
+
+
+class AudioPrefetcher:
+    """Bounded single-thread prefetch stage for decoded 16 kHz PCM.
+
+    ``schedule`` queues decodes for the next few jobs. ``take`` hands the
+    result to the job that runs, waiting if its decode is still in flight.
+    At most ``depth`` files are pending or held at once. A decoded array
+    that would push the held total past ``max_bytes`` is dropped. With the
+    decoded-audio cache enabled, that decode still warms the cache.
+    """
+
+    def __init__(self, decoder: Callable[[Path], object], depth: int, max_bytes: int) -> None:
+        self.decoder = decoder
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        # Reentrant: a done-callback added under the lock may run immediately in this thread.
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Future] = {}
+        self._held_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-prefetch")
+
+    def schedule(self, paths: Iterable[Path], keep: Iterable[Path] = ()) -> None:
+        """Make ``paths`` the upcoming files, dropping held audio no longer expected.
+
+        Entries for ``keep`` (the file about to be taken) survive without
+        counting towards the depth, and are not started if not already queued.
+        """
+        wanted = [str(path) for path in paths][: self.depth]
+        kept = {str(path) for path in keep}
+        with self._lock:
+            for key in list(self._pending):
+                if key not in wanted and key not in kept:
+                    self._discard(key)
+            for key in wanted:
+                if key not in self._pending:
+                    self._pending[key] = self._executor.submit(self._decode, key)
+
+    def take(self, path: Path) -> Optional[Decoded]:
+        """Return the prefetched (audio, decode seconds) for ``path``, or None if not queued."""
+        key = str(path)
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None:
+            self.misses += 1
+            return None
+        try:
+            decoded = future.result()
+        except Exception as exc:
+            logger.warning("Prefetch of %s failed: %s", path, exc)
+            decoded = None
+        with self._lock:
+            # A concurrent schedule() may have discarded it meanwhile and released its bytes.
+            if self._pending.get(key) is future:
+                del self._pending[key]
+                if decoded is not None:
+                    self._held_bytes -= _nbytes(decoded[0])
+        if decoded is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decoded
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+                "held_bytes": self._held_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for key in list(self._pending):
+                self._discard(key)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _decode(self, key: str) -> Optional[Decoded]:
+        started = time.perf_counter()
+        audio = self.decoder(Path(key))
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if key not in self._pending or self._held_bytes + _nbytes(audio) > self.max_bytes:
+                self.dropped += 1
+                return None
+            self._held_bytes += _nbytes(audio)
+        return audio, elapsed
+
+    def _discard(self, key: str) -> None:
+        future = self._pending.pop(key)
+        if future.cancel():
+            return
+        if future.done() and future.exception() is None and future.result() is not None:
+            self._held_bytes -= _nbytes(future.result()[0])
+        elif not future.done():
+            future.add_done_callback(self._release)
+
+    def _release(self, future: Future) -> None:
+        if future.exception() is None and future.result() is not None:
+            with self._lock:
+                self._held_bytes -= _nbytes(future.result()[0])
+
+
+def _nbytes(audio: object) -> int:
+    return int(getattr(audio, "nbytes", 0))
+
+
+def _decode_audio(audio_file: Path):
+    from app.audio_cache import get_audio_cache
+    from app.audio_tools import load_audio
+
+    cache = get_audio_cache()
+    return cache.load(audio_file) if cache is not None else load_audio(audio_file)
+
+
+@lru_cache
+def _prefetcher_for(pid: int) -> AudioPrefetcher:
+    settings = get_settings()
+    return AudioPrefetcher(
+        _decode_audio,
+        depth=settings.transcription_prefetch_depth,
+        max_bytes=settings.transcription_prefetch_max_bytes,
+    )
+
+
+def get_prefetcher() -> Optional[AudioPrefetcher]:
+    """Return this process's prefetcher, or None when prefetching is disabled.
+
+    Keyed by pid so a forked Celery child never shares its parent's thread.
+    """
+    if get_settings().transcription_prefetch_depth <= 0:
+        return None
+    return _prefetcher_for(os.getpid())
@@ -0,0 +1,228 @@
+"""Live download progress kept in Redis and flushed to the jobs table in batches."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, update
+
+from app import db
+from app.config import get_settings
+from app.events import publish_notification
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "qtube:progress:"
+_DIRTY_KEY = "qtube:progress:dirty"
+_RETRY_AFTER_SECONDS = 30.0
+
+
+class ProgressStore:
+    """Per-job progress hashes with a TTL plus a set of jobs not yet written to the DB.
+
+    Writers call :meth:`record` as often as they like; only :meth:`flush` touches
+    the database, with one executemany UPDATE for every job that moved since the
+    previous flush. Redis errors are swallowed and reported as ``False`` so the
+    caller can fall back to writing the row directly.
+    """
+
+    def __init__(self, client, ttl_seconds: int, flush_batch_size: int = 500) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.flush_batch_size = flush_batch_size
+        self._disabled_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _pause(self, exc: Exception) -> None:
+        self._disabled_until = time.monotonic() + _RETRY_AFTER_SECONDS
+        logger.warning("Live progress store paused for %ss: %s", _RETRY_AFTER_SECONDS, exc)
+
+    def record(self, job_id: str, progress: float, batch_id: Optional[str] = None) -> bool:
+        if not self._available():
+            return False
+        key = f"{_KEY_PREFIX}{job_id}"
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.hset(
+                key,
+                mapping={
+                    "progress": progress,
+                    "batch_id": batch_id or "",
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+            )
+            pipeline.expire(key, self.ttl_seconds)
+            pipeline.sadd(_DIRTY_KEY, job_id)
+            pipeline.execute()
+        except Exception as exc:
+            self._pause(exc)
+            return False
+        return True
+
+    def clear(self, job_id: str) -> None:
+        """Forget a job's live progress once its row holds the authoritative value."""
+        if not self._available():
+            return
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.delete(f"{_KEY_PREFIX}{job_id}")
+            pipeline.srem(_DIRTY_KEY, job_id)
+            pipeline.execute()
+        except Exception as exc:
+            self._pause(exc)
+
+    def live_progress(self, job_ids: Iterable[str]) -> Dict[str, float]:
+        """Return the latest progress for the given jobs, skipping ones with no live value."""
+        job_ids = list(job_ids)
+        if not job_ids or not self._available():
+            return {}
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for job_id in job_ids:
+                pipeline.hget(f"{_KEY_PREFIX}{job_id}", "progress")
+            values = pipeline.execute()
+        except Exception as exc:
+            self._pause(exc)
+            return {}
+        return {
+            job_id: float(value) for job_id, value in zip(job_ids, values) if value is not None
+        }
+
+    def flush(self) -> int:
+        """Write pending progress to the jobs table and return how many rows were updated."""
+        if not self._available():
+            return 0
+        try:
+            popped = self.client.spop(_DIRTY_KEY, self.flush_batch_size) or []
+            job_ids = [_text(value) for value in popped]
+            progress = self.live_progress(job_ids)
+        except Exception as exc:
+            self._pause(exc)
+            return 0
+        if not progress:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            {"b_id": job_id, "b_progress": value, "b_now": now}
+            for job_id, value in progress.items()
+        ]
+        # Only move forward, and never overwrite a job that has already left "downloading".
+        stmt = (
+            update(Job.__table__)
+            .where(
+                Job.__table__.c.id == bindparam("b_id"),
+                Job.__table__.c.status == JobStatus.downloading,
+                Job.__table__.c.progress < bindparam("b_progress"),
+            )
+            .values(progress=bindparam("b_progress"), updated_at=bindparam("b_now"))
+        )
+        try:
+            with db.SessionLocal() as session:
+                session.connection().execute(stmt, rows)
+                session.commit()
+        except Exception:
+            # Put the jobs back so the next flush retries them.
+            self.client.sadd(_DIRTY_KEY, *progress)
+            raise
+        return len(rows)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class ProgressFlusher:
+    """Daemon thread that flushes a :class:`ProgressStore` on a fixed interval."""
+
+    def __init__(self, store: ProgressStore, interval: float) -> None:
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.store.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.flush()
+            except Exception as exc:
+                logger.warning("Progress flush failed: %s", exc)
+
+
+@lru_cache
+def get_progress_store() -> Optional[ProgressStore]:
+    """Return the process-wide store, or None when live progress is disabled."""
+    settings = get_settings()
+    if not settings.live_progress_enabled:
+        return None
+    import redis
+
+    client = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=1, socket_timeout=2)
+    return ProgressStore(client, settings.live_progress_ttl)
+
+
+_flusher: Optional[ProgressFlusher] = None
+_flusher_lock = threading.Lock()
+
+
+def _ensure_flusher(store: ProgressStore) -> None:
+    # Started lazily so only processes that actually report progress run a flusher,
+    # and so prefork children start their own thread after the fork.
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = ProgressFlusher(store, get_settings().live_progress_flush_interval)
+        _flusher.start()
+
+
+def report_progress(job: Job, progress: float) -> bool:
+    """Record live progress for a job; False means the caller must persist it itself."""
+    store = get_progress_store()
+    if store is None or not store.record(job.id, progress, job.batch_id):
+        return False
+    _ensure_flusher(store)
+    publish_notification(
+        "job",
+        {
+            "job_id": job.id,
+            "batch_id": job.batch_id,
+            "status": JobStatus.downloading.value,
+            "progress": progress,
+        },
+    )
+    return True
+
+
+def finish_progress(job_id: str) -> None:
+    store = get_progress_store()
+    if store is not None:
+        store.clear(job_id)
+
+
+def live_progress_for(jobs: List[Job]) -> Dict[str, float]:
+    """Live progress for the downloading jobs in ``jobs``, keyed by job id."""
+    store = get_progress_store()
+    if store is None:
+        return {}
+    return store.live_progress(job.id for job in jobs if job.status == JobStatus.downloading)
@@ -0,0 +1,299 @@
+"""Cluster-wide per-host token buckets for yt-dlp requests and bytes, kept in Redis."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "qtube:ratelimit:"
+_RETRY_AFTER_SECONDS = 30.0
+_MIN_FACTOR = 1 / 64
+# Bytes are charged in steps this large, so progress hooks don't call Redis per block.
+_BYTES_STEP = 256 * 1024
+
+# Both scripts mirror _take/_penalize below. Floats are returned as strings
+# because Redis truncates Lua numbers to integers in replies.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local kind, rate, capacity = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+local cost, recovery, ttl = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+local s = redis.call('HMGET', KEYS[1], kind, kind .. '_at', 'factor', 'factor_at', 'blocked_until')
+local factor = tonumber(s[3]) or 1
+if recovery > 0 then
+  factor = math.min(1, factor + (now - (tonumber(s[4]) or now)) / recovery)
+else
+  factor = 1
+end
+local effective = rate * factor
+local tokens = tonumber(s[1]) or capacity
+tokens = math.min(capacity, tokens + (now - (tonumber(s[2]) or now)) * effective) - cost
+local wait = 0
+if tokens < 0 then wait = -tokens / effective end
+wait = math.max(wait, (tonumber(s[5]) or 0) - now)
+redis.call('HSET', KEYS[1], kind, tokens, kind .. '_at', now, 'factor', factor, 'factor_at', now)
+redis.call('EXPIRE', KEYS[1], ttl)
+return tostring(wait)
+"""
+
+_PENALIZE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local base, ceiling, retry_after = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local recovery, min_factor, ttl = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+local s = redis.call('HMGET', KEYS[1], 'factor', 'factor_at', 'blocked_until')
+local factor = tonumber(s[1]) or 1
+if recovery > 0 then
+  factor = math.min(1, factor + (now - (tonumber(s[2]) or now)) / recovery)
+end
+factor = math.max(min_factor, factor / 2)
+local backoff = math.max(retry_after, math.min(ceiling, base / factor))
+local blocked = math.max(tonumber(s[3]) or 0, now + backoff)
+redis.call('HSET', KEYS[1], 'factor', factor, 'factor_at', now, 'blocked_until', blocked)
+redis.call('EXPIRE', KEYS[1], ttl)
+return tostring(blocked - now)
+"""
+
+
+def _recovered(state: Dict[str, float], now: float, recovery: float) -> float:
+    if recovery <= 0:
+        return 1.0
+    return min(1.0, state.get("factor", 1.0) + (now - state.get("factor_at", now)) / recovery)
+
+
+def _take(
+    state: Dict[str, float],
+    now: float,
+    kind: str,
+    rate: float,
+    capacity: float,
+    cost: float,
+    recovery: float,
+) -> float:
+    """Reserve ``cost`` tokens and return how long the caller must wait for them.
+
+    The bucket may go negative: later callers queue up behind the debt
+    instead of racing for tokens. The refill rate is scaled down by the
+    backoff factor, which climbs back to 1 over ``recovery`` seconds.
+    """
+    factor = _recovered(state, now, recovery)
+    effective = rate * factor
+    tokens = state.get(kind, capacity)
+    tokens = min(capacity, tokens + (now - state.get(f"{kind}_at", now)) * effective) - cost
+    wait = -tokens / effective if tokens < 0 else 0.0
+    wait = max(wait, state.get("blocked_until", 0.0) - now)
+    state.update({kind: tokens, f"{kind}_at": now, "factor": factor, "factor_at": now})
+    return wait
+
+
+def _penalize(
+    state: Dict[str, float],
+    now: float,
+    base: float,
+    ceiling: float,
+    retry_after: float,
+    recovery: float,
+) -> float:
+    """Halve the host's rate and block it; consecutive 429s double the block."""
+    factor = max(_MIN_FACTOR, _recovered(state, now, recovery) / 2)
+    backoff = max(retry_after, min(ceiling, base / factor))
+    blocked_until = max(state.get("blocked_until", 0.0), now + backoff)
+    state.update({"factor": factor, "factor_at": now, "blocked_until": blocked_until})
+    return blocked_until - now
+
+
+class RateLimiter:
+    """Per-host request and byte budgets shared by every process through Redis.
+
+    Hosts matching a configured suffix share that suffix's bucket, so all of
+    ``*.googlevideo.com`` draws on one budget. Other hosts get their own
+    bucket at the default rates. A 429 halves the host's rate and blocks it
+    for a backoff that doubles with each consecutive 429. The rate then
+    recovers linearly. If Redis is unreachable, in-process buckets stand in
+    for ``_RETRY_AFTER_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        client,
+        requests_per_second: float,
+        bytes_per_second: int = 0,
+        host_requests_per_second: Optional[Mapping[str, float]] = None,
+        host_bytes_per_second: Optional[Mapping[str, int]] = None,
+        burst_seconds: float = 5.0,
+        backoff_seconds: float = 30.0,
+        max_backoff_seconds: float = 900.0,
+        recovery_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.client = client
+        self.requests_per_second = requests_per_second
+        self.bytes_per_second = bytes_per_second
+        self.host_requests_per_second = dict(host_requests_per_second or {})
+        self.host_bytes_per_second = dict(host_bytes_per_second or {})
+        self.burst_seconds = burst_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self._ttl = int(max(burst_seconds, max_backoff_seconds, recovery_seconds)) + 60
+        self._suffixes = sorted(
+            set(self.host_requests_per_second) | set(self.host_bytes_per_second),
+            key=len,
+            reverse=True,
+        )
+        self._lock = threading.Lock()
+        self._local: Dict[str, Dict[str, float]] = {}
+        self._disabled_until = 0.0
+        self._take_script = client.register_script(_TAKE_SCRIPT) if client is not None else None
+        self._penalize_script = (
+            client.register_script(_PENALIZE_SCRIPT) if client is not None else None
+        )
+
+    def bucket(self, url_or_host: str) -> Tuple[str, float, int]:
+        """Return the bucket name and its requests/s and bytes/s limits (0 = unlimited)."""
+        host = _host(url_or_host)
+        for suffix in self._suffixes:
+            if host == suffix or host.endswith(f".{suffix}"):
+                return (
+                    suffix,
+                    self.host_requests_per_second.get(suffix, self.requests_per_second),
+                    self.host_bytes_per_second.get(suffix, self.bytes_per_second),
+                )
+        return host, self.requests_per_second, self.bytes_per_second
+
+    def acquire(self, url_or_host: str, requests: int = 1) -> float:
+        """Block until ``requests`` requests to the host are allowed; return the seconds waited."""
+        name, rate, _bytes_rate = self.bucket(url_or_host)
+        return self._wait(name, "requests", rate, requests)
+
+    def consume_bytes(self, url_or_host: str, nbytes: int) -> float:
+        """Charge ``nbytes`` transferred from the host, sleeping off any excess."""
+        name, _rate, bytes_rate = self.bucket(url_or_host)
+        return self._wait(name, "bytes", bytes_rate, nbytes)
+
+    def penalize(self, url_or_host: str, retry_after: float = 0.0) -> float:
+        """Back off the host after a 429; return how long it is now blocked."""
+        name, _rate, _bytes_rate = self.bucket(url_or_host)
+        args = (
+            self.backoff_seconds,
+            self.max_backoff_seconds,
+            retry_after,
+            self.recovery_seconds,
+        )
+        blocked = None
+        if self._redis_available():
+            try:
+                blocked = float(
+                    self._penalize_script(
+                        keys=[f"{_KEY_PREFIX}{name}"], args=[*args, _MIN_FACTOR, self._ttl]
+                    )
+                )
+            except Exception as exc:
+                self._pause(exc)
+        if blocked is None:
+            with self._lock:
+                blocked = _penalize(self._local.setdefault(name, {}), self.clock(), *args)
+        logger.warning("Rate limited by %s; backing off for %.0fs", name, blocked)
+        return blocked
+
+    def bytes_hook(self) -> Callable[[Dict[str, Any]], None]:
+        """A yt-dlp progress hook that charges downloaded bytes to the format's host."""
+        charged: Dict[str, int] = {}
+
+        def hook(data: Dict[str, Any]) -> None:
+            downloaded = data.get("downloaded_bytes")
+            url = (data.get("info_dict") or {}).get("url")
+            if downloaded is None or not url or not self.bucket(url)[2]:
+                return
+            key = str(data.get("filename") or data.get("tmpfilename") or "")
+            # The first report is the baseline, so resumed bytes are not charged.
+            previous = charged.setdefault(key, downloaded)
+            if downloaded - previous >= _BYTES_STEP or data.get("status") == "finished":
+                charged[key] = downloaded
+                if downloaded > previous:
+                    self.consume_bytes(url, downloaded - previous)
+
+        return hook
+
+    def _wait(self, name: str, kind: str, rate: float, cost: float) -> float:
+        if rate <= 0 or cost <= 0:
+            return 0.0
+        capacity = max(cost, rate * self.burst_seconds)
+        wait = None
+        if self._redis_available():
+            try:
+                wait = float(
+                    self._take_script(
+                        keys=[f"{_KEY_PREFIX}{name}"],
+                        args=[kind, rate, capacity, cost, self.recovery_seconds, self._ttl],
+                    )
+                )
+            except Exception as exc:
+                self._pause(exc)
+        if wait is None:
+            with self._lock:
+                state = self._local.setdefault(name, {})
+                wait = _take(
+                    state, self.clock(), kind, rate, capacity, cost, self.recovery_seconds
+                )
+        if wait > 0:
+            self.sleep(wait)
+        return max(wait, 0.0)
+
+    def _redis_available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._disabled_until
+
+    def _pause(self, exc: Exception) -> None:
+        self._disabled_until = time.monotonic() + _RETRY_AFTER_SECONDS
+        logger.warning(
+            "Shared rate limiter unavailable for %ss, limiting per process: %s",
+            _RETRY_AFTER_SECONDS,
+            exc,
+        )
+
+
+def _host(url_or_host: str) -> str:
+    if "//" in url_or_host:
+        return (urlsplit(url_or_host).hostname or "").lower()
+    return url_or_host.lower()
+
+
+@lru_cache
+def _limiter_for(pid: int) -> RateLimiter:
+    settings = get_settings()
+    import redis
+
+    client = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=1, socket_timeout=2)
+    return RateLimiter(
+        client,
+        settings.rate_limit_requests_per_second,
+        settings.rate_limit_bytes_per_second,
+        settings.rate_limit_host_requests_per_second,
+        settings.rate_limit_host_bytes_per_second,
+        burst_seconds=settings.rate_limit_burst_seconds,
+        backoff_seconds=settings.rate_limit_backoff_seconds,
+        max_backoff_seconds=settings.rate_limit_max_backoff_seconds,
+        recovery_seconds=settings.rate_limit_recovery_seconds,
+    )
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return this process's limiter, or None when rate limiting is disabled.
+
+    Keyed by pid so a forked worker child never shares its parent's fallback lock.
+    """
+    if not get_settings().rate_limit_enabled:
+        return None
+    return _limiter_for(os.getpid())
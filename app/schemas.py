@@ -13,6 +13,10 @@ from app.models import BatchStatus, JobStatus
 class JobCreateRequest(BaseModel):
     url: str = Field(..., min_length=3)
     format_id: Optional[str] = Field(default=None, max_length=64)
+    audio_only: Optional[bool] = None
+    force: bool = False
+    whisper_model: Optional[str] = Field(default=None, min_length=1, max_length=128)
+    compute_type: Optional[str] = Field(default=None, pattern=r"^[a-z0-9_]+$", max_length=32)
 
 
 class BatchCreateResponse(BaseModel):
@@ -26,6 +30,14 @@ class BatchResponse(BaseModel):
     id: str
     source_url: str
     status: BatchStatus
+    discovered_count: int
+    queued_count: int
+    downloading_count: int
+    downloaded_count: int
+    transcribing_count: int
+    completed_count: int
+    failed_count: int
+    canceled_count: int
     created_at: datetime
     updated_at: datetime
 
@@ -41,11 +53,19 @@ class JobResponse(BaseModel):
     title: Optional[str]
     uploader: Optional[str]
     requested_format: Optional[str]
+    audio_only: bool
+    download_format: Optional[str]
+    whisper_model: Optional[str]
+    compute_type: Optional[str]
     status: JobStatus
     progress: float
     download_path: Optional[str]
     transcript_path: Optional[str]
     error: Optional[str]
+    decode_seconds: Optional[float] = None
+    inference_seconds: Optional[float] = None
+    download_bytes_per_second: Optional[float] = None
+    checkpoint_seconds: Optional[float] = None
     created_at: datetime
     updated_at: datetime
     started_at: Optional[datetime]
@@ -65,7 +85,8 @@ class JobEventResponse(BaseModel):
 
 class JobListResponse(BaseModel):
     jobs: List[JobResponse]
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class BatchDetailResponse(BaseModel):
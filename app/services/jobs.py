@@ -3,14 +3,55 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+from uuid import uuid4
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, or_, select, update
 from sqlalchemy.orm import Session
 
+from app.events import queue_notification
 from app.models import Batch, BatchStatus, Job, JobEvent, JobStatus
 
 
+STATUS_COUNTERS: Dict[JobStatus, str] = {status: f"{status.value}_count" for status in JobStatus}
+
+
+def _adjust_batch_counters(
+    session: Session, batch_id: Optional[str], deltas: Mapping[JobStatus, int]
+) -> None:
+    """Apply relative per-status counter changes to a batch in one atomic UPDATE."""
+    if not batch_id:
+        return
+    values = {}
+    for status, delta in deltas.items():
+        if delta:
+            column = getattr(Batch, STATUS_COUNTERS[status])
+            values[column.key] = column + delta
+    if not values:
+        return
+    session.execute(
+        update(Batch)
+        .where(Batch.id == batch_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def notify_job(session: Session, job: Job) -> None:
+    queue_notification(
+        session,
+        "job",
+        {
+            "job_id": job.id,
+            "batch_id": job.batch_id,
+            "status": job.status.value,
+            "progress": job.progress,
+            "error": job.error,
+        },
+    )
+
+
 def create_batch(session: Session, source_url: str) -> Batch:
     batch = Batch(source_url=source_url, status=BatchStatus.queued)
     session.add(batch)
@@ -27,6 +68,7 @@ def create_job(
     title: Optional[str] = None,
     uploader: Optional[str] = None,
     requested_format: Optional[str] = None,
+    audio_only: bool = False,
 ) -> Job:
     job = Job(
         batch_id=batch_id,
@@ -36,11 +78,13 @@ def create_job(
         title=title,
         uploader=uploader,
         requested_format=requested_format,
+        audio_only=audio_only,
         status=JobStatus.queued,
         progress=0.0,
     )
     session.add(job)
     session.flush()
+    _adjust_batch_counters(session, batch_id, {JobStatus.queued: 1})
     return job
 
 
@@ -58,6 +102,18 @@ def add_job_event(
         progress=progress,
     )
     session.add(event)
+    job = session.get(Job, job_id)
+    queue_notification(
+        session,
+        "job_event",
+        {
+            "job_id": job_id,
+            "batch_id": job.batch_id if job else None,
+            "event_type": event_type,
+            "message": message,
+            "progress": progress,
+        },
+    )
     return event
 
 
@@ -70,6 +126,9 @@ def update_job_status(
     download_path: Optional[str] = None,
     transcript_path: Optional[str] = None,
 ) -> Job:
+    previous = job.status
+    if previous is not None and previous != status:
+        _adjust_batch_counters(session, job.batch_id, {previous: -1, status: 1})
     job.status = status
     job.updated_at = datetime.utcnow()
     if progress is not None:
@@ -85,9 +144,254 @@ def update_job_status(
     if status in {JobStatus.completed, JobStatus.failed, JobStatus.canceled}:
         job.finished_at = datetime.utcnow()
     session.add(job)
+    notify_job(session, job)
     return job
 
 
+def bulk_create_jobs(
+    session: Session,
+    jobs: Sequence[Dict[str, Any]],
+    reuse: Optional[Mapping[str, Job]] = None,
+) -> List[Dict[str, Any]]:
+    """Insert many jobs and their first events with one multi-row INSERT per table.
+
+    Each item holds ``create_job`` keyword arguments. Items whose video_id is in
+    ``reuse`` are inserted already completed from that job's result with a
+    "reused" event; the rest are queued. Returns the rows that still need a
+    download.
+    """
+    now = datetime.utcnow()
+    job_rows: List[Dict[str, Any]] = []
+    event_rows: List[Dict[str, Any]] = []
+    queued: List[Dict[str, Any]] = []
+    for fields in jobs:
+        row = {
+            "id": str(uuid4()),
+            "batch_id": fields.get("batch_id"),
+            "source_url": fields["source_url"],
+            "video_url": fields.get("video_url"),
+            "video_id": fields.get("video_id"),
+            "title": fields.get("title"),
+            "uploader": fields.get("uploader"),
+            "requested_format": fields.get("requested_format"),
+            "audio_only": bool(fields.get("audio_only", False)),
+            "download_format": None,
+            "whisper_model": fields.get("whisper_model"),
+            "compute_type": fields.get("compute_type"),
+            "status": JobStatus.queued,
+            "progress": 0.0,
+            "download_path": None,
+            "transcript_path": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        source = reuse.get(row["video_id"]) if reuse and row["video_id"] else None
+        if source is None:
+            event = ("queued", "Queued for download", 0.0)
+            queued.append(row)
+        else:
+            row.update(
+                status=JobStatus.completed,
+                progress=100.0,
+                download_path=source.download_path,
+                transcript_path=source.transcript_path,
+                download_format=source.download_format,
+                whisper_model=source.whisper_model,
+                compute_type=source.compute_type,
+                finished_at=now,
+            )
+            event = ("reused", f"Reused transcript from job {source.id}", 100.0)
+        job_rows.append(row)
+        event_rows.append(
+            {
+                "job_id": row["id"],
+                "event_type": event[0],
+                "message": event[1],
+                "progress": event[2],
+                "created_at": now,
+            }
+        )
+
+    if job_rows:
+        session.execute(insert(Job).values(job_rows))
+        session.execute(insert(JobEvent).values(event_rows))
+        per_batch: Dict[str, Dict[JobStatus, int]] = {}
+        for row in job_rows:
+            if row["batch_id"]:
+                counts = per_batch.setdefault(row["batch_id"], {})
+                counts[row["status"]] = counts.get(row["status"], 0) + 1
+        for batch_id, counts in per_batch.items():
+            _adjust_batch_counters(session, batch_id, counts)
+        for row in job_rows:
+            queue_notification(
+                session,
+                "job",
+                {
+                    "job_id": row["id"],
+                    "batch_id": row["batch_id"],
+                    "status": row["status"].value,
+                    "progress": row["progress"],
+                    "error": None,
+                },
+            )
+    return queued
+
+
+def find_existing_download_paths(
+    session: Session, paths: Sequence[str], chunk_size: int = 500
+) -> set[str]:
+    """Return which of ``paths`` already belong to a job, via the download_path index.
+
+    Chunked so a large scan stays under the database's bound-parameter limit.
+    """
+    existing: set[str] = set()
+    for start in range(0, len(paths), chunk_size):
+        chunk = paths[start : start + chunk_size]
+        existing.update(
+            session.scalars(select(Job.download_path).where(Job.download_path.in_(chunk)))
+        )
+    return existing
+
+
+def find_paths_used_by_other_jobs(
+    session: Session, job_id: str, paths: Sequence[str]
+) -> set[str]:
+    """Return which of ``paths`` another job also points at, as reused jobs share files."""
+    if not paths:
+        return set()
+    rows = session.execute(
+        select(Job.download_path, Job.transcript_path).where(
+            Job.id != job_id,
+            or_(Job.download_path.in_(paths), Job.transcript_path.in_(paths)),
+        )
+    ).all()
+    return {path for row in rows for path in row if path in paths}
+
+
+def bulk_import_downloads(session: Session, paths: Sequence[str]) -> List[str]:
+    """Insert local media files as downloaded jobs, with one multi-row INSERT per table.
+
+    Returns the new job ids in the order of ``paths``.
+    """
+    now = datetime.utcnow()
+    job_rows = [
+        {
+            "id": str(uuid4()),
+            "source_url": "local",
+            "audio_only": False,
+            "status": JobStatus.downloaded,
+            "progress": 50.0,
+            "download_path": path,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for path in paths
+    ]
+    if not job_rows:
+        return []
+    session.execute(insert(Job).values(job_rows))
+    session.execute(
+        insert(JobEvent).values(
+            [
+                {
+                    "job_id": row["id"],
+                    "event_type": "downloaded",
+                    "message": "Imported local download",
+                    "progress": 50.0,
+                    "created_at": now,
+                }
+                for row in job_rows
+            ]
+        )
+    )
+    for row in job_rows:
+        queue_notification(
+            session,
+            "job",
+            {
+                "job_id": row["id"],
+                "batch_id": None,
+                "status": row["status"].value,
+                "progress": row["progress"],
+                "error": None,
+            },
+        )
+    return [row["id"] for row in job_rows]
+
+
+def find_reusable_jobs(
+    session: Session,
+    video_ids: Iterable[Optional[str]],
+    whisper_model: str,
+    compute_type: str,
+) -> Dict[str, Job]:
+    """Map video ids to their latest completed job for this model, in one query.
+
+    Only jobs whose transcript file still exists are returned.
+    """
+    wanted = {video_id for video_id in video_ids if video_id}
+    if not wanted:
+        return {}
+    candidates = session.scalars(
+        select(Job)
+        .where(
+            Job.video_id.in_(wanted),
+            Job.status == JobStatus.completed,
+            Job.whisper_model == whisper_model,
+            Job.compute_type == compute_type,
+            Job.transcript_path.is_not(None),
+        )
+        .order_by(Job.finished_at.desc())
+    )
+    found: Dict[str, Job] = {}
+    for candidate in candidates:
+        if candidate.video_id in found:
+            continue
+        if Path(candidate.transcript_path).exists():
+            found[candidate.video_id] = candidate
+    return found
+
+
+def find_reusable_job(
+    session: Session,
+    video_id: str,
+    whisper_model: str,
+    compute_type: str,
+) -> Optional[Job]:
+    """Return the latest completed job for this video and model whose transcript still exists."""
+    return find_reusable_jobs(session, [video_id], whisper_model, compute_type).get(video_id)
+
+
+def claim_job(
+    session: Session, job_id: str, from_status: JobStatus, to_status: JobStatus
+) -> bool:
+    """Atomically move a job between statuses; False if another worker got there first."""
+    claimed = session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == from_status)
+        .values(status=to_status, updated_at=datetime.utcnow())
+        .returning(Job.batch_id)
+    ).first()
+    if claimed is None:
+        return False
+    _adjust_batch_counters(session, claimed.batch_id, {from_status: -1, to_status: 1})
+    queue_notification(
+        session,
+        "job",
+        {"job_id": job_id, "batch_id": claimed.batch_id, "status": to_status.value},
+    )
+    return True
+
+
+def remove_job(session: Session, job: Job) -> None:
+    """Delete a job with its events and take it out of its batch's counters."""
+    _adjust_batch_counters(session, job.batch_id, {job.status: -1})
+    session.execute(delete(JobEvent).where(JobEvent.job_id == job.id))
+    session.delete(job)
+    session.flush()
+
+
 def set_batch_status(session: Session, batch_id: str, status: BatchStatus) -> None:
     batch = session.get(Batch, batch_id)
     if not batch:
@@ -97,23 +401,66 @@ def set_batch_status(session: Session, batch_id: str, status: BatchStatus) -> No
     session.add(batch)
 
 
+def add_discovered_entries(session: Session, batch_id: str, count: int) -> None:
+    """Bump the number of playlist entries found so far and mark the batch as processing."""
+    session.execute(
+        update(Batch)
+        .where(Batch.id == batch_id)
+        .values(
+            discovered_count=Batch.discovered_count + count,
+            status=BatchStatus.processing,
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def derive_batch_status(batch: Batch) -> BatchStatus:
+    """Batch status from its counters: any failure fails it, all completed completes it."""
+    counts = {status: getattr(batch, column) or 0 for status, column in STATUS_COUNTERS.items()}
+    total = sum(counts.values())
+    if total == 0:
+        return BatchStatus.completed
+    if counts[JobStatus.failed]:
+        return BatchStatus.failed
+    if counts[JobStatus.completed] == total:
+        return BatchStatus.completed
+    return BatchStatus.processing
+
+
 def update_batch_status(session: Session, batch_id: str) -> None:
-    batch = session.get(Batch, batch_id)
+    """Refresh a batch's status from its counters without loading its jobs."""
+    batch = session.get(Batch, batch_id, populate_existing=True)
     if not batch:
         return
-
-    jobs = session.scalars(select(Job).where(Job.batch_id == batch_id)).all()
-    if not jobs:
-        batch.status = BatchStatus.completed
-        session.add(batch)
+    status = derive_batch_status(batch)
+    if batch.status == status:
         return
-
-    statuses = {job.status for job in jobs}
-    if JobStatus.failed in statuses:
-        batch.status = BatchStatus.failed
-    elif all(status == JobStatus.completed for status in statuses):
-        batch.status = BatchStatus.completed
-    else:
-        batch.status = BatchStatus.processing
+    batch.status = status
     batch.updated_at = datetime.utcnow()
     session.add(batch)
+
+
+def recount_batch_counters(session: Session, batch_id: Optional[str] = None) -> None:
+    """Rebuild per-status counters (and statuses) from the jobs table with one GROUP BY.
+
+    Repairs counters that drifted, e.g. after manual edits or a crash between
+    a status change and its commit. Recounts every batch when batch_id is None.
+    """
+    stmt = select(Job.batch_id, Job.status, func.count()).where(Job.batch_id.is_not(None))
+    batches_stmt = select(Batch)
+    if batch_id:
+        stmt = stmt.where(Job.batch_id == batch_id)
+        batches_stmt = batches_stmt.where(Batch.id == batch_id)
+    counts: Dict[str, Dict[JobStatus, int]] = {}
+    for row_batch_id, status, count in session.execute(stmt.group_by(Job.batch_id, Job.status)):
+        counts.setdefault(row_batch_id, {})[status] = count
+
+    for batch in session.scalars(batches_stmt):
+        batch_counts = counts.get(batch.id, {})
+        for status, column in STATUS_COUNTERS.items():
+            setattr(batch, column, batch_counts.get(status, 0))
+        if batch_counts:
+            batch.status = derive_batch_status(batch)
+        batch.updated_at = datetime.utcnow()
+        session.add(batch)
@@ -2,32 +2,422 @@
 
 from __future__ import annotations
 
+import os
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Sequence
 
-from celery.signals import worker_process_init
+from celery import group
+from celery.signals import celeryd_after_setup, worker_process_init
 from celery.utils.log import get_task_logger
 
+from app.audio_tools import SAMPLE_RATE, probe_duration
 from app.celery_app import celery_app
 from app.config import get_settings
+from app.cpu_topology import worker_layout
 from app import db
 from app.models import Job, JobStatus
-from sqlalchemy import select
+from sqlalchemy import func, select
 
-from app.services.jobs import add_job_event, create_job, update_batch_status, update_job_status
-from app.whisper_transcriber import WhisperTranscriber
+from app.services.jobs import (
+    add_job_event,
+    bulk_import_downloads,
+    claim_job,
+    find_existing_download_paths,
+    update_batch_status,
+    update_job_status,
+)
+from app.media_scan import MediaScanner
+from app.model_registry import get_model_registry
+from app.prefetch import get_prefetcher
+from app.write_queue import get_write_batcher
+
+if TYPE_CHECKING:
+    from app.audio_tools import NdArray
+    from app.whisper_transcriber import TranscriptSegment, WhisperTranscriber
 
 logger = get_task_logger(__name__)
 settings = get_settings()
 
+# Pool processes of this Celery worker, recorded in the parent before it forks them.
+_worker_concurrency = 1
+
+
+@celeryd_after_setup.connect
+def record_worker_concurrency(sender, instance, **kwargs):
+    global _worker_concurrency
+    _worker_concurrency = instance.concurrency or 1
+
 
 @worker_process_init.connect
 def init_transcriber(**kwargs):
-    transcribe_video.transcriber = WhisperTranscriber()
+    """Warm the registry with the default model so the first job skips the load."""
+    logger.info("Transcription worker layout: %s", worker_layout().describe())
+    get_model_registry().preload(settings.whisper_model, settings.transcription_compute_type)
+
+
+def _job_model(job: Job) -> tuple[str, str]:
+    return (
+        job.whisper_model or settings.whisper_model,
+        job.compute_type or settings.transcription_compute_type,
+    )
+
+
+def _use_chunked_mode(audio_file: Path) -> bool:
+    threshold = settings.chunked_transcription_threshold
+    if threshold <= 0:
+        return False
+    duration = probe_duration(audio_file)
+    return duration is not None and duration >= threshold
+
+
+def _batching_enabled() -> bool:
+    return settings.transcription_batch_size > 1
+
+
+def _is_batchable(job: Job) -> bool:
+    if not job.download_path:
+        return False
+    duration = probe_duration(Path(job.download_path))
+    return duration is not None and duration <= settings.transcription_batch_max_duration
+
+
+def _record_model(job: Job, transcriber: WhisperTranscriber) -> None:
+    job.whisper_model = transcriber.model_name
+    job.compute_type = transcriber.compute_type
+
+
+def _decode(transcriber: WhisperTranscriber, audio_file: Path) -> tuple[NdArray, float]:
+    """Decoded PCM for a file and the seconds spent decoding it.
+
+    Uses the prefetch stage's result when it ran ahead; the decode time it
+    reports was spent in the background, overlapped with an earlier job.
+    """
+    prefetcher = get_prefetcher()
+    prefetched = prefetcher.take(audio_file) if prefetcher is not None else None
+    if prefetched is not None:
+        return prefetched
+    started = time.perf_counter()
+    audio = transcriber.load_audio(audio_file)
+    return audio, time.perf_counter() - started
+
+
+def _prefetch_upcoming(session, current_job: Job) -> None:
+    """Queue background decodes for the jobs most likely to run next in this worker.
+
+    The current job's decode, queued while an earlier job ran, is kept for
+    ``_decode`` to take. The next downloaded job is only this process's to
+    run when it is the worker's sole pool process; with several, each would
+    decode the same file, so nothing is prefetched.
+    """
+    if _worker_concurrency > 1:
+        return
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return
+    paths = session.scalars(
+        select(Job.download_path)
+        .where(
+            Job.status == JobStatus.downloaded,
+            Job.download_path.is_not(None),
+            Job.id != current_job.id,
+        )
+        .order_by(Job.updated_at.asc())
+        .limit(prefetcher.depth)
+    ).all()
+    prefetcher.schedule(
+        (Path(path) for path in paths), keep=[Path(current_job.download_path)]
+    )
+
+
+def _log_timings(job: Job) -> None:
+    logger.info(
+        "Job %s decode %.2fs, inference %.2fs",
+        job.id,
+        job.decode_seconds or 0.0,
+        job.inference_seconds or 0.0,
+    )
+
+
+def _transcript_path(job: Job) -> str:
+    return f"{job.download_path}.txt"
+
+
+def _resume_point(job: Job) -> tuple[float, int]:
+    """The audio offset and transcript length to resume from, or (0, 0) to start over.
+
+    A checkpoint is only trusted while the transcript file still holds at
+    least the bytes it covers.
+    """
+    if not job.checkpoint_seconds:
+        return 0.0, 0
+    resume_bytes = job.checkpoint_bytes or 0
+    try:
+        if os.path.getsize(_transcript_path(job)) < resume_bytes:
+            return 0.0, 0
+    except OSError:
+        return 0.0, 0
+    return job.checkpoint_seconds, resume_bytes
+
+
+def _checkpoint(session, job: Job, handle, seconds: float) -> None:
+    """Make the transcript so far durable, then record how much audio it covers."""
+    handle.flush()
+    os.fsync(handle.fileno())
+    job.checkpoint_seconds = seconds
+    job.checkpoint_bytes = handle.tell()
+    session.commit()
+
+
+def _complete_job(session, job: Job, transcript_path: str) -> None:
+    job.checkpoint_seconds = None
+    job.checkpoint_bytes = None
+    update_job_status(
+        session, job, JobStatus.completed, progress=100.0, transcript_path=transcript_path
+    )
+    add_job_event(session, job.id, "completed", "Transcription completed", 100.0)
+    session.commit()
+    if job.batch_id:
+        update_batch_status(session, job.batch_id)
+        session.commit()
+
+
+def _stream_transcript(
+    session,
+    job: Job,
+    segments: Iterable[TranscriptSegment],
+    duration: float | None,
+    resume_bytes: int = 0,
+) -> str:
+    """Append segments to the transcript file as they arrive and report progress.
+
+    The transcript path is recorded up front so readers can follow the
+    partial file. Progress moves from 60 to 100 with the audio position;
+    DB writes are throttled by QTUBE_TRANSCRIPTION_PROGRESS_INTERVAL and go
+    through the write batcher when it is enabled. Every
+    QTUBE_TRANSCRIPTION_CHECKPOINT_INTERVAL seconds the file is fsynced and
+    the covered audio offset saved, and ``resume_bytes`` continues a file
+    cut back to such a checkpoint.
+    """
+    transcript_path = _transcript_path(job)
+    update_job_status(session, job, JobStatus.transcribing, transcript_path=transcript_path)
+    session.commit()
+
+    last_progress = job.progress or 60.0
+    last_write = last_checkpoint = time.monotonic()
+    checkpoint_interval = settings.transcription_checkpoint_interval
+    wrote_text = resume_bytes > 0
+    batcher = get_write_batcher()
+    if resume_bytes:
+        os.truncate(transcript_path, resume_bytes)
+    with open(transcript_path, "ab" if resume_bytes else "wb") as handle:
+        for segment in segments:
+            text = segment.text if wrote_text else segment.text.lstrip()
+            if text:
+                handle.write(text.encode("utf-8"))
+                handle.flush()
+                wrote_text = True
+
+            now = time.monotonic()
+            if checkpoint_interval > 0 and now - last_checkpoint >= checkpoint_interval:
+                _checkpoint(session, job, handle, segment.end)
+                last_checkpoint = now
+
+            if not duration:
+                continue
+            progress = 60.0 + 40.0 * min(1.0, segment.end / duration)
+            if (
+                progress - last_progress >= 1.0
+                and now - last_write >= settings.transcription_progress_interval
+            ):
+                if batcher is not None:
+                    batcher.set_progress(job, progress, JobStatus.transcribing)
+                else:
+                    update_job_status(session, job, JobStatus.transcribing, progress=progress)
+                    session.commit()
+                last_progress = progress
+                last_write = now
+    return transcript_path
+
+
+def _fail_job(session, job: Job, exc: Exception) -> None:
+    logger.error("Transcription failed for %s: %s", job.id, exc)
+    update_job_status(session, job, JobStatus.failed, error=str(exc))
+    add_job_event(session, job.id, "failed", f"Transcription failed: {exc}")
+    session.commit()
+    if job.batch_id:
+        update_batch_status(session, job.batch_id)
+        session.commit()
+
+
+def _claim_batch_peers(session, first_job: Job) -> list[Job]:
+    """Claim up to transcription_batch_size - 1 other downloaded jobs for the same model.
+
+    Polls for ready jobs until the batch is full or the max wait elapses.
+    Claimed jobs still have their own task on transcription_queue; those
+    tasks find the job already claimed and exit without doing any work, so
+    each peer records its leader for :func:`_release_batch_peers`.
+    """
+    model_name, compute_type = _job_model(first_job)
+    first_job_id = first_job.id
+    wanted = settings.transcription_batch_size - 1
+    deadline = time.monotonic() + settings.transcription_batch_max_wait
+    seen = {first_job_id}
+    peers: list[Job] = []
+    while True:
+        candidates = session.scalars(
+            select(Job)
+            .where(
+                Job.status == JobStatus.downloaded,
+                Job.download_path.is_not(None),
+                Job.id.not_in(seen),
+                func.coalesce(Job.whisper_model, settings.whisper_model) == model_name,
+                func.coalesce(Job.compute_type, settings.transcription_compute_type)
+                == compute_type,
+            )
+            .order_by(Job.updated_at.asc())
+            .limit(wanted - len(peers))
+        ).all()
+        for candidate in candidates:
+            seen.add(candidate.id)
+            if _is_batchable(candidate) and claim_job(
+                session, candidate.id, JobStatus.downloaded, JobStatus.transcribing
+            ):
+                candidate.batch_leader_id = first_job_id
+                peers.append(candidate)
+        session.commit()
+        if len(peers) >= wanted or time.monotonic() >= deadline:
+            return peers
+        time.sleep(0.25)
 
 
-@celery_app.task(bind=True, name="app.transcription_processor.transcribe_video")
+def _release_batch_peers(session, leader: Job) -> None:
+    """Requeue jobs the leader claimed whose batch never finished them.
+
+    Their own tasks already exited, so each is put back to downloaded and
+    gets a new transcription task.
+    """
+    peers = session.scalars(
+        select(Job).where(
+            Job.batch_leader_id == leader.id, Job.status == JobStatus.transcribing
+        )
+    ).all()
+    for peer in peers:
+        peer.batch_leader_id = None
+        update_job_status(session, peer, JobStatus.downloaded, progress=50.0)
+        add_job_event(
+            session, peer.id, "downloaded", "Requeued after its batch was interrupted", 50.0
+        )
+    session.commit()
+    for peer in peers:
+        logger.info("Requeueing job %s from the interrupted batch of %s", peer.id, leader.id)
+        transcribe_video.apply_async(args=[peer.id], queue="transcription_queue")
+
+
+def _transcribe_batch(transcriber: WhisperTranscriber, session, first_job: Job) -> None:
+    try:
+        _run_batch(transcriber, session, first_job)
+    except Exception:
+        session.rollback()
+        _release_batch_peers(session, first_job)
+        raise
+
+
+def _run_batch(transcriber: WhisperTranscriber, session, first_job: Job) -> None:
+    jobs = [first_job, *_claim_batch_peers(session, first_job)]
+    for job in jobs:
+        _record_model(job, transcriber)
+        update_job_status(session, job, JobStatus.transcribing, progress=60.0)
+        add_job_event(
+            session,
+            job.id,
+            "transcribing",
+            f"Transcription started (batch of {len(jobs)})",
+            60.0,
+        )
+    session.commit()
+
+    ready: list[Job] = []
+    audios = []
+    for job in jobs:
+        try:
+            audio, job.decode_seconds = _decode(transcriber, Path(job.download_path))
+        except Exception as exc:
+            _fail_job(session, job, exc)
+            continue
+        audios.append(audio)
+        ready.append(job)
+    if not ready:
+        return
+
+    started = time.perf_counter()
+    try:
+        transcriptions = transcriber.transcribe_batch(audios)
+    except Exception as exc:
+        for job in ready:
+            _fail_job(session, job, exc)
+        return
+    inference_seconds = time.perf_counter() - started
+
+    for job, transcription in zip(ready, transcriptions):
+        try:
+            transcript_path = _transcript_path(job)
+            with open(transcript_path, "w", encoding="utf-8") as handle:
+                handle.write(transcription)
+            job.inference_seconds = inference_seconds
+            _log_timings(job)
+            _complete_job(session, job, transcript_path)
+        except Exception as exc:
+            session.rollback()
+            _fail_job(session, job, exc)
+
+
+def _transcribe_single(transcriber: WhisperTranscriber, session, job: Job) -> None:
+    audio_file = Path(job.download_path)
+    chunked = _use_chunked_mode(audio_file)
+    resume_from, resume_bytes = _resume_point(job)
+    message = "Transcription started (chunked)" if chunked else "Transcription started"
+    if resume_from:
+        message = f"Transcription resumed at {resume_from:.0f}s" + (" (chunked)" if chunked else "")
+    _record_model(job, transcriber)
+    progress = job.progress if resume_from else 60.0
+    update_job_status(session, job, JobStatus.transcribing, progress=progress)
+    add_job_event(session, job.id, "transcribing", message, progress)
+    session.commit()
+
+    try:
+        audio, job.decode_seconds = _decode(transcriber, audio_file)
+        started = time.perf_counter()
+        if resume_from * SAMPLE_RATE >= audio.shape[0]:
+            segments, duration = iter(()), resume_from
+        elif chunked:
+            segments, duration = transcriber.iter_segments_chunked(
+                audio_file, audio=audio, start=resume_from
+            )
+        else:
+            segments, duration = transcriber.iter_segments(
+                audio_file, audio=audio, start=resume_from
+            )
+        transcript_path = _stream_transcript(session, job, segments, duration, resume_bytes)
+        job.inference_seconds = time.perf_counter() - started
+        _log_timings(job)
+        _complete_job(session, job, transcript_path)
+    except Exception as exc:
+        _fail_job(session, job, exc)
+
+
+@celery_app.task(
+    bind=True,
+    name="app.transcription_processor.transcribe_video",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 def transcribe_video(self, job_id: str) -> None:
-    """Transcribe the downloaded video for a job."""
+    """Transcribe the downloaded video for a job.
+
+    Acked only once it returns, so a worker that is killed mid-job has the
+    task redelivered, and the redelivery resumes from the last checkpoint.
+    """
     with db.SessionLocal() as session:
         job = session.get(Job, job_id)
         if not job:
@@ -40,60 +430,89 @@ def transcribe_video(self, job_id: str) -> None:
             session.commit()
             return
 
-        update_job_status(session, job, JobStatus.transcribing, progress=60.0)
-        add_job_event(session, job.id, "transcribing", "Transcription started", 60.0)
-        session.commit()
-
-        try:
-            transcription = self.transcriber.transcribe_audio(Path(job.download_path))
-            transcript_path = f"{job.download_path}.txt"
-            with open(transcript_path, "w") as handle:
-                handle.write(transcription)
+        redelivered = bool((self.request.delivery_info or {}).get("redelivered"))
+        if redelivered:
+            # Peers this task had claimed for a batch lost their own tasks.
+            _release_batch_peers(session, job)
+        if redelivered and job.status in (JobStatus.completed, JobStatus.canceled):
+            logger.info("Job %s is already %s", job_id, job.status.value)
+            return
 
-            update_job_status(
-                session, job, JobStatus.completed, progress=100.0, transcript_path=transcript_path
-            )
-            add_job_event(session, job.id, "completed", "Transcription completed", 100.0)
-            session.commit()
-            if job.batch_id:
-                update_batch_status(session, job.batch_id)
+        if _batching_enabled():
+            if claim_job(session, job.id, JobStatus.downloaded, JobStatus.transcribing):
                 session.commit()
+                batchable = _is_batchable(job)
+            elif redelivered and job.status == JobStatus.transcribing:
+                # Claimed by this task before its worker died: resume it on its own.
+                batchable = False
+            else:
+                logger.info("Job %s already claimed by another batch", job_id)
+                return
+        else:
+            batchable = False
+
+        _prefetch_upcoming(session, job)
+        try:
+            with get_model_registry().acquire(*_job_model(job)) as transcriber:
+                if batchable:
+                    _transcribe_batch(transcriber, session, job)
+                else:
+                    _transcribe_single(transcriber, session, job)
         except Exception as exc:
-            logger.error("Transcription failed for %s: %s", job_id, exc)
-            update_job_status(session, job, JobStatus.failed, error=str(exc))
-            add_job_event(session, job.id, "failed", f"Transcription failed: {exc}")
-            session.commit()
-            if job.batch_id:
-                update_batch_status(session, job.batch_id)
-                session.commit()
+            # The helpers fail their own jobs on transcription errors; this is a failed model load.
+            _fail_job(session, job, exc)
 
 
 def find_untranscribed_videos(directory: Path) -> list[Path]:
-    """Find mp4 files with no matching txt transcript."""
-    untranscribed = []
-    for video_path in directory.glob("**/*.mp4"):
-        txt_path = video_path.with_name(video_path.name + ".txt")
-        if not txt_path.exists():
-            untranscribed.append(video_path)
-    return untranscribed
+    """Find audio/video files with no matching txt transcript."""
+    return MediaScanner(directory).scan()
+
+
+def _dispatch_transcriptions(job_ids: list[str]) -> None:
+    """Publish one page of transcription tasks as a single Celery group."""
+    if not job_ids:
+        return
+    group(transcribe_video.si(job_id) for job_id in job_ids).apply_async(
+        queue="transcription_queue"
+    )
+
+
+def import_local_files(paths: Sequence[str]) -> int:
+    """Create and dispatch transcription jobs for files that no job owns yet.
+
+    Existing paths are filtered out in bulk against the download_path index,
+    and the rest are inserted and dispatched a page at a time.
+    """
+    queued = 0
+    with db.SessionLocal() as session:
+        existing = find_existing_download_paths(session, paths)
+        pending = [path for path in paths if path not in existing]
+        page_size = max(1, settings.enqueue_page_size)
+        for start in range(0, len(pending), page_size):
+            job_ids = bulk_import_downloads(session, pending[start : start + page_size])
+            session.commit()
+            _dispatch_transcriptions(job_ids)
+            queued += len(job_ids)
+    return queued
 
 
 @celery_app.task(name="app.transcription_processor.process_untranscribed_videos")
 def process_untranscribed_videos(directory: str | None = None) -> None:
-    """Queue transcription jobs for any downloaded videos missing transcripts."""
+    """Queue transcription jobs for media added or changed since the last scan.
+
+    The scanner's manifest skips unchanged directories, and
+    :func:`import_local_files` skips files that already belong to a job.
+    """
     target_dir = Path(directory or settings.downloads_dir)
-    untranscribed = find_untranscribed_videos(target_dir)
-    logger.info("Found %s untranscribed videos", len(untranscribed))
+    scanner = MediaScanner(target_dir, Path(settings.media_scan_manifest))
+    candidates = [str(path) for path in scanner.scan()]
+    logger.info(
+        "Found %s new untranscribed files (%s directories listed, %s unchanged)",
+        len(candidates),
+        scanner.dirs_listed,
+        scanner.dirs_skipped,
+    )
 
-    with db.SessionLocal() as session:
-        for video_path in untranscribed:
-            existing = session.scalar(
-                select(Job).where(Job.download_path == str(video_path))
-            )
-            if existing:
-                continue
-            job = create_job(session, source_url="local", video_url=None)
-            update_job_status(session, job, JobStatus.downloaded, progress=50.0, download_path=str(video_path))
-            add_job_event(session, job.id, "downloaded", "Imported local download", 50.0)
-            session.commit()
-            transcribe_video.apply_async(args=[job.id], queue="transcription_queue")
+    queued = import_local_files(candidates)
+    scanner.commit()
+    logger.info("Queued %s local files for transcription", queued)
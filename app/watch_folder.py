@@ -0,0 +1,240 @@
+"""Queue transcription jobs for media as soon as it finishes arriving in a watched folder.
+
+Filesystem events come from watchdog: inotify on Linux, the native API on
+other platforms, or stat polling with ``QTUBE_WATCH_FOLDER_POLLING=true``
+(or when inotify cannot be set up, e.g. the watch limit is exhausted). A
+media file is imported once its size and mtime have not changed for
+``QTUBE_WATCH_FOLDER_SETTLE_SECONDS``::
+
+    python -m app.watch_folder [--dir downloads] [--polling]
+
+On start, the incremental manifest scan picks up files that arrived while
+the watcher was down. Files already owned by a job are skipped by
+:func:`app.transcription_processor.import_local_files`, so a restart never
+queues a file twice.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.media_scan import MediaScanner, is_media_file
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns) at the last check, and when it last changed.
+_Observation = Tuple[Optional[Tuple[int, int]], float]
+
+
+class SettleTracker:
+    """Media paths waiting for their size and mtime to stop changing."""
+
+    def __init__(
+        self,
+        settle_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        stat: Callable[[str], os.stat_result] = os.stat,
+    ) -> None:
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        self.stat = stat
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _Observation] = {}
+
+    def touch(self, path: str) -> None:
+        """Note that ``path`` changed, restarting its settle period."""
+        with self._lock:
+            self._pending[path] = (None, self.clock())
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def __contains__(self, path: object) -> bool:
+        with self._lock:
+            return path in self._pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def settled(self) -> List[str]:
+        """Remove and return paths unchanged for the settle period, dropping vanished ones."""
+        now = self.clock()
+        ready: List[str] = []
+        with self._lock:
+            for path, (signature, changed_at) in list(self._pending.items()):
+                try:
+                    stat = self.stat(path)
+                except OSError:
+                    del self._pending[path]
+                    continue
+                current = (stat.st_size, stat.st_mtime_ns)
+                if current != signature:
+                    self._pending[path] = (current, now)
+                elif now - changed_at >= self.settle_seconds:
+                    del self._pending[path]
+                    ready.append(path)
+        ready.sort()
+        return ready
+
+
+class WatchFolder:
+    """Feeds watchdog events into a :class:`SettleTracker` and imports what settles.
+
+    Paths keep the configured ``root`` prefix, so they match the
+    download_path the download worker stores for files it writes there.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        settle_seconds: float,
+        importer: Callable[[Sequence[str]], int],
+        manifest_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.root = root
+        self.importer = importer
+        self.tracker = SettleTracker(settle_seconds, clock)
+        self.queued = 0
+        self._scanner = MediaScanner(Path(root), manifest_path)
+        self._catch_up: set[str] = set()
+        self._stop = threading.Event()
+
+    def catch_up(self) -> None:
+        """Track media added or changed while the watcher was not running.
+
+        The manifest is committed only once every one of these files has
+        been imported or has gone away, so a crash in between rescans them.
+        """
+        self._catch_up = {str(path) for path in self._scanner.scan()}
+        for path in self._catch_up:
+            self.tracker.touch(path)
+        logger.info(
+            "Catch-up scan of %s found %s files (%s directories listed, %s unchanged)",
+            self.root,
+            len(self._catch_up),
+            self._scanner.dirs_listed,
+            self._scanner.dirs_skipped,
+        )
+        if not self._catch_up:
+            self._scanner.commit()
+
+    def dispatch(self, event: Any) -> None:
+        """watchdog handler entry point."""
+        if event.event_type == "deleted":
+            self.tracker.forget(event.src_path)
+            return
+        if event.event_type == "moved":
+            self.tracker.forget(event.src_path)
+            path = event.dest_path
+        elif event.event_type in ("created", "modified", "closed"):
+            path = event.src_path
+        else:
+            return
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+
+        if event.is_directory:
+            # Files created before the new directory's watch was added raise no events.
+            if event.event_type in ("created", "moved"):
+                for media in MediaScanner(Path(path)).scan():
+                    self.tracker.touch(str(media))
+        elif is_media_file(path):
+            self.tracker.touch(path)
+
+    def poll(self) -> int:
+        """Import the files that have settled. Returns how many jobs were queued."""
+        ready = [path for path in self.tracker.settled() if not os.path.exists(f"{path}.txt")]
+        queued = 0
+        if ready:
+            try:
+                queued = self.importer(ready)
+            except Exception:
+                logger.exception("Importing %s files failed; retrying", len(ready))
+                for path in ready:
+                    self.tracker.touch(path)
+                return 0
+            self.queued += queued
+            logger.info("Queued %s of %s settled files for transcription", queued, len(ready))
+
+        if self._catch_up:
+            self._catch_up = {path for path in self._catch_up if path in self.tracker}
+            if not self._catch_up:
+                self._scanner.commit()
+        return queued
+
+    def run(self, polling: bool = False, poll_interval: float = 2.0) -> None:
+        observer = _start_observer(self, self.root, polling, poll_interval)
+        try:
+            # After the observer starts, so nothing arriving during the scan is missed.
+            self.catch_up()
+            tick = max(0.2, min(1.0, self.tracker.settle_seconds / 2))
+            while not self._stop.wait(tick):
+                self.poll()
+        finally:
+            observer.stop()
+            observer.join()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def _start_observer(handler: Any, root: str, polling: bool, poll_interval: float) -> Any:
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+
+    if not polling:
+        observer = Observer()
+        try:
+            observer.schedule(handler, root, recursive=True)
+            observer.start()
+            return observer
+        except OSError as exc:
+            logger.warning("Native filesystem events unavailable (%s); polling instead", exc)
+    observer = PollingObserver(timeout=poll_interval)
+    observer.schedule(handler, root, recursive=True)
+    observer.start()
+    return observer
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Watch a folder and queue new media.")
+    parser.add_argument("--dir", default=settings.watch_folder_dir or settings.downloads_dir)
+    parser.add_argument("--polling", action="store_true", default=settings.watch_folder_polling)
+    parser.add_argument(
+        "--settle-seconds", type=float, default=settings.watch_folder_settle_seconds
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.transcription_processor import import_local_files
+
+    os.makedirs(args.dir, exist_ok=True)
+    watcher = WatchFolder(
+        args.dir,
+        args.settle_seconds,
+        import_local_files,
+        manifest_path=Path(settings.media_scan_manifest),
+    )
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: watcher.stop())
+    logger.info("Watching %s", args.dir)
+    try:
+        watcher.run(args.polling, settings.watch_folder_poll_interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
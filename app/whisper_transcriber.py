@@ -3,36 +3,258 @@
 from __future__ import annotations
 
 import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 
-from faster_whisper import WhisperModel
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 
+from app.audio_cache import get_audio_cache
+from app.audio_tools import SAMPLE_RATE, NdArray, find_silence_splits, load_audio
 from app.config import get_settings
 
 settings = get_settings()
 
 
+@dataclass
+class TranscriptSegment:
+    """A transcribed span with timestamps relative to the start of the file."""
+
+    start: float
+    end: float
+    text: str
+
+
 class WhisperTranscriber:
     """faster-whisper transcriber."""
 
-    def __init__(self, model: str | None = None) -> None:
+    def __init__(
+        self,
+        model: str | None = None,
+        num_workers: int = 1,
+        compute_type: str | None = None,
+        cpu_threads: int = 0,
+    ) -> None:
         model_name = model or settings.whisper_model
+        self.model_name = model_name
         self.device = settings.transcription_device
-        self.compute_type = settings.transcription_compute_type
+        self.compute_type = compute_type or settings.transcription_compute_type
+        self.num_workers = max(1, num_workers)
+        self.cpu_threads = max(0, cpu_threads)
+        self.beam_size = settings.transcription_beam_size
 
         print(f"Loading faster-whisper model '{model_name}' on {self.device}")
         self.model = WhisperModel(
             model_name,
             device=self.device,
             compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
         )
         print(f"Model loaded successfully on {self.device}")
+        self._batched_pipeline: BatchedInferencePipeline | None = None
 
     def transcribe_audio(self, audio_file: Path) -> str:
         """Transcribe audio from a file."""
         start_time = time.time()
-        segments, _info = self.model.transcribe(str(audio_file))
+        segments, _info = self.model.transcribe(str(audio_file), beam_size=self.beam_size)
         transcription_text = "".join(segment.text for segment in segments).strip()
         elapsed_time = time.time() - start_time
         print(f"Transcription completed in {elapsed_time:.2f} seconds")
         return transcription_text
+
+    def load_audio(self, audio_file: Path) -> NdArray:
+        """Decode a file to 16 kHz float PCM, going through the decoded-audio cache."""
+        cache = get_audio_cache()
+        if cache is None:
+            return load_audio(audio_file)
+        return cache.load(audio_file)
+
+    def iter_segments(
+        self, audio_file: Path, audio: NdArray | None = None, start: float = 0.0
+    ) -> tuple[Iterator[TranscriptSegment], float]:
+        """Return a lazy segment stream for a file and the audio duration in seconds.
+
+        ``audio`` is the file's already decoded PCM, when the caller has it.
+        A ``start`` offset in seconds skips the audio before it, as when
+        resuming from a checkpoint; timestamps stay relative to the file.
+        """
+        if start > 0:
+            if audio is None:
+                audio = self.load_audio(audio_file)
+            audio = audio[int(start * SAMPLE_RATE) :]
+        if audio is not None:
+            segments, info = self.model.transcribe(audio, beam_size=self.beam_size)
+        elif get_audio_cache() is None:
+            segments, info = self.model.transcribe(str(audio_file), beam_size=self.beam_size)
+        else:
+            segments, info = self.model.transcribe(
+                self.load_audio(audio_file), beam_size=self.beam_size
+            )
+        stream = (
+            TranscriptSegment(
+                start=segment.start + start, end=segment.end + start, text=segment.text
+            )
+            for segment in segments
+        )
+        return stream, start + info.duration
+
+    def iter_segments_chunked(
+        self,
+        audio_file: Path,
+        window_seconds: float | None = None,
+        workers: int | None = None,
+        audio: NdArray | None = None,
+        start: float = 0.0,
+    ) -> tuple[Iterator[TranscriptSegment], float]:
+        """Transcribe silence-delimited windows in parallel and stream the stitched segments.
+
+        Windows run on a thread pool; CTranslate2 releases the GIL during
+        generation, so with ``num_workers`` model replicas the windows are
+        decoded concurrently. Segments are yielded in timeline order as soon
+        as every earlier window has finished, with timestamps shifted back
+        onto the original file. Audio before ``start`` seconds is skipped.
+        """
+        if audio is None:
+            audio = self.load_audio(audio_file)
+        duration = audio.shape[0] / SAMPLE_RATE
+        skipped = int(start * SAMPLE_RATE)
+        audio = audio[skipped:]
+        windows = find_silence_splits(
+            audio, window_seconds or settings.transcription_chunk_seconds
+        )
+        max_workers = max(1, min(workers or self.num_workers, len(windows)))
+
+        def transcribe_window(window: tuple[int, int]) -> list[TranscriptSegment]:
+            begin, end = window
+            return self._transcribe_array(
+                audio[begin:end], offset=(skipped + begin) / SAMPLE_RATE
+            )
+
+        def stream() -> Iterator[TranscriptSegment]:
+            start_time = time.time()
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for window_segments in executor.map(transcribe_window, windows):
+                    yield from window_segments
+            elapsed_time = time.time() - start_time
+            print(
+                f"Chunked transcription of {len(windows)} windows with {max_workers} workers "
+                f"completed in {elapsed_time:.2f} seconds"
+            )
+
+        return stream(), duration
+
+    def transcribe_audio_chunked(
+        self,
+        audio_file: Path,
+        window_seconds: float | None = None,
+        workers: int | None = None,
+    ) -> str:
+        """Transcribe a long file in parallel windows and return the joined text."""
+        segments, _duration = self.iter_segments_chunked(audio_file, window_seconds, workers)
+        return "".join(segment.text for segment in segments).strip()
+
+    def transcribe_batch(self, audios: list[NdArray]) -> list[str]:
+        """Transcribe several short clips through one batched inference pass.
+
+        Each clip is cut into speech windows of at most one Whisper chunk, the
+        clips are laid end to end with a second of silence between them, and
+        all windows go through the batched pipeline together. Segments are
+        mapped back to the clip that owns their start time. Multilingual
+        models detect the language per clip and run one pass per language.
+        """
+        if self._batched_pipeline is None:
+            self._batched_pipeline = BatchedInferencePipeline(model=self.model)
+
+        groups: dict[str | None, list[int]] = {}
+        for index, audio in enumerate(audios):
+            language = None
+            if self.model.model.is_multilingual and audio.size:
+                language, _probability, _all = self.model.detect_language(audio=audio)
+            groups.setdefault(language, []).append(index)
+
+        texts: list[list[str]] = [[] for _ in audios]
+        start_time = time.time()
+        for language, indexes in groups.items():
+            self._transcribe_group(audios, indexes, language, texts)
+        elapsed_time = time.time() - start_time
+        print(
+            f"Batched transcription of {len(audios)} clips completed in {elapsed_time:.2f} seconds"
+        )
+        return ["".join(parts).strip() for parts in texts]
+
+    def _transcribe_group(
+        self,
+        audios: list[NdArray],
+        indexes: list[int],
+        language: str | None,
+        texts: list[list[str]],
+    ) -> None:
+        chunk_length = self.model.feature_extractor.chunk_length
+        max_samples = chunk_length * SAMPLE_RATE
+        vad_options = VadOptions(max_speech_duration_s=chunk_length, min_silence_duration_ms=160)
+        gap = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+        pieces: list[NdArray] = []
+        clips: list[dict[str, float]] = []
+        clip_starts: list[float] = []
+        clip_owners: list[int] = []
+        cursor = 0
+        for index in indexes:
+            audio = audios[index]
+            speech = get_speech_timestamps(audio, vad_options) if audio.size else []
+            for start, end in _merge_speech_windows(speech, max_samples):
+                clips.append(
+                    {"start": (cursor + start) / SAMPLE_RATE, "end": (cursor + end) / SAMPLE_RATE}
+                )
+                clip_starts.append((cursor + start) / SAMPLE_RATE)
+                clip_owners.append(index)
+            pieces.extend((audio, gap))
+            cursor += audio.shape[0] + gap.shape[0]
+
+        if not clips:
+            return
+
+        segments, _info = self._batched_pipeline.transcribe(
+            np.concatenate(pieces),
+            language=language,
+            clip_timestamps=clips,
+            batch_size=settings.transcription_inference_batch_size,
+            beam_size=self.beam_size,
+        )
+        for segment in segments:
+            position = max(0, bisect_right(clip_starts, segment.start + 1e-3) - 1)
+            texts[clip_owners[position]].append(segment.text)
+
+    def _transcribe_array(self, audio: NdArray, offset: float = 0.0) -> list[TranscriptSegment]:
+        segments, _info = self.model.transcribe(audio, beam_size=self.beam_size)
+        return [
+            TranscriptSegment(
+                start=segment.start + offset,
+                end=segment.end + offset,
+                text=segment.text,
+            )
+            for segment in segments
+        ]
+
+
+def _merge_speech_windows(speech: list[dict], max_samples: int) -> list[tuple[int, int]]:
+    """Greedily merge VAD speech spans into windows no longer than max_samples.
+
+    A span longer than max_samples is split into consecutive windows.
+    """
+    windows: list[tuple[int, int]] = []
+    for span in speech:
+        start, end = int(span["start"]), int(span["end"])
+        if windows and end - windows[-1][0] <= max_samples:
+            windows[-1] = (windows[-1][0], end)
+            continue
+        while end - start > max_samples:
+            windows.append((start, start + max_samples))
+            start += max_samples
+        windows.append((start, end))
+    return windows
@@ -0,0 +1,142 @@
+"""Optional single-writer queue that groups job progress writes into one transaction."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+
+from app import db
+from app.config import get_settings
+from app.events import queue_notification
+from app.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBatcher:
+    """Collects job progress updates and commits them together.
+
+    SQLite allows one writer at a time, so many tiny transactions from several
+    processes mostly wait on each other. A batcher funnels a process's
+    fire-and-forget progress writes through one background thread: updates
+    for the same job collapse to the latest value before a single
+    executemany UPDATE. Job events are written with the status change they
+    describe, so they keep their order and are not batched.
+    """
+
+    def __init__(self, interval: float, max_pending: int) -> None:
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flushes = 0
+        self._progress: Dict[str, Tuple[float, JobStatus, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_progress(
+        self, job: Job, progress: float, status: Optional[JobStatus] = None
+    ) -> None:
+        """Queue a progress write that only applies while the job is still in ``status``."""
+        with self._lock:
+            self._progress[job.id] = (progress, status or job.status, job.batch_id)
+            full = len(self._progress) >= self.max_pending
+        self._started()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write everything queued so far in one transaction; returns the rows written."""
+        with self._lock:
+            progress, self._progress = self._progress, {}
+        if not progress:
+            return 0
+        try:
+            self._write(progress)
+        except Exception:
+            # Requeue so the next flush retries; newer progress queued meanwhile wins.
+            with self._lock:
+                self._progress = {**progress, **self._progress}
+            raise
+        self.flushes += 1
+        return len(progress)
+
+    def _write(self, progress: Dict[str, Tuple[float, JobStatus, Optional[str]]]) -> None:
+        now = datetime.utcnow()
+        table = Job.__table__
+        with db.SessionLocal() as session:
+            session.connection().execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam("b_id"),
+                    table.c.status == bindparam("b_status"),
+                    table.c.progress < bindparam("b_progress"),
+                )
+                .values(progress=bindparam("b_progress"), updated_at=bindparam("b_now")),
+                [
+                    {"b_id": job_id, "b_progress": value, "b_status": status, "b_now": now}
+                    for job_id, (value, status, _) in progress.items()
+                ],
+            )
+            for job_id, (value, status, batch_id) in progress.items():
+                queue_notification(
+                    session,
+                    "job",
+                    {
+                        "job_id": job_id,
+                        "batch_id": batch_id,
+                        "status": status.value,
+                        "progress": value,
+                    },
+                )
+            session.commit()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def _started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.warning("Batched write failed: %s", exc)
+
+
+@lru_cache
+def _batcher_for(pid: int) -> WriteBatcher:
+    settings = get_settings()
+    batcher = WriteBatcher(settings.write_batch_interval, settings.write_batch_max_pending)
+    atexit.register(batcher.close)
+    return batcher
+
+
+def get_write_batcher() -> Optional[WriteBatcher]:
+    """Return this process's batcher, or None when write batching is disabled.
+
+    Keyed by pid so a forked Celery child never shares its parent's thread.
+    """
+    if not get_settings().write_batching_enabled:
+        return None
+    return _batcher_for(os.getpid())
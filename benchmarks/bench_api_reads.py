@@ -0,0 +1,148 @@
+"""Load-test the read endpoints with the sync (threadpool) and async database paths.
+
+Starts the API under uvicorn once per mode against the same seeded SQLite
+file, then drives it with many concurrent polling clients while a separate
+client probes /health. Needs no Redis or network access:
+
+    python benchmarks/bench_api_reads.py --clients 200 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _environment(database_url: str, async_enabled: bool) -> dict:
+    return {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "QTUBE_DATABASE_URL": database_url,
+        "QTUBE_REDIS_URL": "memory://",
+        "QTUBE_EVENT_STREAM_ENABLED": "false",
+        "QTUBE_LIVE_PROGRESS_ENABLED": "false",
+        "QTUBE_INFO_CACHE_REDIS_ENABLED": "false",
+        "QTUBE_ASYNC_DB_ENABLED": "true" if async_enabled else "false",
+    }
+
+
+def _seed(database_url: str, jobs: int, events_per_job: int) -> None:
+    code = f"""
+from app import db
+from app.services.jobs import add_job_event, bulk_create_jobs, create_batch
+db.init_db()
+with db.SessionLocal() as session:
+    batch = create_batch(session, "bench")
+    rows = bulk_create_jobs(
+        session, [{{"source_url": "bench", "batch_id": batch.id}} for _ in range({jobs})]
+    )
+    for row in rows:
+        for index in range({events_per_job}):
+            add_job_event(session, row["id"], "bench", f"event {{index}}", float(index))
+    session.commit()
+"""
+    subprocess.run(
+        [sys.executable, "-c", code], env=_environment(database_url, False), check=True
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+
+async def _drive(base_url: str, clients: int, seconds: float) -> tuple[list, list, int]:
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        job_ids = [job["id"] for job in (await http.get("/jobs?limit=50")).json()["jobs"]]
+        reads: list[float] = []
+        health: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + seconds
+
+        async def poller(index: int) -> None:
+            nonlocal errors
+            job_id = job_ids[index % len(job_ids)]
+            paths = ["/jobs?limit=50", f"/jobs/{job_id}", f"/jobs/{job_id}/events", "/batches"]
+            step = 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await http.get(paths[step % len(paths)])
+                reads.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+                step += 1
+
+        async def prober() -> None:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await http.get("/health")
+                health.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(prober(), *(poller(index) for index in range(clients)))
+        return reads, health, errors
+
+
+def run_mode(database_url: str, async_enabled: bool, clients: int, seconds: float) -> None:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(port), "--log-level",
+         "warning"],
+        env=_environment(database_url, async_enabled),
+        cwd=ROOT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        reads, health, errors = asyncio.run(_drive(base_url, clients, seconds))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    label = "async" if async_enabled else "sync"
+    print(
+        f"{label:<6} {len(reads) / seconds:8.1f} req/s"
+        f"  reads p50 {_percentile(reads, 0.5):7.1f}ms p99 {_percentile(reads, 0.99):7.1f}ms"
+        f"  /health p99 {_percentile(health, 0.99):7.1f}ms  errors {errors}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--events-per-job", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{tempfile.mkdtemp(prefix='qtube-bench-')}/bench.db"
+    _seed(database_url, args.jobs, args.events_per_job)
+    print(f"{args.clients} polling clients for {args.seconds:.0f}s, {args.jobs} jobs")
+    for async_enabled in (False, True):
+        run_mode(database_url, async_enabled, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure API cold start: import time, peak RSS and heavy modules loaded.
+
+Each sample imports ``app.api`` and builds the app in a fresh interpreter.
+``--eager`` also imports the modules the API used to pull in at import time
+(the task modules, yt-dlp and faster-whisper), for a before/after comparison:
+
+    python benchmarks/bench_api_startup.py --runs 5 --eager
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("yt_dlp", "faster_whisper", "ctranslate2", "numpy", "app.transcription_processor")
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app.api
+app.api.create_app()
+for name in {eager!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+_EAGER_IMPORTS = (
+    "app.download_processor",
+    "app.transcription_processor",
+    "app.whisper_transcriber",
+)
+
+
+def sample(eager: bool) -> dict:
+    code = _PROBE.format(eager=_EAGER_IMPORTS if eager else (), heavy=HEAVY_MODULES)
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "QTUBE_REDIS_URL": "memory://",
+        "QTUBE_EVENT_STREAM_ENABLED": "false",
+        "QTUBE_LIVE_PROGRESS_ENABLED": "false",
+        "QTUBE_INFO_CACHE_REDIS_ENABLED": "false",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label: str, samples: list[dict]) -> None:
+    seconds = statistics.median(item["seconds"] for item in samples) * 1000
+    rss = statistics.median(item["max_rss_mb"] for item in samples)
+    heavy = ", ".join(samples[-1]["heavy"]) or "none"
+    print(f"{label:<6} import+create_app {seconds:7.1f}ms  max RSS {rss:6.1f}MB  heavy: {heavy}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="also measure the eager import set")
+    args = parser.parse_args()
+
+    report("lazy", [sample(False) for _ in range(args.runs)])
+    if args.eager:
+        report("eager", [sample(True) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Benchmark media downloads against a local HTTP stand-in, with no network access.
+
+Serves a synthetic progressive file (with Range support) and an HLS playlist
+of the same bytes split into fragments, optionally throttled per connection
+the way CDNs cap single streams. Each is downloaded with yt-dlp using the
+options ``download_video`` passes, for every fragment-concurrency and
+HTTP-chunk-size combination:
+
+    python benchmarks/bench_downloads.py --size-mb 32 --throttle-kbps 4096 \\
+        --fragments 1 4 8 --chunk-mb 0 4
+
+Finally a progressive download is cut off halfway and retried, to show how
+many bytes the resumed attempt fetches again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+os.environ.setdefault("QTUBE_REDIS_URL", "memory://")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+
+from app.download_processor import TransferMeter, _transfer_params, settings  # noqa: E402
+
+_BLOCK = 64 * 1024
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, payload: bytes, segments: int, throttle: int) -> None:
+        super().__init__(("127.0.0.1", 0), MediaHandler)
+        self.payload = payload
+        self.segments = segments
+        self.throttle = throttle
+        self.abort_at: int | None = None
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def segment(self, index: int) -> bytes:
+        size = -(-len(self.payload) // self.segments)
+        return self.payload[index * size : (index + 1) * size]
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MediaServer
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path == "/video.mp4":
+            self._send_range(self.server.payload, "video/mp4")
+        elif self.path == "/hls/index.m3u8":
+            lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2"]
+            for index in range(self.server.segments):
+                lines += ["#EXTINF:2.0,", f"seg{index}.ts"]
+            lines.append("#EXT-X-ENDLIST")
+            self._send(200, "\n".join(lines).encode(), "application/vnd.apple.mpegurl")
+        elif match := re.fullmatch(r"/hls/seg(\d+)\.ts", self.path):
+            self._send(200, self.server.segment(int(match.group(1))), "video/mp2t")
+        else:
+            self._send(404, b"", "text/plain")
+
+    def _send_range(self, payload: bytes, content_type: str) -> None:
+        match = _RANGE.fullmatch(self.headers.get("Range", ""))
+        if not match:
+            self._send(200, payload, content_type)
+            return
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(payload) - 1), len(payload) - 1)
+        if start >= len(payload):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(payload)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(
+            206,
+            payload[start : end + 1],
+            content_type,
+            {"Content-Range": f"bytes {start}-{end}/{len(payload)}"},
+        )
+
+    def _send(self, status: int, body: bytes, content_type: str, headers=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        started = time.perf_counter()
+        sent = 0
+        try:
+            for offset in range(0, len(body), _BLOCK):
+                block = body[offset : offset + _BLOCK]
+                with self.server.lock:
+                    abort_at = self.server.abort_at
+                    if abort_at is not None and self.server.bytes_sent + len(block) > abort_at:
+                        self.server.abort_at = None
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    self.server.bytes_sent += len(block)
+                self.wfile.write(block)
+                sent += len(block)
+                if self.server.throttle:
+                    ahead = sent / self.server.throttle - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _info(url: str, protocol: str) -> dict:
+    return {
+        "id": "bench",
+        "title": "bench",
+        "ext": "mp4",
+        "url": url,
+        "protocol": protocol,
+        "extractor": "bench",
+        "extractor_key": "Bench",
+        "webpage_url": url,
+    }
+
+
+def download(info: dict, output_dir: Path, retries: int = 3) -> TransferMeter:
+    meter = TransferMeter()
+    params = {
+        **_transfer_params(),
+        "outtmpl": f"{output_dir}/%(title)s.%(ext)s",
+        "progress_hooks": [meter.observe],
+        "retries": retries,
+        "fragment_retries": retries,
+        "fixup": "never",
+        "quiet": True,
+        "noprogress": True,
+    }
+    with YoutubeDL(params) as ydl:
+        ydl.process_ie_result(dict(info), download=True)
+    return meter
+
+
+def run_grid(server: MediaServer, args) -> None:
+    size_mb = len(server.payload) / 1024**2
+    print(f"{'source':<12}{'fragments':>10}{'chunk MB':>10}{'seconds':>10}{'MB/s':>10}")
+    for source, info in (
+        ("progressive", _info(f"{server.base_url}/video.mp4", "http")),
+        ("hls", _info(f"{server.base_url}/hls/index.m3u8", "m3u8_native")),
+    ):
+        for fragments in args.fragments:
+            for chunk_mb in args.chunk_mb:
+                if source == "hls" and chunk_mb != args.chunk_mb[0]:
+                    continue  # HTTP chunking only applies to progressive downloads.
+                settings.download_concurrent_fragments = fragments
+                settings.download_http_chunk_size = int(chunk_mb * 1024**2)
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    started = time.perf_counter()
+                    download(info, Path(tmp_dir))
+                    elapsed = time.perf_counter() - started
+                print(
+                    f"{source:<12}{fragments:>10}{chunk_mb:>10g}{elapsed:>10.2f}"
+                    f"{size_mb / elapsed:>10.1f}"
+                )
+
+
+def run_resume(server: MediaServer) -> None:
+    settings.download_http_chunk_size = 0
+    info = _info(f"{server.base_url}/video.mp4", "http")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server.abort_at = server.bytes_sent + len(server.payload) // 2
+        try:
+            download(info, Path(tmp_dir), retries=0)
+        except Exception as exc:
+            print(f"first attempt cut off: {type(exc).__name__}")
+        before = server.bytes_sent
+        download(info, Path(tmp_dir), retries=0)
+        refetched = server.bytes_sent - before
+        written = (Path(tmp_dir) / "bench.mp4").stat().st_size
+    print(
+        f"resumed attempt fetched {refetched / 1024**2:.1f} MB of "
+        f"{len(server.payload) / 1024**2:.1f} MB (file size {written / 1024**2:.1f} MB)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=32.0)
+    parser.add_argument("--segments", type=int, default=32, help="HLS fragments")
+    parser.add_argument("--throttle-kbps", type=int, default=4096, help="per connection; 0 = off")
+    parser.add_argument("--fragments", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--chunk-mb", nargs="+", type=float, default=[0, 4])
+    args = parser.parse_args()
+
+    server = MediaServer(
+        os.urandom(int(args.size_mb * 1024**2)), args.segments, args.throttle_kbps * 1024
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run_grid(server, args)
+        run_resume(server)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark enqueue throughput: per-entry commits vs bulk insert + grouped dispatch.
+
+Runs against a throwaway SQLite file and Celery's in-memory broker, so it
+needs no Redis or network access:
+
+    python benchmarks/bench_enqueue.py --entries 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="qtube-bench-")
+os.environ.setdefault("QTUBE_DATABASE_URL", f"sqlite:///{_TMP}/bench.db")
+os.environ.setdefault("QTUBE_REDIS_URL", "memory://")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import db  # noqa: E402
+from app.celery_app import celery_app  # noqa: E402
+from app.download_processor import _enqueue_page, _pages, download_video  # noqa: E402
+from app.services.jobs import add_job_event, create_batch, create_job  # noqa: E402
+
+celery_app.conf.update(broker_url="memory://", result_backend="cache+memory://")
+
+
+def _entries(count: int) -> list[dict]:
+    return [{"id": f"vid{index:06d}", "title": f"Video {index}"} for index in range(count)]
+
+
+def _url(entry: dict) -> str:
+    return f"https://www.youtube.com/watch?v={entry['id']}"
+
+
+def legacy_enqueue(batch_id: str, entries: list[dict], output_dir: Path) -> None:
+    """The pre-bulk path: flush, event, commit and publish once per entry."""
+    with db.SessionLocal() as session:
+        for entry in entries:
+            job = create_job(
+                session,
+                source_url="bench",
+                batch_id=batch_id,
+                video_url=_url(entry),
+                video_id=entry["id"],
+                title=entry["title"],
+            )
+            add_job_event(session, job.id, "queued", "Queued for download", 0.0)
+            session.commit()
+            download_video.apply_async(
+                args=[job.id, _url(entry), str(output_dir)], queue="download_queue"
+            )
+
+
+def bulk_enqueue(batch_id: str, entries: list[dict], output_dir: Path, page_size: int) -> None:
+    with db.SessionLocal() as session:
+        for page in _pages(entries, page_size):
+            _enqueue_page(
+                session,
+                batch_id,
+                "bench",
+                [(_url(entry), entry) for entry in page],
+                "bench",
+                output_dir,
+                requested_format=None,
+                audio_only=False,
+                force=True,
+                whisper_model="base.en",
+                compute_type="int8",
+            )
+
+
+def _run(label: str, func, *args) -> float:
+    with db.SessionLocal() as session:
+        batch = create_batch(session, "bench")
+        session.commit()
+        batch_id = batch.id
+    started = time.perf_counter()
+    func(batch_id, *args)
+    elapsed = time.perf_counter() - started
+    count = len(args[0])
+    print(f"{label:<8} {count:>6} entries in {elapsed:7.2f}s  -> {count / elapsed:9.1f} entries/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    db.init_db()
+    entries = _entries(args.entries)
+    output_dir = Path(_TMP) / "downloads"
+    print(f"database: {db.engine.url}")
+    before = _run("legacy", legacy_enqueue, entries, output_dir)
+    after = _run("bulk", bulk_enqueue, entries, output_dir, args.page_size)
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark SQLite write contention: N worker processes writing job progress at once.
+
+Each profile runs in fresh processes against its own throwaway database, so
+settings are read exactly as a deployed worker would read them:
+
+    python benchmarks/bench_sqlite_contention.py --workers 4 --updates 500
+
+Profiles:
+  legacy    rollback journal, 5s lock timeout, one commit per progress update
+  wal       WAL + synchronous=NORMAL + busy_timeout + mmap, one commit per update
+  batched   the WAL profile with updates collapsed by the per-process write batcher
+
+Batched updates to the same job collapse to the latest value, so that profile
+writes fewer rows for the same work; the final progress of every job is checked.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROFILES = {
+    "legacy": {
+        "QTUBE_SQLITE_WAL": "false",
+        "QTUBE_SQLITE_BUSY_TIMEOUT_MS": "5000",
+        "QTUBE_SQLITE_MMAP_SIZE": "0",
+        "QTUBE_WRITE_BATCHING_ENABLED": "false",
+    },
+    "wal": {"QTUBE_SQLITE_WAL": "true", "QTUBE_WRITE_BATCHING_ENABLED": "false"},
+    "batched": {"QTUBE_SQLITE_WAL": "true", "QTUBE_WRITE_BATCHING_ENABLED": "true"},
+}
+
+
+def _configure(database_url: str, profile: str) -> None:
+    os.environ["QTUBE_DATABASE_URL"] = database_url
+    os.environ["QTUBE_REDIS_URL"] = "memory://"
+    os.environ["QTUBE_EVENT_STREAM_ENABLED"] = "false"
+    os.environ.update(PROFILES[profile])
+    sys.path.insert(0, str(ROOT))
+
+
+def _prepare(database_url: str, profile: str, workers: int) -> list[str]:
+    _configure(database_url, profile)
+    from app import db
+    from app.services.jobs import create_job
+
+    db.init_db()
+    with db.SessionLocal() as session:
+        job_ids = [create_job(session, "bench").id for _ in range(workers)]
+        session.commit()
+    return job_ids
+
+
+def _worker(database_url: str, profile: str, job_id: str, updates: int, start_at: float):
+    _configure(database_url, profile)
+    from sqlalchemy.exc import OperationalError
+
+    from app import db
+    from app.models import Job
+    from app.services.jobs import notify_job
+    from app.write_queue import get_write_batcher
+
+    batcher = get_write_batcher()
+    with db.SessionLocal() as session:
+        job = session.get(Job, job_id)
+        session.expunge(job)
+    errors = 0
+    latencies = []
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.perf_counter()
+    for index in range(1, updates + 1):
+        began = time.perf_counter()
+        progress = 100.0 * index / updates
+        if batcher is not None:
+            batcher.set_progress(job, progress)
+        else:
+            # What _persist_progress does when write batching is off.
+            with db.SessionLocal() as session:
+                try:
+                    row = session.get(Job, job_id)
+                    row.progress = progress
+                    notify_job(session, row)
+                    session.commit()
+                except OperationalError:
+                    session.rollback()
+                    errors += 1
+        latencies.append(time.perf_counter() - began)
+    if batcher is not None:
+        batcher.close()
+    return time.perf_counter() - started, errors, latencies
+
+
+def _final_progress(database_url: str, profile: str) -> list[float]:
+    _configure(database_url, profile)
+    from sqlalchemy import select
+
+    from app import db
+    from app.models import Job
+
+    with db.SessionLocal() as session:
+        return list(session.scalars(select(Job.progress)))
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_profile(profile: str, workers: int, updates: int) -> None:
+    database_url = f"sqlite:///{tempfile.mkdtemp(prefix='qtube-bench-')}/bench.db"
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        job_ids = pool.apply(_prepare, (database_url, profile, workers))
+
+    with context.Pool(workers) as pool:
+        start_at = time.time() + 2.0
+        results = pool.starmap(
+            _worker,
+            [(database_url, profile, job_id, updates, start_at) for job_id in job_ids],
+        )
+    with context.Pool(1) as pool:
+        final = pool.apply(_final_progress, (database_url, profile))
+
+    wall = max(elapsed for elapsed, _, _ in results)
+    errors = sum(failed for _, failed, _ in results)
+    latencies = [value for _, _, worker_latencies in results for value in worker_latencies]
+    issued = workers * updates
+    finished = sum(1 for progress in final if progress == 100.0)
+    print(
+        f"{profile:<8} {issued:>7} updates in {wall:6.2f}s -> {issued / wall:9.1f} updates/s"
+        f"  p50 {_percentile(latencies, 0.5) * 1000:7.2f}ms"
+        f"  p99 {_percentile(latencies, 0.99) * 1000:8.2f}ms  locked errors {errors}"
+        f"  jobs at 100% {finished}/{workers}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.updates} progress updates")
+    for profile in args.profiles:
+        run_profile(profile, args.workers, args.updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare transcription throughput across CPU layouts of model replicas and threads.
+
+Each layout is "<replicas>x<threads>" and runs either as replicas inside one
+process (faster-whisper ``num_workers``) or as one process per replica, the
+two modes QTUBE_TRANSCRIPTION_LAYOUT selects. Needs faster-whisper and a
+short audio clip; the clip is transcribed ``--jobs`` times per layout:
+
+    python benchmarks/bench_worker_layouts.py clip.wav --model tiny --layouts 1x8 2x4 4x2
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.audio_tools import SAMPLE_RATE, load_audio  # noqa: E402
+from app.cpu_topology import available_cpus  # noqa: E402
+
+_process_model = None
+
+
+def _transcribe(model, audio) -> None:
+    segments, _info = model.transcribe(audio, beam_size=1)
+    for _ in segments:
+        pass
+
+
+def _init_process(model_name: str, compute_type: str, threads: int) -> None:
+    global _process_model
+    from faster_whisper import WhisperModel
+
+    _process_model = WhisperModel(model_name, compute_type=compute_type, cpu_threads=threads)
+
+
+def _transcribe_in_process(audio) -> None:
+    _transcribe(_process_model, audio)
+
+
+def run_threads(args, audio, replicas: int, threads: int) -> float:
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        args.model, compute_type=args.compute_type, cpu_threads=threads, num_workers=replicas
+    )
+    _transcribe(model, audio)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=replicas) as executor:
+        list(executor.map(lambda _: _transcribe(model, audio), range(args.jobs)))
+    return time.perf_counter() - started
+
+
+def run_processes(args, audio, replicas: int, threads: int) -> float:
+    with ProcessPoolExecutor(
+        max_workers=replicas,
+        initializer=_init_process,
+        initargs=(args.model, args.compute_type, threads),
+    ) as executor:
+        list(executor.map(_transcribe_in_process, [audio] * replicas))
+        started = time.perf_counter()
+        list(executor.map(_transcribe_in_process, [audio] * args.jobs))
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio", type=Path)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--layouts", nargs="+", default=None, help="e.g. 1x8 2x4 4x2")
+    parser.add_argument("--modes", nargs="+", default=["threads", "processes"])
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    default_threads = (cpus, 8, 4, 2)
+    layouts = args.layouts or [f"{cpus // t}x{t}" for t in default_threads if t <= cpus]
+    audio = load_audio(args.audio)
+    clip_seconds = audio.shape[0] / SAMPLE_RATE
+    audio_seconds = clip_seconds * args.jobs
+    print(f"{cpus} CPUs, {args.jobs} x {clip_seconds:.1f}s clip, model {args.model}")
+
+    runners = {"threads": run_threads, "processes": run_processes}
+    for layout in dict.fromkeys(layouts):
+        replicas, threads = (int(part) for part in layout.split("x"))
+        for mode in args.modes:
+            elapsed = runners[mode](args, audio, replicas, threads)
+            print(
+                f"{layout:>6} {mode:<9} {elapsed:7.2f}s  "
+                f"{audio_seconds / elapsed:7.1f} audio-s/s  {args.jobs / elapsed:6.2f} jobs/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
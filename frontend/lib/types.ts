@@ -16,6 +16,10 @@ export interface Job {
   title: string | null;
   uploader: string | null;
   requested_format: string | null;
+  audio_only: boolean;
+  download_format: string | null;
+  whisper_model: string | null;
+  compute_type: string | null;
   status: JobStatus;
   progress: number;
   download_path: string | null;
@@ -38,7 +42,8 @@ export interface JobEvent {
 
 export interface JobListResponse {
   jobs: Job[];
-  total: number;
+  total: number | null;
+  next_cursor: string | null;
 }
 
 export interface SettingsResponse {
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from app import db
-from app.api import create_app
-from app.db import Base
+import os
+
+os.environ.setdefault("QTUBE_EVENT_STREAM_ENABLED", "false")
+os.environ.setdefault("QTUBE_LIVE_PROGRESS_ENABLED", "false")
+os.environ.setdefault("QTUBE_INFO_CACHE_REDIS_ENABLED", "false")
+os.environ.setdefault("QTUBE_RATE_LIMIT_ENABLED", "false")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import db  # noqa: E402
+from app.api import create_app  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.info_cache import get_info_cache  # noqa: E402
 import app.models  # noqa: F401
 
 
@@ -23,6 +31,7 @@ def test_app(tmp_path):
     db.SessionLocal = TestingSessionLocal
 
     Base.metadata.create_all(bind=engine)
+    get_info_cache().clear()
     app = create_app()
     return app
 
@@ -33,7 +42,7 @@ def client(test_app):
 
 
 @pytest.fixture()
-def db_session():
+def db_session(test_app):
     session = db.SessionLocal()
     try:
         yield session
@@ -22,3 +22,17 @@ def test_job_events_returns_records(client, db_session):
     payload = response.json()
     assert len(payload) == 1
     assert payload[0]["event_type"] == "queued"
+
+
+def test_job_events_after_id_pages_forward(client, db_session):
+    job = create_job(db_session, source_url="https://example.com")
+    for index in range(3):
+        add_job_event(db_session, job.id, f"step{index}", "Step", float(index))
+    db_session.commit()
+
+    first = client.get(f"/jobs/{job.id}/events", params={"limit": 2})
+    assert [event["event_type"] for event in first.json()] == ["step0", "step1"]
+
+    after_id = first.headers["X-Next-Cursor"]
+    rest = client.get(f"/jobs/{job.id}/events", params={"after_id": after_id})
+    assert [event["event_type"] for event in rest.json()] == ["step2"]
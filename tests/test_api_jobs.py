@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+
+import pytest
+
 from app.models import Batch
 
 
 def test_create_jobs_enqueues_batch(client, db_session, monkeypatch):
     calls = []
 
-    def fake_delay_with_format(batch_id, url, format_id):
-        calls.append((batch_id, url, format_id))
+    def fake_delay_with_format(batch_id, url, format_id, **options):
+        calls.append((batch_id, url, format_id, options))
 
     monkeypatch.setattr("app.api.enqueue_url.delay", fake_delay_with_format)
 
@@ -26,6 +31,50 @@ def test_create_jobs_enqueues_batch(client, db_session, monkeypatch):
     assert calls[0][0] == payload["batch_id"]
     assert calls[0][1] == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
     assert calls[0][2] is None
+    assert calls[0][3] == {
+        "audio_only": None,
+        "force": False,
+        "whisper_model": None,
+        "compute_type": None,
+    }
+
+
+def test_create_jobs_rejects_unknown_models(client, monkeypatch):
+    monkeypatch.setattr("app.api.enqueue_url.delay", lambda *args, **kwargs: None)
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    rejected = client.post("/jobs", json={"url": url, "whisper_model": "someone/huge-model"})
+    accepted = client.post("/jobs", json={"url": url, "whisper_model": "small.en"})
+
+    assert rejected.status_code == 422
+    assert accepted.status_code == 202
+
+
+def test_default_model_names_are_known_to_faster_whisper():
+    faster_whisper = pytest.importorskip("faster_whisper")
+    from app.config import WHISPER_MODELS
+
+    assert set(WHISPER_MODELS) <= set(faster_whisper.available_models())
+
+
+def test_create_jobs_rejects_compute_types_the_device_cannot_load(client, monkeypatch):
+    monkeypatch.setattr("app.api.enqueue_url.delay", lambda *args, **kwargs: None)
+    monkeypatch.setattr("app.api.settings.transcription_device", "cpu")
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    for compute_type in ("float16", "int4"):
+        response = client.post("/jobs", json={"url": url, "compute_type": compute_type})
+        assert response.status_code == 422
+    accepted = client.post("/jobs", json={"url": url, "compute_type": "int8_float32"})
+    assert accepted.status_code == 202
+
+
+def test_cpu_compute_types_are_supported_by_ctranslate2():
+    ctranslate2 = pytest.importorskip("ctranslate2")
+    from app.config import COMPUTE_TYPES
+
+    supported = set(ctranslate2.get_supported_compute_types("cpu"))
+    assert set(COMPUTE_TYPES["cpu"]) - {"auto", "default"} <= supported
 
 
 def test_get_job_not_found(client):
@@ -50,6 +99,44 @@ def test_delete_job_removes_failed_job(client, db_session):
     assert db_session.get(Job, job_id) is None
 
 
+def test_purge_keeps_files_another_job_still_uses(client, db_session, tmp_path, monkeypatch):
+    from app import api
+    from app.models import Job, JobStatus
+
+    monkeypatch.setattr(api.settings, "downloads_dir", str(tmp_path))
+    media = tmp_path / "clip.mp4"
+    transcript = tmp_path / "clip.mp4.txt"
+    own = tmp_path / "own.mp4"
+    for path in (media, transcript, own):
+        path.write_text("x")
+    source = Job(
+        source_url="https://example.com/v",
+        status=JobStatus.completed,
+        download_path=str(media),
+        transcript_path=str(transcript),
+    )
+    reused = Job(
+        source_url="https://example.com/v",
+        status=JobStatus.completed,
+        download_path=str(media),
+        transcript_path=str(transcript),
+    )
+    single = Job(
+        source_url="https://example.com/w", status=JobStatus.failed, download_path=str(own)
+    )
+    db_session.add_all([source, reused, single])
+    db_session.commit()
+
+    assert client.delete(f"/jobs/{reused.id}", params={"purge_files": True}).status_code == 200
+    assert media.exists() and transcript.exists()
+
+    assert client.delete(f"/jobs/{source.id}", params={"purge_files": True}).status_code == 200
+    assert not media.exists() and not transcript.exists()
+
+    assert client.delete(f"/jobs/{single.id}", params={"purge_files": True}).status_code == 200
+    assert not own.exists()
+
+
 def test_delete_job_active_conflict(client, db_session):
     from app.models import Job, JobStatus
 
@@ -98,3 +185,26 @@ def test_settings_reports_cookies_status(client):
     assert response.status_code == 200
     payload = response.json()
     assert "cookies_configured" in payload
+
+
+def test_api_import_skips_worker_stack():
+    code = (
+        "import sys, app.api; "
+        "print([m for m in ('yt_dlp', 'faster_whisper', 'app.transcription_processor') "
+        "if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_legacy_process_untranscribed_sends_task_by_name(client, monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        "app.celery_app.celery_app.send_task",
+        lambda name, args, kwargs: sent.append((name, args, kwargs)),
+    )
+
+    assert client.post("/process_untranscribed_videos").status_code == 202
+    assert sent[0][0] == "app.transcription_processor.process_untranscribed_videos"
@@ -14,3 +14,45 @@ def test_list_jobs_returns_total(client, db_session):
     payload = response.json()
     assert payload["total"] == 2
     assert len(payload["jobs"]) == 2
+
+
+def test_list_jobs_cursor_pagination_walks_every_job(client, db_session):
+    batch = create_batch(db_session, "https://example.com/channel")
+    created = {
+        create_job(db_session, source_url=batch.source_url, batch_id=batch.id).id
+        for _ in range(5)
+    }
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "include_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        payload = client.get("/jobs", params=params).json()
+        assert payload["total"] is None
+        seen.extend(job["id"] for job in payload["jobs"])
+        cursor = payload["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert set(seen) == created
+
+
+def test_list_jobs_rejects_bad_cursor(client):
+    response = client.get("/jobs", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_list_batches_sets_next_cursor_header(client, db_session):
+    for index in range(3):
+        create_batch(db_session, f"https://example.com/{index}")
+    db_session.commit()
+
+    first = client.get("/batches", params={"limit": 2})
+    assert len(first.json()) == 2
+    second = client.get("/batches", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
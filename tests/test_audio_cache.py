@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.audio_cache import AudioCache
+
+
+class FakeDecoder:
+    def __init__(self, samples: int = 16000):
+        self.samples = samples
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return np.linspace(-1.0, 1.0, self.samples, dtype=np.float32)
+
+
+def _media(tmp_path, name: str, payload: bytes):
+    path = tmp_path / name
+    path.write_bytes(payload)
+    return path
+
+
+def test_hit_returns_memmap_without_decoding(tmp_path):
+    decoder = FakeDecoder()
+    cache = AudioCache(tmp_path / "cache", max_bytes=10**6, decoder=decoder)
+    media = _media(tmp_path, "a.mp4", b"same-content")
+
+    first = cache.load(media)
+    second = cache.load(_media(tmp_path, "copy.mp4", b"same-content"))
+
+    assert decoder.calls == 1
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    import os
+
+    decoder = FakeDecoder(samples=1000)
+    cache = AudioCache(tmp_path / "cache", max_bytes=9000, decoder=decoder)
+    old = _media(tmp_path, "old.mp4", b"old")
+    fresh = _media(tmp_path, "fresh.mp4", b"fresh")
+    cache.load(old)
+    cache.load(fresh)
+    entry = cache._entry_path(cache.key_for(old))
+    os.utime(entry, (1, 1))
+
+    cache.load(_media(tmp_path, "new.mp4", b"new"))
+
+    assert not cache.contains(old)
+    assert cache.contains(fresh)
+    assert cache.evictions == 1
+
+
+def test_invalidate_removes_entry(tmp_path):
+    cache = AudioCache(tmp_path / "cache", max_bytes=10**6, decoder=FakeDecoder())
+    media = _media(tmp_path, "a.mp4", b"payload")
+    cache.load(media)
+
+    assert cache.invalidate(media)
+    assert not cache.contains(media)
+    assert not cache.invalidate(media)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.audio_tools import SAMPLE_RATE, find_silence_splits
+
+
+def _speech_with_gaps(total_seconds: int, gaps: list[float]) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, total_seconds * SAMPLE_RATE).astype(np.float32)
+    for gap in gaps:
+        start = int(gap * SAMPLE_RATE)
+        audio[start : start + SAMPLE_RATE // 2] = 0.0
+    return audio
+
+
+def test_short_audio_is_single_window():
+    audio = np.zeros(SAMPLE_RATE * 5, dtype=np.float32)
+    assert find_silence_splits(audio, window_seconds=10) == [(0, audio.shape[0])]
+
+
+def test_splits_land_in_silence_and_cover_input():
+    audio = _speech_with_gaps(100, gaps=[22.0, 47.0, 71.0, 95.0])
+    windows = find_silence_splits(audio, window_seconds=25, search_seconds=5)
+
+    assert windows[0][0] == 0
+    assert windows[-1][1] == audio.shape[0]
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert end == start
+
+    for _, end in windows[:-1]:
+        assert np.all(audio[end - 100 : end + 100] == 0.0)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from app.calibrate import (
+    Candidate,
+    Result,
+    batched_grid,
+    choose,
+    synthetic_speech,
+    write_settings,
+)
+from app.config import CALIBRATION_FILE, Settings
+
+
+def _result(rtf, rss, error=None, threads=4):
+    return Result(Candidate("int8", 1, threads, 1), rtf, rss, error)
+
+
+def test_choose_fastest_within_budget():
+    results = [
+        _result(0.10, 3000.0, threads=16),
+        _result(0.20, 900.0, threads=4),
+        _result(0.15, 1000.0, error="OOM", threads=8),
+    ]
+
+    assert choose(results, max_rss_mb=1024).candidate.cpu_threads == 4
+    assert choose(results, max_rss_mb=None).candidate.cpu_threads == 16
+    assert choose(results, max_rss_mb=100) is None
+
+
+def test_written_settings_are_loaded_below_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("QTUBE_TRANSCRIPTION_BEAM_SIZE", raising=False)
+    monkeypatch.setenv("QTUBE_TRANSCRIPTION_CPU_THREADS", "2")
+    best = Result(Candidate("int8_float32", 1, 8, 1), 0.12, 700.0)
+
+    write_settings(tmp_path / CALIBRATION_FILE, "base.en", best)
+    settings = Settings()
+
+    assert settings.transcription_compute_type == "int8_float32"
+    assert settings.transcription_beam_size == 1
+    assert settings.transcription_cpu_threads == 2
+
+
+def test_synthetic_speech_is_bounded_float32():
+    audio = synthetic_speech(2.0)
+
+    assert audio.dtype.name == "float32"
+    assert audio.shape == (32000,)
+    assert abs(audio).max() <= 0.3 + 1e-6
+
+
+def test_batched_settings_enable_the_path_they_were_measured_on(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("BATCH_SIZE", "INFERENCE_BATCH_SIZE", "CPU_THREADS"):
+        monkeypatch.delenv(f"QTUBE_TRANSCRIPTION_{name}", raising=False)
+    sequential = Result(Candidate("int8", 1, 8), 0.12, 700.0)
+    (batched,) = batched_grid(sequential.candidate, [1, 16], clips=4)
+
+    write_settings(tmp_path / CALIBRATION_FILE, "base.en", sequential)
+    assert Settings().transcription_batch_size == 1
+
+    write_settings(tmp_path / CALIBRATION_FILE, "base.en", sequential, Result(batched, 0.05, 900.0))
+    settings = Settings()
+    assert settings.transcription_batch_size == 4
+    assert settings.transcription_inference_batch_size == 16
+    assert settings.transcription_cpu_threads == 8
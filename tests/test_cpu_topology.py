@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from app.cpu_topology import available_cpus, plan_layout
+
+
+def test_cgroup_v2_quota_caps_affinity(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.cpu_topology.os.sched_getaffinity", lambda pid: set(range(32)))
+    (tmp_path / "cpu.max").write_text("650000 100000\n")
+
+    assert available_cpus(tmp_path) == 7
+
+
+def test_cgroup_v1_quota_and_unlimited(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.cpu_topology.os.sched_getaffinity", lambda pid: set(range(8)))
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert available_cpus(tmp_path) == 2
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(tmp_path) == 8
+
+
+def test_plan_layout_derives_missing_dimension():
+    auto = plan_layout(32)
+    assert (auto.replicas, auto.cpu_threads, auto.processes) == (8, 4, 1)
+
+    fixed_replicas = plan_layout(32, replicas=2, mode="processes")
+    assert (fixed_replicas.processes, fixed_replicas.replicas_per_process) == (2, 1)
+    assert fixed_replicas.cpu_threads == 16
+
+    small = plan_layout(2)
+    assert (small.replicas, small.cpu_threads) == (1, 2)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from app import db_async
+from app.db_async import AsyncReader, ThreadpoolReader, async_database_url, get_reader
+from app.services.jobs import create_batch, create_job
+
+
+def test_async_database_url_maps_known_backends():
+    assert async_database_url("sqlite:///./data/qtube.db") == "sqlite+aiosqlite:///./data/qtube.db"
+    assert (
+        async_database_url("postgresql+psycopg2://user:pw@db/qtube")
+        == "postgresql+asyncpg://user:pw@db/qtube"
+    )
+    assert async_database_url("mysql://user@db/qtube") is None
+
+
+@pytest.mark.parametrize("async_enabled", [True, False])
+def test_read_endpoints_match_in_both_modes(client, db_session, monkeypatch, async_enabled):
+    monkeypatch.setattr(db_async.get_settings(), "async_db_enabled", async_enabled)
+    batch = create_batch(db_session, "https://example.com/playlist")
+    job = create_job(db_session, "https://example.com/watch?v=1", batch_id=batch.id)
+    db_session.commit()
+
+    listing = client.get("/jobs").json()
+    assert [item["id"] for item in listing["jobs"]] == [job.id]
+    assert listing["total"] == 1
+    assert client.get(f"/jobs/{job.id}").json()["batch_id"] == batch.id
+    assert client.get(f"/batches/{batch.id}").json()["total"] == 1
+    assert client.get("/jobs/missing").status_code == 404
+
+
+async def test_get_reader_picks_backend_from_settings(test_app, monkeypatch):
+    settings = db_async.get_settings()
+    monkeypatch.setattr(settings, "async_db_enabled", True)
+    async for reader in get_reader():
+        assert isinstance(reader, AsyncReader)
+    monkeypatch.setattr(settings, "async_db_enabled", False)
+    async for reader in get_reader():
+        assert isinstance(reader, ThreadpoolReader)
+    await db_async.dispose_async_engines()
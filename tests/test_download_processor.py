@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+
+from app import download_processor
+from app.info_cache import PREVIEW_NAMESPACE, get_info_cache
+from app.models import Batch, Job, JobStatus
+from app.services.jobs import create_batch, create_job
+
+
+class FakeInfoYDL:
+    def __init__(self, info):
+        self.info = info
+
+    def extract_info(self, url, download=False, process=True, ie_key=None):
+        assert process is False
+        return self.info
+
+
+def _playlist(count: int, consumed: list):
+    def entries():
+        for index in range(count):
+            consumed.append(index)
+            yield {"_type": "url", "id": f"vid{index}", "title": f"Video {index}", "url": None}
+
+    return {"_type": "playlist", "uploader": "Channel", "entries": entries()}
+
+
+def test_enqueue_url_streams_playlist_pages(db_session, tmp_path, monkeypatch):
+    consumed = []
+    dispatched = []
+    monkeypatch.setattr(download_processor.settings, "downloads_dir", str(tmp_path))
+    monkeypatch.setattr(download_processor.settings, "enqueue_page_size", 2)
+    monkeypatch.setattr(download_processor, "INFO_YDL", FakeInfoYDL(_playlist(5, consumed)))
+    monkeypatch.setattr(
+        download_processor,
+        "_dispatch_downloads",
+        lambda downloads, output_dir: dispatched.extend(
+            [job_id, url, str(output_dir)] for job_id, url in downloads
+        ),
+    )
+    batch = create_batch(db_session, "https://www.youtube.com/@channel")
+    db_session.commit()
+
+    download_processor.enqueue_url(batch.id, batch.source_url)
+
+    db_session.expire_all()
+    jobs = db_session.scalars(select(Job).where(Job.batch_id == batch.id)).all()
+    assert sorted(job.video_id for job in jobs) == [f"vid{index}" for index in range(5)]
+    assert db_session.get(Batch, batch.id).discovered_count == 5
+    assert len(dispatched) == 5
+    assert {job_id for job_id, _, _ in dispatched} == {job.id for job in jobs}
+    assert dispatched[0][1] == "https://www.youtube.com/watch?v=vid0"
+    assert dispatched[0][2] == str(tmp_path / "Channel")
+
+
+def test_enqueue_url_reuses_cached_preview_info(db_session, tmp_path, monkeypatch):
+    url = "https://www.youtube.com/watch?v=abc123"
+    dispatched = []
+    monkeypatch.setattr(download_processor.settings, "downloads_dir", str(tmp_path))
+    monkeypatch.setattr(download_processor, "INFO_YDL", None)
+    monkeypatch.setattr(
+        download_processor,
+        "_dispatch_downloads",
+        lambda downloads, output_dir: dispatched.extend(downloads),
+    )
+    get_info_cache().set(
+        PREVIEW_NAMESPACE,
+        url,
+        {"id": "abc123", "title": "Cached", "uploader": "Channel", "webpage_url": url},
+    )
+    batch = create_batch(db_session, url)
+    db_session.commit()
+
+    download_processor.enqueue_url(batch.id, url)
+
+    db_session.expire_all()
+    (job,) = db_session.scalars(select(Job).where(Job.batch_id == batch.id)).all()
+    assert (job.video_id, job.title) == ("abc123", "Cached")
+    assert dispatched == [(job.id, url)]
+
+
+class FakeDownloadYDL:
+    """Reports two progress steps and a finished file, or raises ``error``."""
+
+    instances: list = []
+    error: Exception | None = None
+    format_id: str | None = None
+
+    def __init__(self, params):
+        self.params = params
+        FakeDownloadYDL.instances.append(self)
+
+    def download(self, urls):
+        if FakeDownloadYDL.error is not None:
+            raise FakeDownloadYDL.error
+        filename = f"{self.params['outtmpl'].split('/%(')[0]}/clip.mp4"
+        for downloaded in (1000, 5000):
+            for hook in self.params["progress_hooks"]:
+                hook(
+                    {
+                        "status": "downloading",
+                        "filename": filename,
+                        "downloaded_bytes": downloaded,
+                        "total_bytes": 9000,
+                    }
+                )
+        finished = {"status": "finished", "filename": filename, "downloaded_bytes": 9000}
+        if FakeDownloadYDL.format_id is not None:
+            finished["info_dict"] = {"format_id": FakeDownloadYDL.format_id}
+        for hook in self.params["progress_hooks"]:
+            hook(finished)
+
+
+def _download_job(db_session, monkeypatch, tmp_path, error=None):
+    from app import transcription_processor
+
+    FakeDownloadYDL.instances = []
+    FakeDownloadYDL.error = error
+    FakeDownloadYDL.format_id = None
+    dispatched = []
+    monkeypatch.setattr(download_processor, "RateLimitedYoutubeDL", FakeDownloadYDL)
+    monkeypatch.setattr(
+        transcription_processor.transcribe_video,
+        "apply_async",
+        lambda args, queue: dispatched.append(args),
+    )
+    job = create_job(db_session, source_url="https://example.com/v")
+    db_session.commit()
+    return job, dispatched
+
+
+def test_download_video_resumes_with_concurrent_fragments(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(download_processor.settings, "download_concurrent_fragments", 8)
+    monkeypatch.setattr(download_processor.settings, "download_http_chunk_size", 1024)
+    clock = iter([0.0, 1.0, 2.0])
+    meter = download_processor.TransferMeter(clock=lambda: next(clock))
+    monkeypatch.setattr(download_processor, "TransferMeter", lambda: meter)
+    job, dispatched = _download_job(db_session, monkeypatch, tmp_path)
+
+    download_processor.download_video(job.id, job.source_url, str(tmp_path))
+
+    params = FakeDownloadYDL.instances[0].params
+    assert params["concurrent_fragment_downloads"] == 8
+    assert params["http_chunk_size"] == 1024
+    assert params["continuedl"] is True and params["nopart"] is False
+    db_session.expire_all()
+    job = db_session.get(Job, job.id)
+    assert job.download_path == f"{tmp_path}/clip.mp4"
+    assert job.download_bytes_per_second == 4000.0
+    assert dispatched == [[job.id]]
+
+
+def test_download_video_retries_before_failing(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(download_processor.settings, "download_max_retries", 1)
+    job, dispatched = _download_job(db_session, monkeypatch, tmp_path, OSError("reset"))
+
+    # Called directly, Task.retry re-raises the original error instead of requeueing.
+    with pytest.raises(OSError):
+        download_processor.download_video(job.id, job.source_url, str(tmp_path))
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).status == JobStatus.downloading
+
+    monkeypatch.setattr(download_processor.settings, "download_max_retries", 0)
+    download_processor.download_video(job.id, job.source_url, str(tmp_path))
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).status == JobStatus.failed
+    assert dispatched == []
+
+
+def test_redelivered_download_leaves_a_finished_job_alone(db_session, tmp_path, monkeypatch):
+    job, dispatched = _download_job(db_session, monkeypatch, tmp_path)
+    download_processor.download_video(job.id, job.source_url, str(tmp_path))
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).status == JobStatus.downloaded
+
+    download_processor.download_video(job.id, job.source_url, str(tmp_path))
+
+    db_session.expire_all()
+    job = db_session.get(Job, job.id)
+    assert job.status == JobStatus.downloaded
+    assert job.progress == 50.0
+    assert len(FakeDownloadYDL.instances) == 1
+    assert dispatched == [[job.id]]
+
+
+@pytest.mark.parametrize(
+    ("requested_format", "audio_only", "expected"),
+    [
+        ("137+140", True, "137+140"),
+        (None, True, "bestaudio[abr<=64]/worstaudio/best"),
+        (None, False, "best"),
+    ],
+)
+def test_select_format(monkeypatch, requested_format, audio_only, expected):
+    monkeypatch.setattr(
+        download_processor.settings, "audio_only_format", "bestaudio[abr<=64]/worstaudio/best"
+    )
+    job = Job(source_url="https://example.com/v", requested_format=requested_format)
+    job.audio_only = audio_only
+
+    assert download_processor._select_format(job) == expected
+
+
+def test_download_video_records_the_format_yt_dlp_picked(db_session, tmp_path, monkeypatch):
+    job, _dispatched = _download_job(db_session, monkeypatch, tmp_path)
+    job.audio_only = True
+    db_session.commit()
+    FakeDownloadYDL.format_id = "251"
+
+    download_processor.download_video(job.id, job.source_url, str(tmp_path))
+
+    params = FakeDownloadYDL.instances[0].params
+    assert params["format"] == download_processor.settings.audio_only_format
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).download_format == "251"
+
+
+def test_transfer_meter_excludes_resumed_bytes():
+    clock = iter([10.0, 12.0, 14.0])
+    meter = download_processor.TransferMeter(clock=lambda: next(clock))
+
+    meter.observe({"filename": "a.part", "downloaded_bytes": 50_000})
+    meter.observe({"filename": "a.part", "downloaded_bytes": 60_000})
+    meter.observe({"filename": "a.part", "downloaded_bytes": 70_000})
+
+    assert meter.transferred_bytes == 20_000
+    assert meter.bytes_per_second() == 5_000.0
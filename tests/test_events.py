@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app import events
+from app.models import JobStatus
+from app.services.jobs import add_job_event, create_batch, create_job, update_job_status
+
+
+@pytest.fixture()
+def published(monkeypatch):
+    sent = []
+    monkeypatch.setattr(events.settings, "event_stream_enabled", True)
+    monkeypatch.setattr(events, "publish", lambda messages: sent.extend(messages))
+    return sent
+
+
+def test_notifications_publish_only_after_commit(db_session, published):
+    batch = create_batch(db_session, "https://example.com/playlist")
+    job = create_job(db_session, "https://example.com/playlist", batch_id=batch.id)
+    update_job_status(db_session, job, JobStatus.downloading, progress=0.0)
+    add_job_event(db_session, job.id, "downloading", "Download started", 0.0)
+    db_session.flush()
+    assert published == []
+
+    db_session.commit()
+    assert [message["type"] for message in published] == ["job", "job_event"]
+    assert published[0]["status"] == "downloading"
+    assert all(message["batch_id"] == batch.id for message in published)
+
+
+def test_notifications_are_dropped_on_rollback(db_session, published):
+    job = create_job(db_session, "https://example.com/watch?v=1")
+    db_session.commit()
+    published.clear()
+
+    update_job_status(db_session, job, JobStatus.failed, error="boom")
+    db_session.rollback()
+    db_session.commit()
+    assert published == []
+
+
+def test_stream_replays_then_skips_duplicates():
+    broker = events.EventBroker("redis://unused")
+
+    async def fake_start():
+        return None
+
+    async def fake_replay(last_event_id):
+        return [
+            ("5-0", {"type": "job", "job_id": "a", "batch_id": "b1"}),
+            ("6-0", {"type": "job", "job_id": "b", "batch_id": "b2"}),
+        ]
+
+    broker._ensure_started = fake_start
+    broker.replay = fake_replay
+
+    async def collect():
+        stream = broker.stream(batch_id="b1", last_event_id="4-0", keepalive_seconds=0.05)
+        chunks = [await anext(stream), await anext(stream)]
+        (subscriber,) = broker._subscribers
+        subscriber.offer(("5-0", {"type": "job", "job_id": "a", "batch_id": "b1"}))
+        subscriber.offer(("7-0", {"type": "job", "job_id": "c", "batch_id": "b1"}))
+        chunks.append(await anext(stream))
+        await stream.aclose()
+        return chunks
+
+    retry, replayed, live = asyncio.run(collect())
+    assert retry.startswith("retry:")
+    assert replayed.startswith("id: 5-0\nevent: job\n")
+    assert live.startswith("id: 7-0\n")
+    assert broker._subscribers == set()
+
+
+def test_stream_endpoint_rejects_bad_last_event_id(client, monkeypatch):
+    monkeypatch.setattr("app.api.settings.event_stream_enabled", True)
+    response = client.get("/jobs/stream", headers={"Last-Event-ID": "not-an-id"})
+    assert response.status_code == 400
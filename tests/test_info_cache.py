@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.info_cache import InfoCache, LoaderBusy, SingleFlightLoader
+
+
+def test_cache_expires_and_evicts_least_recent(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.info_cache.time.monotonic", lambda: clock[0])
+    cache = InfoCache(ttl_seconds=10, max_entries=2)
+
+    cache.set("preview", "a", {"id": "a"})
+    cache.set("preview", "b", {"id": "b"})
+    assert cache.get("preview", "a") == {"id": "a"}
+    cache.set("preview", "c", {"id": "c"})
+    assert cache.get("preview", "b") is None
+    assert cache.get("preview", "other-namespace") is None
+
+    clock[0] += 11
+    assert cache.get("preview", "a") is None
+
+
+def test_concurrent_loads_of_one_url_share_a_single_extraction():
+    release = threading.Event()
+    calls = []
+
+    def slow_loader(url):
+        calls.append(url)
+        release.wait(5)
+        return {"id": url}
+
+    loader = SingleFlightLoader(InfoCache(60, 10), max_workers=2, max_pending=8)
+    first = loader.load("preview", "u1", slow_loader)
+    second = loader.load("preview", "u1", slow_loader)
+    assert first is second
+
+    release.set()
+    assert first.result(5) == {"id": "u1"}
+    assert loader.load("preview", "u1", slow_loader).result(5) == {"id": "u1"}
+    assert calls == ["u1"]
+    loader.shutdown()
+
+
+def test_loader_rejects_work_beyond_its_bound():
+    release = threading.Event()
+    loader = SingleFlightLoader(InfoCache(60, 10), max_workers=1, max_pending=1)
+    loader.load("preview", "u1", lambda url: release.wait(5) and {"id": url})
+    with pytest.raises(LoaderBusy):
+        loader.load("preview", "u2", lambda url: {"id": url})
+    release.set()
+    loader.shutdown()
+
+
+def test_failed_loads_are_not_cached():
+    attempts = []
+
+    def flaky(url):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return {"id": url}
+
+    loader = SingleFlightLoader(InfoCache(60, 10), max_workers=1, max_pending=4)
+    with pytest.raises(ValueError):
+        loader.load("preview", "u1", flaky).result(5)
+    assert loader.load("preview", "u1", flaky).result(5) == {"id": "u1"}
+    loader.shutdown()
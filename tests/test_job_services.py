@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import select, update
+
+from app.models import Batch, BatchStatus, Job, JobEvent, JobStatus
+from app.services.jobs import (
+    STATUS_COUNTERS,
+    bulk_create_jobs,
+    claim_job,
+    create_batch,
+    create_job,
+    find_reusable_job,
+    recount_batch_counters,
+    remove_job,
+    update_batch_status,
+    update_job_status,
+)
+
+
+def test_claim_job_only_succeeds_once(db_session):
+    job = create_job(db_session, source_url="local")
+    job.status = JobStatus.downloaded
+    db_session.commit()
+
+    assert claim_job(db_session, job.id, JobStatus.downloaded, JobStatus.transcribing)
+    assert not claim_job(db_session, job.id, JobStatus.downloaded, JobStatus.transcribing)
+    db_session.commit()
+
+    db_session.expire_all()
+    assert db_session.get(Job, job.id).status == JobStatus.transcribing
+
+
+def _completed_job(db_session, tmp_path, name: str, model: str = "base.en") -> Job:
+    transcript = tmp_path / f"{name}.txt"
+    transcript.write_text("hello")
+    job = create_job(db_session, source_url="https://example.com", video_id="abc123")
+    job.status = JobStatus.completed
+    job.transcript_path = str(transcript)
+    job.download_path = str(tmp_path / name)
+    job.whisper_model = model
+    job.compute_type = "int8"
+    return job
+
+
+def test_find_reusable_job_matches_model_and_existing_transcript(db_session, tmp_path):
+    other_model = _completed_job(db_session, tmp_path, "small", model="small")
+    gone = _completed_job(db_session, tmp_path, "gone")
+    kept = _completed_job(db_session, tmp_path, "kept")
+    db_session.commit()
+    Path(gone.transcript_path).unlink()
+
+    found = find_reusable_job(db_session, "abc123", "base.en", "int8")
+
+    assert found is not None and found.id == kept.id
+    assert find_reusable_job(db_session, "abc123", "medium", "int8") is None
+    assert other_model.id != kept.id
+
+
+def test_bulk_create_jobs_queues_new_and_completes_reused(db_session, tmp_path):
+    source = _completed_job(db_session, tmp_path, "source")
+    db_session.commit()
+
+    queued = bulk_create_jobs(
+        db_session,
+        [
+            {"source_url": "https://example.com", "video_id": "abc123"},
+            {"source_url": "https://example.com", "video_id": "new", "video_url": "https://x"},
+        ],
+        reuse={"abc123": source},
+    )
+    db_session.commit()
+
+    assert [row["video_id"] for row in queued] == ["new"]
+    reused = db_session.scalar(
+        select(Job).where(Job.video_id == "abc123", Job.id != source.id)
+    )
+    assert reused.status == JobStatus.completed
+    assert reused.transcript_path == source.transcript_path
+    events = db_session.scalars(select(JobEvent).order_by(JobEvent.id)).all()
+    assert [(event.job_id, event.event_type) for event in events] == [
+        (reused.id, "reused"),
+        (queued[0]["id"], "queued"),
+    ]
+
+
+def _counts(db_session, batch_id):
+    db_session.expire_all()
+    batch = db_session.get(Batch, batch_id)
+    return batch, {status: getattr(batch, column) for status, column in STATUS_COUNTERS.items()}
+
+
+def test_batch_counters_follow_status_changes(db_session):
+    batch = create_batch(db_session, "https://example.com/channel")
+    first = create_job(db_session, source_url=batch.source_url, batch_id=batch.id)
+    second = create_job(db_session, source_url=batch.source_url, batch_id=batch.id)
+    update_job_status(db_session, first, JobStatus.downloaded)
+    update_job_status(db_session, second, JobStatus.downloaded)
+    db_session.commit()
+
+    assert claim_job(db_session, first.id, JobStatus.downloaded, JobStatus.transcribing)
+    db_session.commit()
+    first = db_session.get(Job, first.id)
+    update_job_status(db_session, first, JobStatus.completed)
+    update_batch_status(db_session, batch.id)
+    db_session.commit()
+
+    refreshed, counts = _counts(db_session, batch.id)
+    assert counts[JobStatus.completed] == 1
+    assert counts[JobStatus.downloaded] == 1
+    assert sum(counts.values()) == 2
+    assert refreshed.status == BatchStatus.processing
+
+    remove_job(db_session, db_session.get(Job, second.id))
+    update_batch_status(db_session, batch.id)
+    db_session.commit()
+
+    refreshed, counts = _counts(db_session, batch.id)
+    assert sum(counts.values()) == 1
+    assert refreshed.status == BatchStatus.completed
+
+
+def test_recount_batch_counters_repairs_drift(db_session):
+    batch = create_batch(db_session, "https://example.com/channel")
+    job = create_job(db_session, source_url=batch.source_url, batch_id=batch.id)
+    update_job_status(db_session, job, JobStatus.failed)
+    db_session.commit()
+    db_session.execute(update(Batch).values(failed_count=7, queued_count=3))
+    db_session.commit()
+
+    recount_batch_counters(db_session)
+    db_session.commit()
+
+    refreshed, counts = _counts(db_session, batch.id)
+    assert counts[JobStatus.failed] == 1
+    assert sum(counts.values()) == 1
+    assert refreshed.status == BatchStatus.failed
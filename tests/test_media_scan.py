@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+
+from app.media_scan import MediaScanner, is_media_file
+
+
+def test_rescans_only_changed_directories(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    root = tmp_path / "downloads"
+    (root / "a").mkdir(parents=True)
+    (root / "b" / "nested").mkdir(parents=True)
+    (root / "a" / "one.mp4").write_bytes(b"1")
+    (root / "b" / "nested" / "two.flac").write_bytes(b"2")
+
+    first = MediaScanner(root, manifest)
+    assert [path.name for path in first.scan()] == ["one.mp4", "two.flac"]
+    first.commit()
+
+    second = MediaScanner(root, manifest)
+    assert second.scan() == []
+    assert second.dirs_listed == 0
+
+    (root / "b" / "nested" / "three.avi").write_bytes(b"3")
+    third = MediaScanner(root, manifest)
+    assert [path.name for path in third.scan()] == ["three.avi"]
+    assert third.dirs_listed == 1
+
+
+def test_reports_modified_media_but_not_transcribed(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    media = tmp_path / "clip.m4a"
+    media.write_bytes(b"short")
+    scanner = MediaScanner(tmp_path, manifest)
+    scanner.scan()
+    scanner.commit()
+
+    media.write_bytes(b"longer content")
+    stat = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert [path.name for path in MediaScanner(tmp_path, manifest).scan()] == ["clip.m4a"]
+
+    (tmp_path / "clip.m4a.txt").write_text("done")
+    assert MediaScanner(tmp_path, manifest).scan() == []
+
+
+def test_uncommitted_scan_is_reported_again(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    (tmp_path / "a.wav").write_bytes(b"")
+
+    assert len(MediaScanner(tmp_path, manifest).scan()) == 1
+    assert len(MediaScanner(tmp_path, manifest).scan()) == 1
+
+
+def test_media_detection_covers_uncommon_extensions():
+    assert is_media_file("talk.WMA")
+    assert is_media_file("clip.mts")
+    assert not is_media_file("notes.json")
+    assert not is_media_file("clip.mp4.part")
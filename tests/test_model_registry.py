@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from app.model_registry import ModelRegistry, estimate_model_bytes
+
+
+class FakeLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model_name, compute_type):
+        self.calls.append((model_name, compute_type))
+        return object()
+
+
+def test_reuses_loaded_model_and_counts_hits():
+    loader = FakeLoader()
+    registry = ModelRegistry(max_bytes=10**12, idle_seconds=0, loader=loader)
+
+    with registry.acquire("small", "int8") as first:
+        pass
+    with registry.acquire("small", "int8") as second:
+        pass
+
+    assert first is second
+    assert loader.calls == [("small", "int8")]
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert "small/int8" in stats["last_load_seconds"]
+
+
+def test_evicts_least_recently_used_within_budget():
+    loader = FakeLoader()
+    budget = estimate_model_bytes("small", "int8") + estimate_model_bytes("base.en", "int8")
+    registry = ModelRegistry(max_bytes=budget, idle_seconds=0, loader=loader)
+
+    registry.preload("small", "int8")
+    registry.preload("base.en", "int8")
+    registry.preload("small", "int8")
+    registry.preload("tiny", "int8")
+
+    assert registry.loaded() == [("small", "int8"), ("tiny", "int8")]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_never_evicts_a_model_in_use():
+    registry = ModelRegistry(max_bytes=1, idle_seconds=0, loader=FakeLoader())
+
+    with registry.acquire("medium", "int8"):
+        registry.preload("small", "int8")
+        assert ("medium", "int8") in registry.loaded()
+
+
+def test_unload_idle_skips_recent_models(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.model_registry.time.monotonic", lambda: clock[0])
+    registry = ModelRegistry(max_bytes=10**12, idle_seconds=60, loader=FakeLoader())
+    registry._started = lambda: None
+    registry.preload("small", "int8")
+
+    clock[0] += 30
+    assert registry.unload_idle() == 0
+    clock[0] += 31
+    assert registry.unload_idle() == 1
+    assert registry.loaded() == []
+
+
+def test_estimate_matches_specific_families_first():
+    distil = estimate_model_bytes("distil-large-v3", "int8")
+    assert distil < estimate_model_bytes("large-v3", "int8")
+    assert estimate_model_bytes("small", "float32") == 4 * estimate_model_bytes("small", "int8")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from app.prefetch import AudioPrefetcher
+
+
+class FakeAudio:
+    def __init__(self, nbytes: int):
+        self.nbytes = nbytes
+
+
+class FakeDecoder:
+    def __init__(self, nbytes: int = 100):
+        self.nbytes = nbytes
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        return FakeAudio(self.nbytes)
+
+
+def test_take_returns_prefetched_audio_once():
+    decoder = FakeDecoder()
+    prefetcher = AudioPrefetcher(decoder, depth=2, max_bytes=10**6)
+
+    prefetcher.schedule([Path("a.m4a"), Path("b.m4a")])
+    audio, seconds = prefetcher.take(Path("a.m4a"))
+
+    assert audio.nbytes == 100 and seconds >= 0
+    assert prefetcher.take(Path("a.m4a")) is None
+    assert prefetcher.take(Path("c.m4a")) is None
+    assert decoder.calls == [Path("a.m4a"), Path("b.m4a")]
+    assert prefetcher.stats()["hits"] == 1
+    prefetcher.close()
+
+
+def test_take_waits_for_a_decode_in_flight():
+    release = threading.Event()
+
+    def slow_decoder(path):
+        release.wait(5)
+        return FakeAudio(10)
+
+    prefetcher = AudioPrefetcher(slow_decoder, depth=1, max_bytes=10**6)
+    prefetcher.schedule([Path("a.m4a")])
+    threading.Timer(0.05, release.set).start()
+
+    assert prefetcher.take(Path("a.m4a")) is not None
+    assert prefetcher.stats()["held_bytes"] == 0
+    prefetcher.close()
+
+
+def test_drops_audio_over_budget_and_releases_unneeded():
+    prefetcher = AudioPrefetcher(FakeDecoder(nbytes=600), depth=2, max_bytes=1000)
+
+    prefetcher.schedule([Path("a.m4a"), Path("b.m4a")])
+    assert prefetcher.take(Path("b.m4a")) is None
+    assert prefetcher.stats()["dropped"] == 1
+
+    prefetcher.schedule([Path("c.m4a")])
+    assert prefetcher.take(Path("c.m4a")) is not None
+    assert prefetcher.stats()["held_bytes"] == 0
+    prefetcher.close()
+
+
+def test_reschedule_keeps_the_file_about_to_be_taken():
+    decoder = FakeDecoder()
+    prefetcher = AudioPrefetcher(decoder, depth=1, max_bytes=10**6)
+
+    prefetcher.schedule([Path("a.m4a")])
+    prefetcher.schedule([Path("b.m4a")], keep=[Path("a.m4a")])
+
+    assert prefetcher.take(Path("a.m4a")) is not None
+    assert prefetcher.take(Path("b.m4a")) is not None
+    assert prefetcher.stats()["hits"] == 2 and prefetcher.stats()["misses"] == 0
+    assert decoder.calls == [Path("a.m4a"), Path("b.m4a")]
+    prefetcher.close()
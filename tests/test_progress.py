@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from app import progress as progress_module
+from app.models import JobStatus
+from app.progress import ProgressStore
+from app.services.jobs import create_job, update_job_status
+
+
+class FakeRedis:
+    """Just enough of a Redis client for ProgressStore."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+    def expire(self, key, seconds):
+        return True
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def spop(self, key, count):
+        members = self.sets.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+def test_flush_writes_latest_progress_in_one_pass(db_session):
+    downloading = create_job(db_session, "https://example.com/watch?v=1")
+    finished = create_job(db_session, "https://example.com/watch?v=2")
+    update_job_status(db_session, downloading, JobStatus.downloading, progress=0.0)
+    update_job_status(db_session, finished, JobStatus.downloaded, progress=50.0)
+    db_session.commit()
+
+    store = ProgressStore(FakeRedis(), ttl_seconds=60)
+    for value in (5.0, 12.0, 30.0):
+        assert store.record(downloading.id, value)
+    store.record(finished.id, 20.0)
+
+    assert store.flush() == 2
+    db_session.expire_all()
+    assert downloading.progress == 30.0
+    assert finished.progress == 50.0
+    assert store.flush() == 0
+
+
+def test_live_progress_is_merged_into_job_responses(client, db_session, monkeypatch):
+    job = create_job(db_session, "https://example.com/watch?v=1")
+    update_job_status(db_session, job, JobStatus.downloading, progress=0.0)
+    db_session.commit()
+
+    store = ProgressStore(FakeRedis(), ttl_seconds=60)
+    store.record(job.id, 42.0)
+    monkeypatch.setattr(progress_module, "get_progress_store", lambda: store)
+
+    assert client.get(f"/jobs/{job.id}").json()["progress"] == 42.0
+    assert client.get("/jobs").json()["jobs"][0]["progress"] == 42.0
+
+    store.clear(job.id)
+    assert client.get(f"/jobs/{job.id}").json()["progress"] == 0.0
+
+
+def test_record_reports_failure_when_redis_is_down():
+    class BrokenRedis(FakeRedis):
+        def pipeline(self, transaction=False):
+            raise ConnectionError("redis down")
+
+    store = ProgressStore(BrokenRedis(), ttl_seconds=60)
+    assert store.record("job", 10.0) is False
+    assert store.live_progress(["job"]) == {}
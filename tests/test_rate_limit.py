@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from app.rate_limit import RateLimiter
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _limiter(fake: FakeTime, **kwargs) -> RateLimiter:
+    options = {
+        "requests_per_second": 2.0,
+        "burst_seconds": 1.0,
+        "backoff_seconds": 10.0,
+        "recovery_seconds": 100.0,
+        **kwargs,
+    }
+    return RateLimiter(None, clock=fake.clock, sleep=fake.sleep, **options)
+
+
+def test_requests_wait_once_the_burst_is_spent():
+    fake = FakeTime()
+    limiter = _limiter(fake)
+
+    waits = [limiter.acquire("https://www.youtube.com/watch?v=a") for _ in range(4)]
+
+    assert waits == [0.0, 0.0, pytest.approx(0.5), pytest.approx(0.5)]
+    assert fake.now == pytest.approx(1.0)
+
+
+def test_hosts_sharing_a_suffix_share_one_bucket():
+    fake = FakeTime()
+    limiter = _limiter(fake, host_requests_per_second={"googlevideo.com": 1.0})
+
+    assert limiter.bucket("https://rr1---sn-a.googlevideo.com/videoplayback") == (
+        "googlevideo.com",
+        1.0,
+        0,
+    )
+    limiter.acquire("https://rr1---sn-a.googlevideo.com/x")
+    assert limiter.acquire("https://rr5---sn-b.googlevideo.com/y") == pytest.approx(1.0)
+    assert limiter.acquire("https://example.com/") == 0.0
+
+
+def test_429_blocks_the_host_and_halves_its_rate_until_it_recovers():
+    fake = FakeTime()
+    limiter = _limiter(fake, recovery_seconds=1000.0)
+    limiter.acquire("youtube.com")
+
+    assert limiter.penalize("youtube.com") == pytest.approx(20.0)
+    assert limiter.penalize("youtube.com", retry_after=60.0) == pytest.approx(60.0)
+    assert limiter.acquire("youtube.com") == pytest.approx(60.0)
+    # The factor is back to 0.25 + 60/1000, so the burst refills at 0.62 requests/s.
+    limiter.acquire("youtube.com")
+    limiter.acquire("youtube.com")
+    assert limiter.acquire("youtube.com") == pytest.approx(1 / 0.62)
+
+    fake.now += 1000
+    limiter.acquire("youtube.com")
+    limiter.acquire("youtube.com")
+    assert limiter.acquire("youtube.com") == pytest.approx(0.5)
+
+
+def test_bytes_hook_charges_transferred_bytes_only():
+    fake = FakeTime()
+    limiter = _limiter(fake, bytes_per_second=1024 * 1024)
+    hook = limiter.bytes_hook()
+    info = {"url": "https://cdn.example.com/file.mp4"}
+
+    for downloaded in (10 * 1024**2, 11 * 1024**2, 13 * 1024**2):
+        hook({"filename": "f.mp4", "downloaded_bytes": downloaded, "info_dict": info})
+    hook(
+        {
+            "status": "finished",
+            "filename": "f.mp4",
+            "downloaded_bytes": 14 * 1024**2,
+            "info_dict": info,
+        }
+    )
+
+    # 4 MiB transferred after the 10 MiB resume baseline, with a 1 MiB burst.
+    assert sum(fake.slept) == pytest.approx(3.0)
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import itertools
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app import transcription_processor
+from app.audio_tools import SAMPLE_RATE
+from app.models import Job, JobStatus
+from app.prefetch import AudioPrefetcher
+from app.services.jobs import create_job
+from app.whisper_transcriber import TranscriptSegment
+
+
+def test_stream_transcript_appends_segments_and_reports_progress(
+    db_session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(transcription_processor.settings, "transcription_progress_interval", 0.0)
+    media = tmp_path / "clip.mp4"
+    media.write_bytes(b"")
+    job = create_job(db_session, source_url="local")
+    job.download_path = str(media)
+    job.status = JobStatus.transcribing
+    job.progress = 60.0
+    db_session.commit()
+
+    seen_progress = []
+
+    def segments():
+        for index in range(4):
+            start = index * 25.0
+            yield TranscriptSegment(start=start, end=start + 25.0, text=f" part{index}")
+            seen_progress.append(db_session.get(Job, job.id).progress)
+
+    transcript_path = transcription_processor._stream_transcript(
+        db_session, job, segments(), duration=100.0
+    )
+
+    with open(transcript_path, encoding="utf-8") as handle:
+        assert handle.read() == "part0 part1 part2 part3"
+    assert seen_progress == [70.0, 80.0, 90.0, 100.0]
+    assert db_session.get(Job, job.id).transcript_path == transcript_path
+
+
+def test_find_untranscribed_videos_includes_audio_files(tmp_path):
+    (tmp_path / "channel").mkdir()
+    (tmp_path / "channel" / "a.mp4").write_bytes(b"")
+    (tmp_path / "channel" / "b.m4a").write_bytes(b"")
+    (tmp_path / "channel" / "c.opus").write_bytes(b"")
+    (tmp_path / "channel" / "c.opus.txt").write_text("done")
+    (tmp_path / "channel" / "notes.json").write_text("{}")
+
+    found = transcription_processor.find_untranscribed_videos(tmp_path)
+
+    assert sorted(path.name for path in found) == ["a.mp4", "b.m4a"]
+
+
+def test_process_untranscribed_videos_imports_each_file_once(
+    db_session, tmp_path, monkeypatch
+):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    (downloads / "a.mp4").write_bytes(b"")
+    (downloads / "b.mp3").write_bytes(b"")
+    existing = create_job(db_session, source_url="local")
+    existing.download_path = str(downloads / "b.mp3")
+    db_session.commit()
+
+    dispatched = []
+    monkeypatch.setattr(transcription_processor.settings, "downloads_dir", str(downloads))
+    monkeypatch.setattr(
+        transcription_processor.settings, "media_scan_manifest", str(tmp_path / "scan.json")
+    )
+    monkeypatch.setattr(transcription_processor, "_dispatch_transcriptions", dispatched.extend)
+
+    transcription_processor.process_untranscribed_videos()
+    transcription_processor.process_untranscribed_videos()
+
+    db_session.expire_all()
+    imported = db_session.query(Job).filter(Job.download_path == str(downloads / "a.mp4")).all()
+    assert [job.id for job in imported] == dispatched
+    assert imported[0].status == JobStatus.downloaded
+
+
+def _transcribing_job(db_session, tmp_path):
+    media = tmp_path / "long.mp3"
+    media.write_bytes(b"")
+    job = create_job(db_session, source_url="local")
+    job.download_path = str(media)
+    job.status = JobStatus.transcribing
+    job.progress = 60.0
+    db_session.commit()
+    return job
+
+
+def test_stream_transcript_resumes_from_last_checkpoint(db_session, tmp_path, monkeypatch):
+    ticks = itertools.count()
+    monkeypatch.setattr(transcription_processor.time, "monotonic", lambda: float(next(ticks)))
+    monkeypatch.setattr(transcription_processor.settings, "transcription_checkpoint_interval", 2.0)
+    job = _transcribing_job(db_session, tmp_path)
+
+    def crashing():
+        for index in range(3):
+            yield TranscriptSegment(start=index * 25.0, end=(index + 1) * 25.0, text=f" p{index}")
+        raise MemoryError("killed")
+
+    with pytest.raises(MemoryError):
+        transcription_processor._stream_transcript(db_session, job, crashing(), duration=200.0)
+
+    db_session.expire_all()
+    job = db_session.get(Job, job.id)
+    assert (job.checkpoint_seconds, job.checkpoint_bytes) == (50.0, len("p0 p1"))
+    assert transcription_processor._resume_point(job) == (50.0, len("p0 p1"))
+
+    remaining = [TranscriptSegment(start=50.0, end=200.0, text=" p2")]
+    path = transcription_processor._stream_transcript(
+        db_session, job, remaining, duration=200.0, resume_bytes=job.checkpoint_bytes
+    )
+
+    with open(path, encoding="utf-8") as handle:
+        assert handle.read() == "p0 p1 p2"
+
+
+def test_transcribe_single_seeks_to_checkpoint(db_session, tmp_path, monkeypatch):
+    job = _transcribing_job(db_session, tmp_path)
+    with open(f"{job.download_path}.txt", "w", encoding="utf-8") as handle:
+        handle.write("first half partial")
+    job.checkpoint_seconds = 80.0
+    job.checkpoint_bytes = len("first half")
+    db_session.commit()
+    monkeypatch.setattr(transcription_processor, "_use_chunked_mode", lambda path: False)
+    monkeypatch.setattr(transcription_processor, "get_prefetcher", lambda: None)
+
+    class FakeTranscriber:
+        model_name = "tiny"
+        compute_type = "int8"
+        starts: list = []
+
+        def load_audio(self, audio_file):
+            return np.zeros(100 * SAMPLE_RATE, dtype=np.float32)
+
+        def iter_segments(self, audio_file, audio=None, start=0.0):
+            self.starts.append(start)
+            return iter([TranscriptSegment(start=80.0, end=100.0, text=" second half")]), 100.0
+
+    transcription_processor._transcribe_single(FakeTranscriber(), db_session, job)
+
+    db_session.expire_all()
+    job = db_session.get(Job, job.id)
+    assert FakeTranscriber.starts == [80.0]
+    assert job.status == JobStatus.completed
+    assert job.checkpoint_seconds is None
+    with open(job.transcript_path, encoding="utf-8") as handle:
+        assert handle.read() == "first half second half"
+
+
+def test_prefetched_audio_is_taken_by_the_next_job(db_session, tmp_path, monkeypatch):
+    decoded = []
+
+    def decoder(path):
+        decoded.append(path.name)
+        return np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    prefetcher = AudioPrefetcher(decoder, depth=1, max_bytes=10**9)
+    monkeypatch.setattr(transcription_processor, "get_prefetcher", lambda: prefetcher)
+    jobs = []
+    for name in ("running.mp3", "next.mp3", "after.mp3"):
+        job = create_job(db_session, source_url="local")
+        job.download_path = str(tmp_path / name)
+        job.status = JobStatus.downloaded
+        db_session.commit()
+        jobs.append(job)
+    running, upcoming, _after = jobs
+    running.status = JobStatus.transcribing
+    db_session.commit()
+
+    transcription_processor._prefetch_upcoming(db_session, running)
+    upcoming_task_job = db_session.get(Job, upcoming.id)
+    transcription_processor._prefetch_upcoming(db_session, upcoming_task_job)
+
+    class NoDecodeTranscriber:
+        def load_audio(self, audio_file):
+            raise AssertionError("decoded again instead of using the prefetch")
+
+    audio, _seconds = transcription_processor._decode(
+        NoDecodeTranscriber(), Path(upcoming.download_path)
+    )
+
+    assert audio.shape == (SAMPLE_RATE,)
+    assert prefetcher.stats()["hits"] == 1
+    assert decoded[0] == "next.mp3"
+    prefetcher.close()
+
+
+class FakeBatchTranscriber:
+    """Transcribes each clip to the length of the file name it was decoded from."""
+
+    model_name = "tiny"
+    compute_type = "int8"
+
+    def load_audio(self, audio_file):
+        return np.zeros(SAMPLE_RATE, dtype=np.float32) + len(audio_file.name)
+
+    def transcribe_batch(self, audios):
+        return [f"clip of {int(audio[0])} chars" for audio in audios]
+
+
+def _batch_jobs(db_session, tmp_path, monkeypatch, names):
+    monkeypatch.setattr(transcription_processor.settings, "transcription_batch_size", len(names))
+    monkeypatch.setattr(transcription_processor.settings, "transcription_batch_max_wait", 0.0)
+    monkeypatch.setattr(transcription_processor, "_is_batchable", lambda job: True)
+    monkeypatch.setattr(transcription_processor, "get_prefetcher", lambda: None)
+    requeued = []
+    monkeypatch.setattr(
+        transcription_processor.transcribe_video,
+        "apply_async",
+        lambda args, queue: requeued.append(args[0]),
+    )
+    jobs = []
+    for name in names:
+        job = create_job(db_session, source_url="local")
+        job.download_path = str(tmp_path / name)
+        job.status = JobStatus.downloaded
+        db_session.commit()
+        jobs.append(job)
+    jobs[0].status = JobStatus.transcribing
+    db_session.commit()
+    return jobs, requeued
+
+
+def test_batch_failure_on_one_job_leaves_the_others_completed(db_session, tmp_path, monkeypatch):
+    jobs, _requeued = _batch_jobs(
+        db_session, tmp_path, monkeypatch, ["a.mp3", "missing/b.mp3", "c.mp3"]
+    )
+
+    transcription_processor._transcribe_batch(FakeBatchTranscriber(), db_session, jobs[0])
+
+    db_session.expire_all()
+    statuses = [db_session.get(Job, job.id).status for job in jobs]
+    assert statuses == [JobStatus.completed, JobStatus.failed, JobStatus.completed]
+    with open(f"{jobs[2].download_path}.txt", encoding="utf-8") as handle:
+        assert handle.read() == "clip of 5 chars"
+
+
+def test_interrupted_batch_hands_its_peers_back(db_session, tmp_path, monkeypatch):
+    jobs, requeued = _batch_jobs(db_session, tmp_path, monkeypatch, ["a.mp3", "b.mp3", "c.mp3"])
+
+    def crash(job, transcriber):
+        raise RuntimeError("worker state lost")
+
+    monkeypatch.setattr(transcription_processor, "_record_model", crash)
+    with pytest.raises(RuntimeError):
+        transcription_processor._transcribe_batch(FakeBatchTranscriber(), db_session, jobs[0])
+
+    db_session.expire_all()
+    peers = [db_session.get(Job, job.id) for job in jobs[1:]]
+    assert [peer.status for peer in peers] == [JobStatus.downloaded, JobStatus.downloaded]
+    assert sorted(requeued) == sorted(peer.id for peer in peers)
+
+
+def test_redelivered_leader_requeues_peers_it_had_claimed(db_session, tmp_path, monkeypatch):
+    jobs, requeued = _batch_jobs(db_session, tmp_path, monkeypatch, ["a.mp3", "b.mp3", "c.mp3"])
+    leader, peer, bystander = jobs
+    peer.status = JobStatus.transcribing
+    peer.batch_leader_id = leader.id
+    db_session.commit()
+    resumed = []
+    monkeypatch.setattr(
+        transcription_processor,
+        "_transcribe_single",
+        lambda transcriber, session, job: resumed.append(job.id),
+    )
+
+    class FakeRegistry:
+        @contextmanager
+        def acquire(self, model_name, compute_type):
+            yield FakeBatchTranscriber()
+
+    monkeypatch.setattr(transcription_processor, "get_model_registry", FakeRegistry)
+    task = transcription_processor.transcribe_video
+    task.push_request(delivery_info={"redelivered": True})
+    try:
+        task.run(leader.id)
+    finally:
+        task.pop_request()
+
+    db_session.expire_all()
+    assert resumed == [leader.id]
+    assert requeued == [peer.id]
+    assert db_session.get(Job, peer.id).status == JobStatus.downloaded
+    assert db_session.get(Job, bystander.id).status == JobStatus.downloaded
+
+
+def test_prefetch_is_off_when_the_worker_runs_several_processes(
+    db_session, tmp_path, monkeypatch
+):
+    class Worker:
+        concurrency = 4
+
+    jobs, _requeued = _batch_jobs(db_session, tmp_path, monkeypatch, ["a.mp3", "b.mp3"])
+    prefetcher = AudioPrefetcher(lambda path: None, depth=1, max_bytes=10**9)
+    monkeypatch.setattr(transcription_processor, "get_prefetcher", lambda: prefetcher)
+    monkeypatch.setattr(transcription_processor, "_worker_concurrency", 1)
+    transcription_processor.record_worker_concurrency(sender="worker@host", instance=Worker())
+
+    transcription_processor._prefetch_upcoming(db_session, jobs[0])
+
+    assert prefetcher.stats()["pending"] == 0
+    prefetcher.close()
+
+
+def test_claim_batch_peers_takes_only_batchable_jobs_for_the_same_model(
+    db_session, tmp_path, monkeypatch
+):
+    jobs, _requeued = _batch_jobs(
+        db_session, tmp_path, monkeypatch, ["lead.mp3", "p1.mp3", "other.mp3", "long.mp3", "p2.mp3"]
+    )
+    leader, first, other_model, too_long, second = jobs
+    other_model.whisper_model = "small"
+    db_session.commit()
+    monkeypatch.setattr(transcription_processor.settings, "transcription_batch_size", 3)
+    monkeypatch.setattr(transcription_processor.settings, "transcription_batch_max_wait", 5.0)
+    monkeypatch.setattr(transcription_processor.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(
+        transcription_processor, "_is_batchable", lambda job: job.id != too_long.id
+    )
+
+    peers = transcription_processor._claim_batch_peers(db_session, leader)
+
+    assert [peer.id for peer in peers] == [first.id, second.id]
+    db_session.expire_all()
+    for job in (first, second):
+        assert db_session.get(Job, job.id).status == JobStatus.transcribing
+        assert db_session.get(Job, job.id).batch_leader_id == leader.id
+    for job in (other_model, too_long):
+        assert db_session.get(Job, job.id).status == JobStatus.downloaded
+
+
+def test_claimed_peer_task_exits_without_work(db_session, tmp_path, monkeypatch):
+    jobs, _requeued = _batch_jobs(db_session, tmp_path, monkeypatch, ["lead.mp3", "peer.mp3"])
+    leader, peer = jobs
+    peer.status = JobStatus.transcribing
+    peer.batch_leader_id = leader.id
+    db_session.commit()
+    monkeypatch.setattr(
+        transcription_processor,
+        "get_model_registry",
+        lambda: pytest.fail("a claimed peer must not load a model"),
+    )
+
+    transcription_processor.transcribe_video(peer.id)
+
+    db_session.expire_all()
+    assert db_session.get(Job, peer.id).status == JobStatus.transcribing
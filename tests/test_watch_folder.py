@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from app.watch_folder import SettleTracker, WatchFolder
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _event(event_type, src_path, dest_path=None, is_directory=False):
+    return SimpleNamespace(
+        event_type=event_type, src_path=src_path, dest_path=dest_path, is_directory=is_directory
+    )
+
+
+def _recorder(imported):
+    def importer(paths):
+        imported.extend(paths)
+        return len(paths)
+
+    return importer
+
+
+def test_settle_tracker_waits_for_file_to_stop_growing(tmp_path):
+    clock = FakeClock()
+    tracker = SettleTracker(5.0, clock)
+    media = tmp_path / "clip.mp4"
+    media.write_bytes(b"a")
+    tracker.touch(str(media))
+
+    assert tracker.settled() == []
+    clock.now = 4.0
+    media.write_bytes(b"ab")
+    assert tracker.settled() == []
+    clock.now = 8.0
+    assert tracker.settled() == []
+    clock.now = 9.0
+    assert tracker.settled() == [str(media)]
+    assert len(tracker) == 0
+
+
+def test_settle_tracker_drops_vanished_files(tmp_path):
+    tracker = SettleTracker(0.0, FakeClock())
+    tracker.touch(str(tmp_path / "gone.mp4"))
+
+    assert tracker.settled() == []
+    assert len(tracker) == 0
+
+
+def test_events_import_settled_media_once(tmp_path):
+    clock = FakeClock()
+    imported = []
+    watcher = WatchFolder(str(tmp_path), 2.0, _recorder(imported), clock=clock)
+    (tmp_path / "clip.mp4.part").write_bytes(b"partial")
+    watcher.dispatch(_event("created", str(tmp_path / "clip.mp4.part")))
+    (tmp_path / "clip.mp4.part").rename(tmp_path / "clip.mp4")
+    watcher.dispatch(_event("moved", str(tmp_path / "clip.mp4.part"), str(tmp_path / "clip.mp4")))
+    (tmp_path / "notes.txt").write_text("x")
+    watcher.dispatch(_event("created", str(tmp_path / "notes.txt")))
+
+    watcher.poll()
+    clock.now = 3.0
+    watcher.poll()
+    clock.now = 6.0
+    watcher.poll()
+
+    assert imported == [str(tmp_path / "clip.mp4")]
+    assert watcher.queued == 1
+
+
+def test_new_directory_is_scanned_for_existing_files(tmp_path):
+    clock = FakeClock()
+    imported = []
+    watcher = WatchFolder(str(tmp_path), 0.0, _recorder(imported), clock=clock)
+    album = tmp_path / "album"
+    album.mkdir()
+    (album / "one.flac").write_bytes(b"1")
+    (album / "two.flac").write_bytes(b"2")
+    (album / "two.flac.txt").write_text("done")
+
+    watcher.dispatch(_event("moved", str(tmp_path / "elsewhere"), str(album), is_directory=True))
+    watcher.poll()
+    watcher.poll()
+
+    assert imported == [str(album / "one.flac")]
+
+
+def test_catch_up_commits_manifest_after_files_are_imported(tmp_path):
+    clock = FakeClock()
+    root = tmp_path / "downloads"
+    root.mkdir()
+    (root / "offline.mp3").write_bytes(b"1")
+    manifest = tmp_path / "scan.json"
+    failures = [RuntimeError("database is locked")]
+    imported = []
+
+    def importer(paths):
+        if failures:
+            raise failures.pop()
+        imported.extend(paths)
+        return len(paths)
+
+    watcher = WatchFolder(str(root), 1.0, importer, manifest_path=manifest, clock=clock)
+    watcher.catch_up()
+    for now in (0.0, 1.0, 2.0, 3.0):
+        clock.now = now
+        watcher.poll()
+        if now < 3.0:
+            assert not manifest.exists()
+
+    assert imported == [str(root / "offline.mp3")]
+    assert manifest.exists()
+
+    restarted = WatchFolder(str(root), 1.0, importer, manifest_path=manifest, clock=clock)
+    restarted.catch_up()
+    assert len(restarted.tracker) == 0
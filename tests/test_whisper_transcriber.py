@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from app import whisper_transcriber
+from app.audio_tools import SAMPLE_RATE
+from app.whisper_transcriber import WhisperTranscriber, _merge_speech_windows
+
+
+def _transcriber(model, pipeline=None) -> WhisperTranscriber:
+    transcriber = WhisperTranscriber.__new__(WhisperTranscriber)
+    transcriber.model = model
+    transcriber.beam_size = 1
+    transcriber.num_workers = 1
+    transcriber._batched_pipeline = pipeline
+    return transcriber
+
+
+def _speech_runs(audio, _options):
+    """Stand-in VAD: every run of non-zero samples is speech."""
+    voiced = np.concatenate(([0], (audio != 0).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(voiced))
+    return [{"start": int(start), "end": int(end)} for start, end in zip(edges[::2], edges[1::2])]
+
+
+def _clip(value: float) -> np.ndarray:
+    """Five seconds: speech at 1-3s and 4-5s, filled with ``value``."""
+    audio = np.zeros(5 * SAMPLE_RATE, dtype=np.float32)
+    audio[1 * SAMPLE_RATE : 3 * SAMPLE_RATE] = value
+    audio[4 * SAMPLE_RATE :] = value
+    return audio
+
+
+class FakePipeline:
+    """Emits one segment inside each clip window, labelled with the audio value there."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def transcribe(self, audio, language, clip_timestamps, batch_size, beam_size):
+        self.calls.append({"language": language, "clips": clip_timestamps})
+        segments = [
+            SimpleNamespace(
+                start=clip["start"] + 0.5,
+                end=clip["end"],
+                text=f" {language or ''}{int(audio[int(clip['start'] * SAMPLE_RATE)])}",
+            )
+            for clip in clip_timestamps
+        ]
+        return iter(segments), None
+
+
+def _model(multilingual: bool = False):
+    return SimpleNamespace(
+        model=SimpleNamespace(is_multilingual=multilingual),
+        feature_extractor=SimpleNamespace(chunk_length=3),
+        detect_language=lambda audio: ("en" if audio.max() < 2 else "de", 1.0, []),
+    )
+
+
+def test_batch_maps_each_window_back_to_its_own_clip(monkeypatch):
+    monkeypatch.setattr(whisper_transcriber, "get_speech_timestamps", _speech_runs)
+    pipeline = FakePipeline()
+    transcriber = _transcriber(_model(), pipeline)
+
+    texts = transcriber.transcribe_batch([_clip(1.0), np.zeros(0, dtype=np.float32), _clip(2.0)])
+
+    assert texts == ["1 1", "", "2 2"]
+    # Clips sit end to end with a second of silence after each, the empty one included.
+    assert pipeline.calls[0]["clips"] == [
+        {"start": 1.0, "end": 3.0},
+        {"start": 4.0, "end": 5.0},
+        {"start": 8.0, "end": 10.0},
+        {"start": 11.0, "end": 12.0},
+    ]
+
+
+def test_batch_runs_one_pass_per_detected_language(monkeypatch):
+    monkeypatch.setattr(whisper_transcriber, "get_speech_timestamps", _speech_runs)
+    pipeline = FakePipeline()
+    transcriber = _transcriber(_model(multilingual=True), pipeline)
+
+    texts = transcriber.transcribe_batch([_clip(1.0), _clip(2.0), _clip(1.0)])
+
+    assert texts == ["en1 en1", "de2 de2", "en1 en1"]
+    assert [call["language"] for call in pipeline.calls] == ["en", "de"]
+
+
+def test_merge_speech_windows_joins_close_spans_and_splits_long_ones():
+    close = [{"start": 0, "end": 40}, {"start": 60, "end": 90}, {"start": 120, "end": 150}]
+    assert _merge_speech_windows(close, max_samples=100) == [(0, 90), (120, 150)]
+
+    long = [{"start": 10, "end": 260}, {"start": 270, "end": 280}]
+    assert _merge_speech_windows(long, max_samples=100) == [(10, 110), (110, 210), (210, 280)]
+
+
+class OutOfOrderModel:
+    """Returns window-relative segments; the first window finishes only after the last."""
+
+    def __init__(self, windows: int) -> None:
+        self.windows = windows
+        self.finished: list[int] = []
+        self.last_done = threading.Event()
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, beam_size):
+        window = int(audio[0])
+        if window == 0:
+            assert self.last_done.wait(5)
+        seconds = audio.shape[0] / SAMPLE_RATE
+        segments = [
+            SimpleNamespace(start=0.0, end=seconds / 2, text=f" w{window}a"),
+            SimpleNamespace(start=seconds / 2, end=seconds, text=f" w{window}b"),
+        ]
+        with self.lock:
+            self.finished.append(window)
+        if window == self.windows - 1:
+            self.last_done.set()
+        return iter(segments), None
+
+
+def test_chunked_segments_are_absolute_and_ordered_when_windows_finish_out_of_order(
+    monkeypatch,
+):
+    bounds = [(0, 10), (10, 25), (25, 30)]
+    audio = np.zeros(32 * SAMPLE_RATE, dtype=np.float32)
+    for window, (begin, end) in enumerate(bounds):
+        audio[(2 + begin) * SAMPLE_RATE : (2 + end) * SAMPLE_RATE] = window
+    splits = [(begin * SAMPLE_RATE, end * SAMPLE_RATE) for begin, end in bounds]
+    monkeypatch.setattr(whisper_transcriber, "find_silence_splits", lambda audio, seconds: splits)
+    model = OutOfOrderModel(len(bounds))
+    transcriber = _transcriber(model)
+
+    segments, duration = transcriber.iter_segments_chunked(
+        Path("clip.wav"), window_seconds=10, workers=3, audio=audio, start=2.0
+    )
+    segments = list(segments)
+
+    assert duration == 32.0
+    assert model.finished[0] != 0
+    expected = []
+    for begin, end in bounds:
+        middle = 2 + (begin + end) / 2
+        expected += [(2.0 + begin, middle), (middle, 2.0 + end)]
+    assert [(segment.start, segment.end) for segment in segments] == expected
+    texts = [segment.text for segment in segments]
+    assert texts == [f" w{window}{half}" for window in range(len(bounds)) for half in "ab"]
+    for earlier, later in zip(segments, segments[1:]):
+        assert earlier.start < later.start
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from app import db
+from app.config import get_settings
+from app.models import JobStatus
+from app.services.jobs import create_job, update_job_status
+from app.write_queue import WriteBatcher
+
+
+def test_flush_collapses_progress_per_job(db_session):
+    active = create_job(db_session, "https://example.com/watch?v=1")
+    done = create_job(db_session, "https://example.com/watch?v=2")
+    update_job_status(db_session, active, JobStatus.transcribing, progress=60.0)
+    update_job_status(db_session, done, JobStatus.completed, progress=100.0)
+    db_session.commit()
+
+    batcher = WriteBatcher(interval=60, max_pending=100)
+    for value in (65.0, 70.0, 75.0):
+        batcher.set_progress(active, value, JobStatus.transcribing)
+    batcher.set_progress(done, 80.0, JobStatus.transcribing)
+
+    assert batcher.flush() == 2
+    assert batcher.flushes == 1
+    db_session.expire_all()
+    assert active.progress == 75.0
+    assert done.progress == 100.0
+    assert batcher.flush() == 0
+    batcher.close()
+
+
+def test_sqlite_engine_applies_concurrency_pragmas(tmp_path):
+    engine = db._create_engine(f"sqlite:///{tmp_path}/pragmas.db")
+    settings = get_settings()
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        assert timeout == settings.sqlite_busy_timeout_ms
+    engine.dispose()